@@ -0,0 +1,33 @@
+# ✅ Production ASGI server: gunicorn managing uvicorn workers
+#    gunicorn -c gunicorn.conf.py library_management.asgi:application
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+
+# ✅ One event loop per worker; async views multiplex many slow clients on each
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+# ✅ Workers must share one cache: catalogue versions, cached JWT users and
+#    login rate limits kept in a per-process locmem cache would diverge
+#    between them. Default to the file cache (set CACHE_BACKEND=redis when
+#    running several hosts) and refuse locmem with more than one worker.
+if workers > 1:
+    os.environ.setdefault('CACHE_BACKEND', 'file')
+    if os.environ['CACHE_BACKEND'] == 'locmem':
+        raise RuntimeError(
+            "CACHE_BACKEND=locmem is per-process; use file or redis with WEB_CONCURRENCY > 1."
+        )
+
+# ✅ Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -12,3 +12,4 @@ class LibraryConfig(AppConfig):
         Import signals or perform startup tasks when the app is ready.
         """
         import library.signals  # Optional: For custom signals (if needed)
+        import library.checks  # noqa: F401 (registers the system checks)
@@ -0,0 +1,96 @@
+"""
+Async variants of the read-heavy endpoints, built on Django's async ORM.
+
+They are mounted under ``/api/async/`` and are meant for the ASGI server
+(see ``gunicorn.conf.py``), where they run on the event loop instead of the
+single thread each worker reserves for sync views, so slow clients do not
+hold a thread while their response is produced.
+"""
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .models import Book
+from .pagination import BookCursorPagination
+from .routers import replica_reads
+from .search import asearch_books
+from .serializers import BookSerializer, get_book_values_serializer, parse_book_fields
+from .views import BookSearchView
+
+
+def _int_param(request, name, default, minimum, maximum=None):
+    raw = request.GET.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+    if value < minimum:
+        raise ValidationError({name: f"Ensure this value is greater than or equal to {minimum}."})
+    return value if maximum is None else min(value, maximum)
+
+
+def _bad_request(exc):
+    return JsonResponse(exc.detail, status=400)
+
+
+@replica_reads
+async def student_books(request):
+    """
+    Public book list with keyset pagination (``?after=<id>&page_size=&fields=``).
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        fields = parse_book_fields(request.GET.get('fields'))
+        after = _int_param(request, 'after', 0, 0)
+        page_size = _int_param(request, 'page_size', api_settings.PAGE_SIZE, 1,
+                               BookCursorPagination.max_page_size)
+    except ValidationError as exc:
+        return _bad_request(exc)
+
+    serializer = get_book_values_serializer(fields)
+    rows = serializer.values(Book.objects.filter(id__gt=after).order_by('id'))
+    page = [row async for row in rows[:page_size + 1]]
+
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        query = request.GET.copy()
+        query['after'] = page[-1]['id']
+        next_url = request.build_absolute_uri(f'?{query.urlencode()}')
+    return JsonResponse({'next': next_url, 'results': serializer.serialize(page)})
+
+
+@replica_reads
+async def book_search(request):
+    """
+    Relevance-ranked search (``?q=&limit=``), as ``BookSearchView``.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    query = request.GET.get('q', '')
+    try:
+        limit = _int_param(request, 'limit', BookSearchView.default_limit, 1, BookSearchView.max_limit)
+    except ValidationError as exc:
+        return _bad_request(exc)
+    books = await asearch_books(query, limit)
+    results = []
+    for book, data in zip(books, BookSerializer(books, many=True).data):
+        data['score'] = book.score
+        results.append(data)
+    return JsonResponse({'query': query, 'results': results})
+
+
+async def book_detail(request, pk):
+    """
+    Public details of a single book.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        book = await Book.objects.aget(pk=pk)
+    except Book.DoesNotExist:
+        raise Http404("No book matches the given query.")
+    return JsonResponse(BookSerializer(book).data)
@@ -0,0 +1,109 @@
+"""
+JWT authentication with cached user and blacklist lookups.
+
+``CachedJWTAuthentication`` memoizes the user row behind a token subject for
+``AUTH_USER_CACHE_TTL`` seconds, and ``CachedRefreshToken`` memoizes which
+tokens are blacklisted. Only blacklisted tokens are cached: a "not
+blacklisted" answer could be stale in another process, or in another cache,
+and would let a rotated token be refreshed again. Both caches are invalidated from the signal
+handlers in ``library.signals`` when the user or the blacklist changes.
+``LoginRateThrottle`` applies the login rate limits of ``library.ratelimit``
+to the token endpoint.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .ratelimit import login_retry_after
+
+
+def user_cache_key(user_id):
+    return f'library:auth-user:{user_id}'
+
+
+def blacklist_cache_key(jti):
+    return f'library:token-blacklisted:{jti}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def cache_blacklisted(jti):
+    # A refresh token cannot be used after its lifetime, blacklisted or not.
+    cache.set(blacklist_cache_key(jti), True, api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def invalidate_blacklisted(jti):
+    cache.delete(blacklist_cache_key(jti))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the token's user from the cache.
+
+    Permissions are served by ``library.backends.CachedPermissionBackend``,
+    which is warmed on a miss; the is_active and revoked-password checks
+    still run on every request.
+    """
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        user = cache.get(user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(validated_token)
+            user.get_all_permissions()  # warm the process-wide permission cache
+            cache.set(user_cache_key(user_id), user, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+            return user
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check is answered from the cache when the
+    token is known to be blacklisted; any other token is looked up.
+    """
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if cache.get(blacklist_cache_key(jti)) is None:
+            if not BlacklistedToken.objects.filter(token__jti=jti).exists():
+                return
+            cache_blacklisted(jti)
+        raise TokenError(_("Token is blacklisted"))
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer using ``CachedRefreshToken``.
+    """
+    token_class = CachedRefreshToken
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Throttle login attempts per client IP and per email (``LOGIN_RATE_LIMITS``).
+    """
+    def allow_request(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        self.retry_after = login_retry_after(request, email if isinstance(email, str) else None)
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,178 @@
+"""
+Incrementally maintained author statistics.
+
+``Author`` holds, per normalized author name, the number of books and the
+first and last publication dates, so author listings and facets read a small
+pre-aggregated table instead of grouping the whole Book table. Book signals
+apply every write as a delta:
+
+* adding books bumps the counts and widens the date ranges of all affected
+  authors with one bulk UPDATE, creating missing rows first;
+* removing books lowers the counts, and only re-reads an author's books when
+  a removed book sat on the edge of its date range or was its last book.
+
+Writes that bypass signals (raw SQL, ``QuerySet.update()``) should be
+followed by ``rebuild_authors()``.
+"""
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, Q, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import Author, Book
+
+KEY_LENGTH = Author._meta.get_field('key').max_length
+
+
+def normalize_author_name(name):
+    """Return the Author key for ``name``: case-folded, with whitespace collapsed."""
+    return ' '.join(name.split()).casefold()[:KEY_LENGTH]
+
+
+def author_initial(key):
+    """Facet initial for a key: its first letter or digit, otherwise ``'#'``."""
+    initial = key[:1].upper()
+    return initial if initial.isalnum() else '#'
+
+
+def _merge(rows):
+    """
+    Fold ``(name, count, first, last)`` rows into per-key statistics.
+    """
+    summary = {}
+    for name, count, first, last in rows:
+        key = normalize_author_name(name or '')
+        if not key:
+            continue
+        stats = summary.get(key)
+        if stats is None:
+            stats = summary[key] = {
+                'name': ' '.join(name.split()), 'names': set(), 'count': 0, 'first': None, 'last': None,
+            }
+        stats['names'].add(name)
+        stats['count'] += count
+        if first is not None and (stats['first'] is None or first < stats['first']):
+            stats['first'] = first
+        if last is not None and (stats['last'] is None or last > stats['last']):
+            stats['last'] = last
+    return summary
+
+
+def _summarize(entries):
+    return _merge((name, 1, published, published) for name, published in entries)
+
+
+def _grouped(queryset):
+    rows = (
+        queryset.order_by().values('author')
+        .annotate(count=Count('id'), first=Min('published_date'), last=Max('published_date'))
+    )
+    return _merge((row['author'], row['count'], row['first'], row['last']) for row in rows)
+
+
+def add_books(entries):
+    """
+    Count ``(author, published_date)`` pairs of books that were added.
+    """
+    summary = _summarize(entries)
+    if not summary:
+        return
+    Author.objects.bulk_create(
+        [Author(key=key, name=stats['name'], initial=author_initial(key)) for key, stats in summary.items()],
+        ignore_conflicts=True,
+    )
+    authors = list(Author.objects.filter(key__in=list(summary)).only('pk', 'key'))
+    for author in authors:
+        stats = summary[author.key]
+        author.book_count = F('book_count') + stats['count']
+        author.first_published = F('first_published')
+        author.last_published = F('last_published')
+        if stats['first'] is not None:
+            first, last = Value(stats['first']), Value(stats['last'])
+            author.first_published = Least(Coalesce('first_published', first), first)
+            author.last_published = Greatest(Coalesce('last_published', last), last)
+    Author.objects.bulk_update(authors, ['book_count', 'first_published', 'last_published'])
+
+
+def remove_books(entries):
+    """
+    Uncount ``(author, published_date)`` pairs of books that were removed.
+    """
+    summary = _summarize(entries)
+    if not summary:
+        return
+    decremented, stale = [], []
+    for author in Author.objects.filter(key__in=list(summary)):
+        stats = summary[author.key]
+        on_edge = stats['first'] is not None and (
+            author.first_published is None or stats['first'] <= author.first_published
+            or author.last_published is None or stats['last'] >= author.last_published
+        )
+        if on_edge or author.book_count <= stats['count']:
+            stale.append(author)
+        else:
+            author.book_count = Greatest(
+                F('book_count') - stats['count'], Value(0), output_field=models.PositiveIntegerField()
+            )
+            decremented.append(author)
+    if decremented:
+        Author.objects.bulk_update(decremented, ['book_count'])
+    for author in stale:
+        refresh_author(author, summary[author.key]['names'])
+
+
+def refresh_author(author, names=()):
+    """
+    Recompute one author's row from its books, deleting it if none are left.
+
+    Candidate books are those whose author starts with the first word of
+    ``author.name`` or of another spelling in ``names``, which the
+    (author, published_date) index serves as a range scan; the candidates
+    are then matched on the normalized key.
+    """
+    lookup = Q()
+    for name in {author.name, *names}:
+        if name.split():
+            lookup |= Q(author__istartswith=name.split()[0])
+    stats = _grouped(Book.objects.filter(lookup)).get(author.key)
+    if stats is None:
+        author.delete()
+        return
+    Author.objects.filter(pk=author.pk).update(
+        book_count=stats['count'], first_published=stats['first'], last_published=stats['last'],
+    )
+
+
+def rebuild_authors(batch_size=1000):
+    """Recompute every Author row from the Book table and return the row count."""
+    summary = _grouped(Book.objects.all())
+    with transaction.atomic():
+        Author.objects.all().delete()
+        Author.objects.bulk_create(
+            [
+                Author(
+                    key=key, name=stats['name'], initial=author_initial(key), book_count=stats['count'],
+                    first_published=stats['first'], last_published=stats['last'],
+                )
+                for key, stats in summary.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(summary)
+
+
+def changed_entries(books):
+    """
+    Return ``(removed, added)`` author entries for books that were updated,
+    using the values they were loaded with. Books whose previous values are
+    unknown are skipped.
+    """
+    removed, added = [], []
+    for book in books:
+        current = (book.author, book.published_date)
+        previous = getattr(book, '_loaded_author_values', None)
+        if previous is None or previous == current:
+            continue
+        removed.append(previous)
+        added.append(current)
+        book._loaded_author_values = current
+    return removed, added
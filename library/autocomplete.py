@@ -0,0 +1,317 @@
+"""
+In-memory prefix index for title and author autocomplete.
+
+Each field (``Book.title``, ``Book.author``) has a ``PrefixIndex``: a sorted
+list of keys with a parallel list of the entries they lead to. An entry is
+a normalized value (case-folded, whitespace collapsed) and is reachable from
+the start of each of its first few words, so "aus" finds "Jane Austen". A
+lookup is two binary searches for the key range, followed by a top-k by
+weight over that range. Large ranges (short prefixes over a big catalogue)
+keep their top-k in a small LRU cache, which writes update in place. The
+weight of an entry is the number of books carrying it: for authors, their
+number of books; for titles, their number of copies or editions.
+
+Memory is bounded. Keys are truncated, only ``words`` word starts are
+indexed per entry, and at most ``max_entries`` entries are kept per field.
+When over the limit, the build keeps the heaviest entries and new ones are
+dropped until the next rebuild.
+
+The index is built lazily on first use and updated from Book signals once
+the write commits. After ``LIBRARY_AUTOCOMPLETE_TTL`` seconds it is rebuilt
+so that writes made by other processes are eventually picked up. That
+rebuild runs in a background thread into fresh indexes, which are swapped in
+when ready. Until then, the current ones keep serving suggestions and
+updates, and the updates are replayed onto the new ones.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('title', 'author')
+# Sorts after any character a key can contain.
+KEY_END = '\U0010ffff'
+
+
+def normalize(text):
+    """Case-fold ``text`` and collapse its whitespace."""
+    return ' '.join(text.split()).casefold() if text else ''
+
+
+class PrefixIndex:
+    """
+    Weighted entries of one field, searchable by word prefix.
+    """
+
+    def __init__(self, words=3, key_length=40, max_entries=500000, scan_limit=256, top_size=20, cache_size=4096,
+                 batch_size=64):
+        self.words = words
+        self.key_length = key_length
+        self.max_entries = max_entries
+        self.scan_limit = scan_limit
+        self.top_size = top_size
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._keys = []      # sorted
+        self._targets = []   # entry reached by the key at the same position
+        self._entries = {}   # entry -> [weight, display text]
+        self._top = OrderedDict()  # key prefix -> heaviest entries in its range
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entry_keys(self, entry):
+        """Return the keys ``entry`` is reachable from."""
+        keys, start = [], 0
+        for _ in range(self.words):
+            keys.append(entry[start:start + self.key_length])
+            start = entry.find(' ', start) + 1
+            if not start:
+                break
+        return keys
+
+    def _rank(self, entry):
+        return -self._entries[entry][0], entry
+
+    def build(self, counts):
+        """Replace the contents with ``{entry: [weight, display]}``."""
+        self.dropped = max(len(counts) - self.max_entries, 0)
+        if self.dropped:
+            counts = dict(heapq.nsmallest(self.max_entries, counts.items(), key=lambda item: (-item[1][0], item[0])))
+        pairs = sorted((key, entry) for entry in counts for key in self.entry_keys(entry))
+        self._keys = [key for key, _ in pairs]
+        self._targets = [entry for _, entry in pairs]
+        self._entries = counts
+        self._top.clear()
+
+    def add(self, value):
+        """Count one more book carrying ``value``."""
+        entry = normalize(value)
+        if not entry:
+            return
+        stats = self._entries.get(entry)
+        if stats is None:
+            if len(self._entries) >= self.max_entries:
+                self.dropped += 1
+                return
+            stats = self._entries[entry] = [0, ' '.join(value.split())]
+            for key in self.entry_keys(entry):
+                position = bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._targets.insert(position, entry)
+        stats[0] += 1
+        for prefix in self._cached_prefixes(entry):
+            top = self._top[prefix]
+            if entry not in top:
+                top.append(entry)
+            top.sort(key=self._rank)
+            del top[self.top_size:]
+
+    def remove(self, value):
+        """Count one book fewer carrying ``value``."""
+        entry = normalize(value)
+        stats = self._entries.get(entry)
+        if stats is None:
+            return
+        for prefix in self._cached_prefixes(entry):
+            if entry in self._top[prefix]:
+                # Something outside the cached list may now rank higher.
+                del self._top[prefix]
+        stats[0] -= 1
+        if stats[0] > 0:
+            return
+        del self._entries[entry]
+        for key in self.entry_keys(entry):
+            position = bisect_left(self._keys, key)
+            while self._targets[position] != entry:
+                position += 1
+            del self._keys[position]
+            del self._targets[position]
+
+    def update(self, removed, added):
+        """
+        Apply many ``remove``/``add`` calls. Large batches, such as imports,
+        merge into the sorted lists in one pass instead of inserting each
+        key separately.
+        """
+        if len(removed) + len(added) <= self.batch_size:
+            for value in removed:
+                self.remove(value)
+            for value in added:
+                self.add(value)
+            return
+        self._top.clear()
+        gone, new = set(), set()
+        for value in removed:
+            entry = normalize(value)
+            stats = self._entries.get(entry)
+            if stats is not None:
+                stats[0] -= 1
+                if stats[0] <= 0:
+                    del self._entries[entry]
+                    gone.add(entry)
+        for value in added:
+            entry = normalize(value)
+            if not entry:
+                continue
+            stats = self._entries.get(entry)
+            if stats is None:
+                if len(self._entries) >= self.max_entries:
+                    self.dropped += 1
+                    continue
+                stats = self._entries[entry] = [0, ' '.join(value.split())]
+                if entry in gone:
+                    gone.discard(entry)  # its keys are still in place
+                else:
+                    new.add(entry)
+            stats[0] += 1
+        pairs = zip(self._keys, self._targets)
+        if gone:
+            pairs = [(key, entry) for key, entry in pairs if entry not in gone]
+        pairs = list(heapq.merge(pairs, sorted((key, entry) for entry in new for key in self.entry_keys(entry))))
+        self._keys = [key for key, _ in pairs]
+        self._targets = [entry for _, entry in pairs]
+
+    def _cached_prefixes(self, entry):
+        prefixes = {key[:length] for key in self.entry_keys(entry) for length in range(1, len(key) + 1)}
+        return [prefix for prefix in prefixes if prefix in self._top]
+
+    def top(self, query, limit):
+        """Return up to ``limit`` ``(display, weight)`` pairs for a normalized prefix, heaviest first."""
+        prefix = query[:self.key_length]
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + KEY_END, lo)
+        if len(query) > self.key_length:
+            # Keys are truncated; check the rest of the query on the entries.
+            candidates = {entry for entry in self._targets[lo:hi] if f' {query}' in f' {entry}'}
+        elif hi - lo <= self.scan_limit:
+            candidates = set(self._targets[lo:hi])
+        else:
+            top = self._top.get(prefix)
+            if top is None:
+                top = heapq.nsmallest(self.top_size, set(self._targets[lo:hi]), key=self._rank)
+                self._top[prefix] = top
+                if len(self._top) > self.cache_size:
+                    self._top.popitem(last=False)
+            else:
+                self._top.move_to_end(prefix)
+            candidates = top
+        entries = heapq.nsmallest(limit, candidates, key=self._rank)
+        return [(self._entries[entry][1], self._entries[entry][0]) for entry in entries]
+
+
+class Autocomplete:
+    """
+    Title and author prefix indexes over the Book table.
+    """
+
+    def __init__(self, **options):
+        self._options = options
+        self._lock = threading.RLock()
+        self._rebuild_thread = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.indexes = {field: PrefixIndex(**self._options) for field in FIELDS}
+            self._built_at = None
+            self._pending = None  # updates made during a rebuild, else None
+
+    def _is_fresh(self):
+        ttl = getattr(settings, 'LIBRARY_AUTOCOMPLETE_TTL', 300)
+        return self._built_at is not None and time.monotonic() - self._built_at < ttl
+
+    def _scan(self):
+        """Return fresh indexes built from the Book table."""
+        counts = {field: {} for field in FIELDS}
+        for values in Book.objects.values_list(*FIELDS).iterator(chunk_size=2000):
+            for field, value in zip(FIELDS, values):
+                entry = normalize(value)
+                if entry:
+                    stats = counts[field].setdefault(entry, [0, ' '.join(value.split())])
+                    stats[0] += 1
+        indexes = {field: PrefixIndex(**self._options) for field in FIELDS}
+        for field in FIELDS:
+            indexes[field].build(counts[field])
+        return indexes
+
+    def _ensure_built(self):
+        if self._is_fresh():
+            return
+        with self._lock:
+            if self._is_fresh() or self._pending is not None:
+                # Built by another thread while this one waited, or rebuilding.
+                return
+            if self._built_at is None:
+                # Nothing to serve yet.
+                self.indexes = self._scan()
+                self._built_at = time.monotonic()
+                return
+            pending = self._pending = []
+            self._rebuild_thread = threading.Thread(target=self._rebuild, args=(pending,), daemon=True)
+            self._rebuild_thread.start()
+
+    def _rebuild(self, pending):
+        try:
+            indexes = self._scan()
+        except Exception:
+            logger.exception("Autocomplete rebuild failed; keeping the current index.")
+            indexes = None
+        finally:
+            connections.close_all()
+        with self._lock:
+            if self._pending is not pending:
+                return  # reset meanwhile
+            self._pending = None
+            self._built_at = time.monotonic()
+            if indexes is None:
+                return
+            for removed, added in pending:
+                self._apply(indexes, removed, added)
+            self.indexes = indexes
+
+    @staticmethod
+    def _apply(indexes, removed, added):
+        for position, field in enumerate(FIELDS):
+            indexes[field].update([values[position] for values in removed], [values[position] for values in added])
+
+    def update(self, removed=(), added=()):
+        """Apply ``(title, author)`` pairs of books removed and added."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._apply(self.indexes, removed, added)
+            if self._pending is not None:
+                self._pending.append((list(removed), list(added)))
+
+    def suggest(self, query, limit):
+        """
+        Return ``{'titles': [...], 'authors': [...]}``, each up to ``limit``
+        ``{'text', 'count'}`` suggestions for the prefix ``query``.
+        """
+        query = normalize(query)
+        if not query:
+            return {'titles': [], 'authors': []}
+        self._ensure_built()
+        with self._lock:
+            return {
+                f'{field}s': [{'text': text, 'count': count} for text, count in self.indexes[field].top(query, limit)]
+                for field in FIELDS
+            }
+
+
+@lru_cache(maxsize=None)
+def get_autocomplete():
+    """Return this process's autocomplete index."""
+    return Autocomplete(max_entries=getattr(settings, 'LIBRARY_AUTOCOMPLETE_MAX_ENTRIES', 500000))
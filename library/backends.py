@@ -0,0 +1,152 @@
+"""
+Authentication backend with a per-process permission cache for AdminUser.
+
+Passwords are verified on the bounded worker pool of ``library.passwords``,
+which also upgrades outdated hashes on a successful login.
+
+Permission checks in the admin and DRF permission classes go through
+``ModelBackend``, which loads the user's direct and group permissions on the
+first check of every request. ``CachedPermissionBackend`` keeps them in
+process memory as frozensets of interned ``"app_label.codename"`` strings,
+loaded with a single UNION query on a miss and dropped from ``m2m_changed``
+handlers in ``library.signals`` (or after ``PERMISSION_CACHE_TTL`` seconds,
+which bounds staleness for changes made by other processes).
+
+Every invalidation bumps a generation number. A load stores its result only
+if no invalidation ran while it was querying, so a revocation that lands
+mid-load is not cached over. Invalidations repeat when the change commits,
+which drops anything read from the rows before the commit.
+"""
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.db.models import Value
+
+from .passwords import verify_password
+
+_lock = threading.Lock()
+_entries = {}  # user_id -> (expires_at, user_perms, group_perms)
+_all_permissions = None  # (expires_at, perms) shared by every superuser
+_generation = 0  # bumped by every invalidation
+
+
+def _as_frozenset(rows):
+    return frozenset(sys.intern(f"{app_label}.{codename}") for app_label, codename in rows)
+
+
+def _load_user_permissions(user_id):
+    """Fetch ``(user_perms, group_perms)`` for one user in a single query."""
+    fields = ('content_type__app_label', 'codename', 'source')
+    # Permission's default ordering is not allowed inside a compound query.
+    direct = (Permission.objects.filter(admin_users_permissions=user_id).order_by()
+              .annotate(source=Value('user')).values_list(*fields))
+    via_groups = (Permission.objects.filter(group__admin_users=user_id).order_by()
+                  .annotate(source=Value('group')).values_list(*fields))
+    rows = list(direct.union(via_groups, all=True))
+    return (
+        _as_frozenset((app, codename) for app, codename, source in rows if source == 'user'),
+        _as_frozenset((app, codename) for app, codename, source in rows if source == 'group'),
+    )
+
+
+def _ttl():
+    return getattr(settings, 'PERMISSION_CACHE_TTL', 300)
+
+
+def get_cached_permissions(user_id):
+    """Return ``(user_perms, group_perms)`` for ``user_id``, loading on a miss."""
+    now = time.monotonic()
+    entry = _entries.get(user_id)
+    if entry is None or entry[0] <= now:
+        generation = _generation
+        entry = (now + _ttl(), *_load_user_permissions(user_id))
+        with _lock:
+            if generation == _generation:
+                _entries[user_id] = entry
+    return entry[1], entry[2]
+
+
+def get_all_permission_names():
+    """Every permission in the database, as granted to superusers."""
+    global _all_permissions
+    now = time.monotonic()
+    entry = _all_permissions
+    if entry is None or entry[0] <= now:
+        generation = _generation
+        rows = Permission.objects.values_list('content_type__app_label', 'codename')
+        entry = (now + _ttl(), _as_frozenset(rows))
+        with _lock:
+            if generation == _generation:
+                _all_permissions = entry
+    return entry[1]
+
+
+def invalidate_permissions(user_ids=None):
+    """Drop cached permissions for ``user_ids``, or for everyone if omitted."""
+    user_ids = None if user_ids is None else list(user_ids)
+    _invalidate(user_ids)
+    # Other threads may reload the old rows until the change commits.
+    transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def _invalidate(user_ids):
+    global _all_permissions, _generation
+    with _lock:
+        _generation += 1
+        if user_ids is None:
+            _entries.clear()
+            _all_permissions = None
+        else:
+            for user_id in user_ids:
+                _entries.pop(user_id, None)
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend answering permission checks from the process-wide cache.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            verify_password(password, None)
+            return None
+        valid, upgraded = verify_password(password, user.password)
+        if valid and upgraded:
+            user.password = upgraded
+            user.save(update_fields=['password'])
+        if valid and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def _cached(self, user_obj, obj, index):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return frozenset()
+        if user_obj.is_superuser:
+            return get_all_permission_names()
+        return get_cached_permissions(user_obj.pk)[index]
+
+    def get_user_permissions(self, user_obj, obj=None):
+        return self._cached(user_obj, obj, 0)
+
+    def get_group_permissions(self, user_obj, obj=None):
+        return self._cached(user_obj, obj, 1)
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return frozenset()
+        if user_obj.is_superuser:
+            return get_all_permission_names()
+        user_perms, group_perms = get_cached_permissions(user_obj.pk)
+        return user_perms | group_perms
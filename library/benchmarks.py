@@ -0,0 +1,175 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database created from the configured
+one (``test_database()``), seeded with synthetic books (``seed_books()``), and
+report latency percentiles (``summarize()``). Saved results can be compared
+between commits with ``compare_results()``.
+"""
+import math
+import platform
+import random
+import statistics
+import subprocess
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .authors import rebuild_authors
+from .cache import bump_catalogue_version
+from .models import Book, ChangeSequence
+from .search import get_search_backend
+
+WORDS = (
+    'river', 'shadow', 'garden', 'empire', 'silent', 'winter', 'machine', 'ocean',
+    'letters', 'history', 'city', 'stars', 'memory', 'forest', 'glass', 'storm',
+    'kingdom', 'journey', 'light', 'secret', 'mountain', 'engine', 'paper', 'island',
+)
+AUTHORS = (
+    'Ada Fielding', 'Bruno Castell', 'Chiara Moss', 'Dev Raman', 'Elena Voss',
+    'Farid Haddad', 'Grace Whitlow', 'Hiro Tanaka', 'Ines Duarte', 'Jonah Price',
+)
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples, default=0.0) * 1000, 3),
+    }
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Create (and afterwards destroy) a test database for the duration of the block."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def close_thread_connections():
+    """
+    Close the database connections opened by the calling worker thread.
+
+    Django ignores close() on an in-memory SQLite database, so without this a
+    worker's connection is only closed when the garbage collector reaches it.
+    That can happen inside another thread's query on the same shared-cache
+    database, where sqlite3_close() waits on a lock the query holds and the
+    benchmark hangs. The database itself lives on in the main thread's
+    connection.
+    """
+    for conn in connections.all(initialized_only=True):
+        conn.close()
+        if conn.connection is not None:
+            conn.connection.close()
+            conn.connection = None
+
+
+def iter_book_rows(count, seed=0):
+    """
+    Yield ``count`` synthetic ``(title, author, description, published_date)``
+    rows with a reproducible random mix of words.
+    """
+    rng = random.Random(seed)
+    start = date(1950, 1, 1).toordinal()
+    for n in range(count):
+        yield (
+            f"{' '.join(rng.sample(WORDS, 3)).title()} {n}",
+            rng.choice(AUTHORS),
+            ' '.join(rng.choices(WORDS, k=20)),
+            date.fromordinal(start + rng.randrange(365 * 70)),
+        )
+
+
+def seed_books(count, seed=0, batch_size=5000):
+    """
+    Insert ``count`` synthetic books and return the number inserted.
+
+    Rows go in through ``executemany`` in batched transactions, as
+    ``import_books`` does, so seeding a million books takes seconds rather
+    than minutes. Author statistics are rebuilt, and catalogue caches and the
+    search index invalidated, once at the end instead of per batch.
+    """
+    quote = connection.ops.quote_name
+    columns = ('title', 'author', 'description', 'published_date', 'updated_at', 'change_seq')
+    sql = 'INSERT INTO {table} ({columns}) VALUES ({placeholders})'.format(
+        table=quote(Book._meta.db_table),
+        columns=', '.join(quote(column) for column in columns),
+        placeholders=', '.join(['%s'] * len(columns)),
+    )
+    adapt_date = connection.ops.adapt_datefield_value
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    rows = iter_book_rows(count, seed)
+    inserted = 0
+    while batch := list(islice(rows, batch_size)):
+        with transaction.atomic(), connection.cursor() as cursor:
+            first = ChangeSequence.allocate(len(batch))
+            cursor.executemany(sql, [
+                row[:3] + (adapt_date(row[3]), now, seq) for seq, row in enumerate(batch, first)
+            ])
+        inserted += len(batch)
+    rebuild_authors()
+    bump_catalogue_version()
+    get_search_backend().reset()
+    return inserted
+
+
+def environment_info():
+    """Describe where a benchmark ran, for comparing results between commits."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare two benchmark result dicts scenario by scenario.
+
+    Returns ``(rows, regressions)``: a row per scenario present in both with
+    the relative change of p95 latency and throughput, and the names of
+    scenarios whose p95 grew or whose throughput fell by more than
+    ``threshold`` (a fraction, e.g. 0.1 for 10%).
+    """
+    rows, regressions = [], []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        p95_change = stats['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        rps_change = stats['rps'] / before['rps'] - 1 if before['rps'] else 0.0
+        rows.append((name, before, stats, p95_change, rps_change))
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+    return rows, regressions
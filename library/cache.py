@@ -0,0 +1,96 @@
+"""
+Versioned read-through caching for catalogue reads.
+
+Every cached catalogue read is keyed by the current catalogue version, a
+value replaced from Book signals whenever a book is saved or deleted. A bump
+makes all previously cached pages unreachable at once, so entries never need
+to be deleted individually and simply age out of the cache backend.
+
+The version is kept in its own cache, ``CATALOGUE_VERSION_CACHE``, so culling
+the cached pages never evicts it (``library.checks`` refuses a store shared
+with them). Each bump sets a new random version instead of incrementing the
+old one. Concurrent bumps through a backend without an atomic ``incr()``,
+such as the file cache, therefore still end on a version nothing was cached
+under.
+"""
+import hashlib
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.http import urlencode
+
+CATALOGUE_VERSION_KEY = 'library:catalogue-version'
+CATALOGUE_CHANGED_AT_KEY = 'library:catalogue-changed-at'
+
+
+def version_cache():
+    """Return the cache holding the catalogue version."""
+    return caches[getattr(settings, 'CATALOGUE_VERSION_CACHE', 'default')]
+
+
+def _new_version():
+    return secrets.token_hex(8)
+
+
+def get_catalogue_version():
+    """Return the current catalogue version."""
+    store = version_cache()
+    version = store.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        store.add(CATALOGUE_VERSION_KEY, _new_version(), timeout=None)
+        version = store.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue read."""
+    store = version_cache()
+    store.set(CATALOGUE_CHANGED_AT_KEY, time.time(), timeout=None)
+    version = _new_version()
+    store.set(CATALOGUE_VERSION_KEY, version, timeout=None)
+    return version
+
+
+def catalogue_changed_within(seconds):
+    """Return True if the catalogue version was bumped in the last ``seconds``."""
+    changed_at = version_cache().get(CATALOGUE_CHANGED_AT_KEY)
+    return changed_at is not None and time.time() - changed_at < seconds
+
+
+def _params_digest(params):
+    items = sorted((key, str(value)) for key, value in dict(params).items())
+    return hashlib.sha1(urlencode(items).encode()).hexdigest()
+
+
+def catalogue_cache_key(namespace, params, version=None):
+    """Cache key for ``namespace`` and ``params`` at ``version`` (default: the current one)."""
+    if version is None:
+        version = get_catalogue_version()
+    return f"library:{namespace}:{version}:{_params_digest(params)}"
+
+
+def catalogue_etag(namespace, params, version=None):
+    """Quoted strong ETag for ``namespace`` and ``params`` at ``version`` (default: the current one)."""
+    if version is None:
+        version = get_catalogue_version()
+    return f'"{namespace}-{version}-{_params_digest(params)[:16]}"'
+
+
+def cached_catalogue_read(namespace, params, compute, timeout=None, version=None):
+    """
+    Return the cached value for ``namespace``/``params``, calling ``compute``
+    and storing its result on a miss. ``timeout`` defaults to the backend's.
+    A response that also sends ``catalogue_etag()`` passes the ``version`` it
+    read once, so the ETag and the body always belong to the same version.
+    """
+    key = catalogue_cache_key(namespace, params, version)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            cache.set(key, value)
+        else:
+            cache.set(key, value, timeout)
+    return value
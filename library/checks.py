@@ -0,0 +1,37 @@
+"""
+System checks for settings the library depends on.
+
+They run with ``manage.py check`` and before ``migrate`` and ``runserver``,
+so the container entrypoint refuses a misconfigured deployment at startup.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends that cull entries once they hold too many.
+CULLING_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+
+@register(Tags.caches)
+def check_catalogue_version_cache(app_configs, **kwargs):
+    """The catalogue version must live where cached pages cannot evict it."""
+    alias = getattr(settings, 'CATALOGUE_VERSION_CACHE', 'default')
+    config = settings.CACHES.get(alias)
+    if config is None:
+        return [Error(
+            f"CATALOGUE_VERSION_CACHE names the cache {alias!r}, which is not in CACHES.",
+            id='library.E001',
+        )]
+    default = settings.CACHES.get('default', {})
+    shared = alias == 'default' or (
+        config['BACKEND'] == default.get('BACKEND') and config.get('LOCATION', '') == default.get('LOCATION', '')
+    )
+    if shared and config['BACKEND'] in CULLING_BACKENDS:
+        return [Error(
+            "The catalogue version shares a culling cache with the cached pages, which can evict it.",
+            hint="Point CATALOGUE_VERSION_CACHE at a cache with its own LOCATION.",
+            id='library.E002',
+        )]
+    return []
@@ -0,0 +1,267 @@
+"""
+Circulation: copies, loans, returns and holds.
+
+Availability is read from counters rather than recounted. Each book has one
+``Availability`` row that holds its number of copies, copies on the shelf,
+and waiting holds. Every operation updates that row with relative
+``UPDATE ... SET available = available - 1`` statements in the same
+transaction that changes the copies, loans and holds behind it.
+
+During exam week, many users try to check out the same popular title at
+once, so checkout is arranged to keep them from queueing on each other:
+
+* After looking for the user's ready hold, a checkout reads the counter
+  without locking. When nothing is on the shelf, it fails there and takes
+  no lock.
+* Inside its transaction it locks the user's own row and only then checks
+  their open loans, so two requests from one user cannot both borrow the
+  title. That lock is per user and never contended by other users. Where
+  the database has partial indexes, unique constraints on open loans and
+  active holds guard the same rule.
+* It then claims one shelved copy. Where the database supports it, this
+  uses ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent checkouts lock
+  different copies instead of waiting on the same one. Elsewhere a
+  conditional ``UPDATE ... WHERE is_available`` is tried on the candidates
+  in random order. Either way a copy is lent at most once, which is what
+  rules out overselling.
+* The shared counter row is updated last, just before commit. That way
+  its lock, the only one every checkout of the title needs, is held for as
+  short a time as possible.
+
+A returned copy goes to the oldest waiting hold, if there is one, and
+otherwise back on the shelf. Returns and new holds both lock the counter row
+before they read it, so a hold is never queued while a copy is going back on
+the shelf. ``recount_availability()`` recomputes the
+counters from the rows, to verify them or to repair them with
+``rebuild_availability()``.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Availability, Copy, Hold, Loan
+
+# Shelved copies tried per round by the conditional-UPDATE claim.
+CLAIM_CANDIDATES = 32
+
+
+class CirculationError(Exception):
+    """A circulation request that cannot be carried out in the current state."""
+
+
+def _bump(book_id, **deltas):
+    """Add ``deltas`` to the counters of ``book_id``; return whether the row was updated."""
+    return Availability.objects.filter(book_id=book_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def _due_at(now):
+    return now + timedelta(days=getattr(settings, 'LIBRARY_LOAN_DAYS', 14))
+
+
+def _lock_counters(book_id):
+    """Lock the counter row of ``book_id``; return its ``available`` count, or None."""
+    return Availability.objects.select_for_update().filter(book_id=book_id).values_list(
+        'available', flat=True,
+    ).first()
+
+
+def _lock_patron(user):
+    """Lock ``user``'s row so their own circulation requests run one at a time."""
+    get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True).first()
+
+
+def _create_loan(copy_id, book, user, now):
+    try:
+        with transaction.atomic():
+            return Loan.objects.create(copy_id=copy_id, book=book, borrower=user, due_at=_due_at(now))
+    except IntegrityError:
+        raise CirculationError("You already have this book on loan.") from None
+
+
+def get_availability(book_id):
+    """Return ``{'book', 'copies', 'available', 'holds'}`` for ``book_id``."""
+    counters = Availability.objects.filter(book_id=book_id).values('copies', 'available', 'holds').first()
+    return {'book': book_id, **(counters or {'copies': 0, 'available': 0, 'holds': 0})}
+
+
+def add_copies(book, count, barcodes=None):
+    """
+    Add ``count`` copies of ``book`` (with the given ``barcodes``, or generated
+    ones) and return them. New copies serve waiting holds first.
+    """
+    barcodes = list(barcodes) if barcodes is not None else [uuid.uuid4().hex[:12].upper() for _ in range(count)]
+    if len(barcodes) != count:
+        raise ValueError("Expected one barcode per copy.")
+    with transaction.atomic():
+        Availability.objects.get_or_create(book=book)
+        _bump(book.pk, copies=count)
+        copies = []
+        for barcode in barcodes:
+            copy = Copy.objects.create(book=book, barcode=barcode)
+            _release_copy(copy.pk, book.pk)
+            copies.append(copy)
+    return copies
+
+
+def _claim_copy(book_id):
+    """Take one shelved copy of ``book_id`` off the shelf; return its id, or None."""
+    shelved = Copy.objects.filter(book_id=book_id, is_available=True)
+    if connection.features.has_select_for_update_skip_locked:
+        copy_id = shelved.select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+        if copy_id is not None:
+            Copy.objects.filter(pk=copy_id).update(is_available=False)
+        return copy_id
+    while True:
+        candidates = list(shelved.values_list('pk', flat=True)[:CLAIM_CANDIDATES])
+        if not candidates:
+            return None
+        # Spread concurrent checkouts over different rows.
+        random.shuffle(candidates)
+        for copy_id in candidates:
+            if Copy.objects.filter(pk=copy_id, is_available=True).update(is_available=False):
+                return copy_id
+
+
+def _release_copy(copy_id, book_id):
+    """
+    Give a copy that is off the shelf to the oldest waiting hold, or shelve it.
+    Return the hold served, if any.
+    """
+    _lock_counters(book_id)  # before reading the queue; see place_hold()
+    waiting = Hold.objects.filter(book_id=book_id, status=Hold.WAITING).order_by('placed_at', 'pk')
+    if connection.features.has_select_for_update_skip_locked:
+        waiting = waiting.select_for_update(skip_locked=True)
+    while True:
+        hold = waiting.only('pk').first()
+        if hold is None:
+            Copy.objects.filter(pk=copy_id).update(is_available=True)
+            _bump(book_id, available=1)
+            return None
+        served = Hold.objects.filter(pk=hold.pk, status=Hold.WAITING).update(
+            status=Hold.READY, copy_id=copy_id, ready_at=timezone.now(),
+        )
+        if served:
+            _bump(book_id, holds=-1)
+            return hold
+
+
+def _check_not_borrowing(book_id, user):
+    if Loan.objects.filter(book_id=book_id, borrower=user, returned_at__isnull=True).exists():
+        raise CirculationError("You already have this book on loan.")
+
+
+def checkout(book, user):
+    """
+    Lend ``user`` a copy of ``book`` and return the ``Loan``: the copy set
+    aside for their hold, if any, otherwise a shelved copy. Raise
+    ``CirculationError`` when there is none.
+    """
+    now = timezone.now()
+    ready = Hold.objects.filter(book=book, patron=user, status=Hold.READY).values_list('pk', 'copy_id').first()
+    if ready is not None:
+        hold_id, copy_id = ready
+        with transaction.atomic():
+            _lock_patron(user)
+            if Hold.objects.filter(pk=hold_id, status=Hold.READY).update(status=Hold.FULFILLED):
+                return _create_loan(copy_id, book, user, now)
+        # Cancelled meanwhile; fall back to the shelf.
+    if not Availability.objects.filter(book=book, available__gt=0).exists():
+        raise CirculationError("No copy is available; place a hold instead.")
+    with transaction.atomic():
+        _lock_patron(user)
+        _check_not_borrowing(book.pk, user)
+        copy_id = _claim_copy(book.pk)
+        if copy_id is None:
+            raise CirculationError("No copy is available; place a hold instead.")
+        loan = _create_loan(copy_id, book, user, now)
+        # Last, so the lock on the title's counter row is held only until commit.
+        if not Availability.objects.filter(book=book, available__gt=0).update(available=F('available') - 1):
+            raise CirculationError("Availability counters are out of step; rebuild them.")
+    return loan
+
+
+def return_loan(loan):
+    """
+    Close ``loan`` and pass its copy to the next hold or back to the shelf.
+    Return the hold served, if any.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if not Loan.objects.filter(pk=loan.pk, returned_at__isnull=True).update(returned_at=now):
+            raise CirculationError("This loan has already been returned.")
+        hold = _release_copy(loan.copy_id, loan.book_id)
+    loan.returned_at = now
+    return hold
+
+
+def place_hold(book, user):
+    """
+    Queue ``user`` for ``book`` and return the ``Hold``. Holds are only taken
+    while no copy is on the shelf.
+    """
+    with transaction.atomic():
+        _lock_patron(user)
+        _check_not_borrowing(book.pk, user)
+        if Hold.objects.filter(book=book, patron=user, status__in=[Hold.WAITING, Hold.READY]).exists():
+            raise CirculationError("You already have a hold on this book.")
+        # A return locks the counters before it looks for a hold to serve, so
+        # none can shelve a copy between this check and the new hold.
+        available = _lock_counters(book.pk)
+        if available:
+            raise CirculationError("A copy is available; check it out instead.")
+        if available is None or not Copy.objects.filter(book=book).exists():
+            raise CirculationError("The library has no copy of this book.")
+        try:
+            with transaction.atomic():
+                hold = Hold.objects.create(book=book, patron=user)
+        except IntegrityError:
+            raise CirculationError("You already have a hold on this book.") from None
+        _bump(book.pk, holds=1)
+    return hold
+
+
+def cancel_hold(hold):
+    """Cancel a waiting or ready hold; a copy set aside for it goes to the next hold or the shelf."""
+    with transaction.atomic():
+        if Hold.objects.filter(pk=hold.pk, status=Hold.WAITING).update(status=Hold.CANCELLED):
+            _bump(hold.book_id, holds=-1)
+            return
+        copy_id = Hold.objects.filter(pk=hold.pk, status=Hold.READY).values_list('copy_id', flat=True).first()
+        if copy_id is None or not Hold.objects.filter(pk=hold.pk, status=Hold.READY).update(status=Hold.CANCELLED):
+            raise CirculationError("This hold is no longer active.")
+        _release_copy(copy_id, hold.book_id)
+
+
+def recount_availability(book_ids=None):
+    """
+    Count ``{book_id: {'copies', 'available', 'holds'}}`` from the copy and
+    hold rows, for all books with copies or only ``book_ids``.
+    """
+    copies = Copy.objects.all() if book_ids is None else Copy.objects.filter(book_id__in=book_ids)
+    counts = {
+        book_id: {'copies': total, 'available': available, 'holds': 0}
+        for book_id, total, available in copies.values('book_id').order_by().annotate(
+            total=Count('pk'), available=Count('pk', filter=Q(is_available=True)),
+        ).values_list('book_id', 'total', 'available')
+    }
+    holds = Hold.objects.filter(status=Hold.WAITING, book_id__in=counts)
+    for book_id, waiting in holds.values('book_id').order_by().annotate(n=Count('pk')).values_list('book_id', 'n'):
+        counts[book_id]['holds'] = waiting
+    return counts
+
+
+def rebuild_availability(book_ids=None):
+    """Rewrite the counters of all books with copies (or ``book_ids``) from the rows."""
+    counts = recount_availability(book_ids)
+    with transaction.atomic():
+        for book_id, values in counts.items():
+            Availability.objects.update_or_create(book_id=book_id, defaults=values)
+    return len(counts)
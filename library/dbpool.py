@@ -0,0 +1,227 @@
+"""
+Process-local database connection pooling.
+
+``PooledDatabaseWrapperMixin`` makes a Django database backend take its raw
+connections from a bounded ``ConnectionPool`` and hand them back on close,
+instead of opening and tearing down a server connection per request. Unlike
+``CONN_MAX_AGE`` persistence, which keeps one connection per thread, the pool
+is shared by every thread of the process, so it also works under ASGI where
+sync code runs on short-lived executor threads.
+
+Idle connections are recycled after ``RECYCLE`` seconds, and health-checked
+when checked out after more than ``CHECK_AFTER`` seconds idle; one in steady
+use is not pinged on every request. Checks and closes run outside the pool
+lock, so a slow server does not hold up threads taking other connections.
+Pool options live under the ``POOL`` key of the database settings::
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 10, 'RECYCLE': 3600, 'CHECK_AFTER': 30}
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULT_MAX_SIZE = 10
+DEFAULT_TIMEOUT = 10
+DEFAULT_RECYCLE = 3600
+DEFAULT_CHECK_AFTER = 30
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of DB-API connections.
+
+    ``connect`` opens a new raw connection and ``check`` raises if an idle
+    connection is no longer usable; it runs on connections idle for more
+    than ``check_after`` seconds. At most ``max_size`` connections are open
+    at once; ``acquire()`` waits up to ``timeout`` seconds for one to be
+    released before raising ``PoolTimeout``.
+    """
+
+    def __init__(self, connect, max_size=DEFAULT_MAX_SIZE, timeout=DEFAULT_TIMEOUT,
+                 recycle=DEFAULT_RECYCLE, check=None, check_after=DEFAULT_CHECK_AFTER):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.check = check
+        self.check_after = check_after
+        self.pid = os.getpid()
+        self._idle = deque()  # (connection, released at)
+        self._opened_at = {}
+        self._connecting = 0
+        self._lock = threading.Condition()
+
+    @property
+    def size(self):
+        """Number of open connections, idle or in use."""
+        return len(self._opened_at) + self._connecting
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, idle_for = self._checkout(deadline)
+            if conn is None:
+                return self._open()
+            if idle_for <= self.check_after or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _checkout(self, deadline):
+        """
+        Pop an idle connection and return ``(conn, seconds idle)``, or reserve
+        a slot for a new one and return ``(None, None)``.
+        """
+        expired = []
+        try:
+            with self._lock:
+                while True:
+                    while self._idle:
+                        conn, released_at = self._idle.pop()
+                        if not self._expired(conn):
+                            return conn, time.monotonic() - released_at
+                        del self._opened_at[id(conn)]
+                        expired.append(conn)
+                    if self.size < self.max_size:
+                        self._connecting += 1
+                        return None, None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._lock.wait(remaining):
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s "
+                            f"(pool size {self.max_size})."
+                        )
+        finally:
+            for conn in expired:
+                self._close(conn)
+
+    def _open(self):
+        """Connect into a slot reserved by ``_checkout()``."""
+        try:
+            conn = self.connect()
+        except BaseException:
+            with self._lock:
+                self._connecting -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._opened_at[id(conn)] = time.monotonic()
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return ``conn`` to the pool, or close it if ``discard`` is true."""
+        with self._lock:
+            if id(conn) not in self._opened_at:
+                return
+            if not discard and not self._expired(conn):
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+                return
+        self._discard(conn)
+
+    def close_idle(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def _expired(self, conn):
+        return self.recycle is not None and time.monotonic() - self._opened_at[id(conn)] > self.recycle
+
+    def _is_healthy(self, conn):
+        if self.check is None:
+            return True
+        try:
+            self.check(conn)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened_at.pop(id(conn), None)
+            self._lock.notify()
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, options, check=None):
+    """Return the process-wide pool for ``alias``, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            # Connections inherited across fork() belong to the parent; leave
+            # them alone rather than closing sockets the parent still uses.
+            pool = _pools[alias] = ConnectionPool(
+                connect,
+                max_size=options.get('MAX_SIZE', DEFAULT_MAX_SIZE),
+                timeout=options.get('TIMEOUT', DEFAULT_TIMEOUT),
+                recycle=options.get('RECYCLE', DEFAULT_RECYCLE),
+                check=check,
+                check_after=options.get('CHECK_AFTER', DEFAULT_CHECK_AFTER),
+            )
+        return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin for a ``DatabaseWrapper`` that borrows raw connections from a pool.
+
+    Closing the wrapper (at the end of each request with ``CONN_MAX_AGE = 0``)
+    returns the connection to the pool. Connections closed inside a
+    transaction or after a database error are discarded rather than reused.
+    """
+
+    def get_pool(self, conn_params):
+        return get_pool(
+            self.alias,
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            self.settings_dict.get('POOL', {}),
+            check=self.check_pooled_connection,
+        )
+
+    def check_pooled_connection(self, conn):
+        """Raise if an idle pooled connection can no longer be used."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        discard = self.in_atomic_block or self.errors_occurred
+        if not discard and not self.get_autocommit():
+            try:
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        self.pool.release(self.connection, discard=discard)
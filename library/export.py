@@ -0,0 +1,92 @@
+"""
+Streaming serialization of the book catalogue.
+
+Rows are read in keyset batches (``WHERE id > last ORDER BY id LIMIT n``)
+and encoded chunk by chunk, so memory use stays constant regardless of
+catalogue size. Plain ``QuerySet.iterator()`` is not enough on its own here:
+the MySQL driver buffers the whole result set client-side.
+"""
+import json
+import zlib
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Book
+
+EXPORT_FIELDS = ('id', 'title', 'author', 'description', 'published_date', 'updated_at', 'change_seq')
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """
+    ``DjangoJSONEncoder`` writing datetimes as DRF does: in the current time
+    zone with full microseconds, so exported rows match the API's.
+    """
+    def default(self, o):
+        if isinstance(o, datetime):
+            value = (timezone.localtime(o) if timezone.is_aware(o) else o).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return super().default(o)
+
+
+_encoder = ExportJSONEncoder(ensure_ascii=False)
+
+
+def iter_book_rows(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of book dicts, ``chunk_size`` rows at a time, in id order."""
+    rows = Book.objects.order_by('id').values(*EXPORT_FIELDS)
+    last_id = None
+    while True:
+        batch = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(batch[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]['id']
+
+
+def iter_ndjson(chunks):
+    """Encode row chunks as newline-delimited JSON."""
+    for chunk in chunks:
+        yield ''.join(_encoder.encode(row) + '\n' for row in chunk)
+
+
+def iter_json_array(chunks):
+    """Encode row chunks as a single JSON array, emitted incrementally."""
+    yield '['
+    separator = ''
+    for chunk in chunks:
+        yield separator + ','.join(_encoder.encode(row) for row in chunk)
+        separator = ','
+    yield ']'
+
+
+def iter_gzip(pieces, level=6):
+    """Gzip-compress a stream of text pieces on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for piece in pieces:
+        data = compressor.compress(piece.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_books(fmt='ndjson', chunk_size=DEFAULT_CHUNK_SIZE, compress=False):
+    """
+    Return an iterator over the encoded catalogue.
+
+    Yields ``str`` pieces, or ``bytes`` when ``compress`` is true.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    encode = iter_ndjson if fmt == 'ndjson' else iter_json_array
+    pieces = encode(iter_book_rows(chunk_size))
+    return iter_gzip(pieces) if compress else pieces
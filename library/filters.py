@@ -0,0 +1,141 @@
+"""
+Filtering and facet counts for the book listings.
+
+``BookFilterBackend`` narrows a Book queryset by ``?author=`` (case-insensitive
+full name), ``?year_min=``/``?year_max=`` and ``?title_prefix=``. Each maps
+onto a range scan of an existing index: (author, published_date),
+published_date and title respectively.
+
+``book_facets`` counts the filtered books by publication year, decade and
+author initial. Results are cached per catalogue version and filter
+combination, so each is aggregated once per catalogue change rather than
+per request, and author initials for the unfiltered catalogue are summed
+from the pre-aggregated Author table instead of the Book table.
+"""
+from datetime import date
+
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear, Substr, Upper
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .authors import author_initial
+from .cache import cached_catalogue_read
+from .models import Author, Book
+
+FACETS = ('year', 'decade', 'initial')
+
+
+def _year_param(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        year = int(raw)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+    if not date.min.year <= year <= date.max.year:
+        raise ValidationError({name: f"Ensure this value is between {date.min.year} and {date.max.year}."})
+    return year
+
+
+def parse_book_filters(params):
+    """
+    Validate the filter query parameters into a dict of the ones present.
+    """
+    filters = {
+        'author': ' '.join(params.get('author', '').split()),
+        'year_min': _year_param(params, 'year_min'),
+        'year_max': _year_param(params, 'year_max'),
+        'title_prefix': params.get('title_prefix', '').strip(),
+    }
+    filters = {name: value for name, value in filters.items() if value}
+    if filters.get('year_min', date.min.year) > filters.get('year_max', date.max.year):
+        raise ValidationError({'year_min': "Must not be greater than year_max."})
+    return filters
+
+
+def filter_books(queryset, filters):
+    """Apply ``parse_book_filters`` output to a Book queryset."""
+    if 'author' in filters:
+        queryset = queryset.filter(author__iexact=filters['author'])
+    if 'year_min' in filters:
+        queryset = queryset.filter(published_date__gte=date(filters['year_min'], 1, 1))
+    if 'year_max' in filters:
+        queryset = queryset.filter(published_date__lte=date(filters['year_max'], 12, 31))
+    if 'title_prefix' in filters:
+        queryset = queryset.filter(title__istartswith=filters['title_prefix'])
+    return queryset
+
+
+def parse_facets(raw):
+    """
+    Parse a comma-separated ``facets`` parameter; returns an empty list when
+    no facets were requested.
+    """
+    if not raw:
+        return []
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(names) - set(FACETS)
+    if unknown:
+        raise ValidationError({'facets': f"Unknown facet(s): {', '.join(sorted(unknown))}."})
+    return [name for name in FACETS if name in names]
+
+
+def _year_counts(filters):
+    rows = (
+        filter_books(Book.objects.exclude(published_date=None), filters)
+        .annotate(year=ExtractYear('published_date')).order_by('year')
+        .values('year').annotate(count=Count('id'))
+    )
+    return {row['year']: row['count'] for row in rows}
+
+
+def _initial_counts(filters):
+    if filters:
+        rows = (
+            filter_books(Book.objects.all(), filters)
+            .annotate(initial=Upper(Substr('author', 1, 1))).order_by('initial')
+            .values('initial').annotate(count=Count('id'))
+        )
+    else:
+        rows = Author.objects.order_by('initial').values('initial').annotate(count=Sum('book_count'))
+    counts = {}
+    for row in rows:
+        initial = author_initial(row['initial'] or '')
+        counts[initial] = counts.get(initial, 0) + row['count']
+    return dict(sorted(counts.items()))
+
+
+def _compute_facets(filters, names):
+    facets = {}
+    if 'year' in names or 'decade' in names:
+        years = _year_counts(filters)
+        if 'year' in names:
+            facets['year'] = {str(year): count for year, count in years.items()}
+        if 'decade' in names:
+            decades = {}
+            for year, count in years.items():
+                decade = f'{year // 10 * 10}s'
+                decades[decade] = decades.get(decade, 0) + count
+            facets['decade'] = decades
+    if 'initial' in names:
+        facets['initial'] = _initial_counts(filters)
+    return facets
+
+
+def book_facets(filters, names):
+    """
+    Return ``{facet: {value: count}}`` for the books matching ``filters``.
+    """
+    params = {**filters, 'facets': ','.join(names)}
+    return cached_catalogue_read('book-facets', params, lambda: _compute_facets(filters, names))
+
+
+class BookFilterBackend(BaseFilterBackend):
+    """
+    DRF filter backend applying the book list filters to a view's queryset.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_books(queryset, parse_book_filters(request.query_params))
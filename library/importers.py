@@ -0,0 +1,169 @@
+"""
+Streaming readers and row validation for bulk book imports.
+
+Each reader yields raw records with only the framing work done (a CSV row,
+a JSON line, an ISO 2709 MARC record); ``clean_record`` turns a raw record
+into ``Book`` field values. The split lets ``import_books`` fan the parsing
+and validation out to worker processes while reading the file sequentially.
+"""
+import csv
+import gzip
+import json
+import re
+from datetime import date
+
+from django.core.exceptions import ValidationError
+
+from .validators import validate_book_author, validate_book_title
+
+IMPORT_FORMATS = ('csv', 'jsonl', 'marc')
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.mrc': 'marc',
+    '.marc': 'marc',
+}
+MAX_LENGTHS = {'title': 255, 'author': 255}
+YEAR_RE = re.compile(r'\b(\d{4})\b')
+
+MARC_RECORD_TERMINATOR = b'\x1d'
+MARC_FIELD_TERMINATOR = b'\x1e'
+MARC_SUBFIELD_DELIMITER = b'\x1f'
+# ISBD punctuation trailing MARC subfields, e.g. "Dune /" or "Herbert, Frank,".
+MARC_TRAILING_PUNCTUATION = ' /:;,.='
+
+def guess_format(path):
+    """Infer the import format from a file name, ignoring a trailing .gz."""
+    name = path[:-3] if path.endswith('.gz') else path
+    for extension, fmt in FORMAT_EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    return None
+
+
+def open_source(path, binary=False):
+    """Open ``path`` for streaming, transparently decompressing ``.gz`` files."""
+    opener = gzip.open if path.endswith('.gz') else open
+    if binary:
+        return opener(path, 'rb')
+    return opener(path, 'rt', encoding='utf-8', newline='')
+
+
+def iter_csv(stream):
+    """Yield one dict per CSV row, keyed by the header row."""
+    yield from csv.DictReader(stream)
+
+
+def iter_jsonl(stream):
+    """Yield each non-blank line of a JSON-lines stream."""
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def iter_marc(stream, read_size=1 << 16):
+    """Yield each raw ISO 2709 record (bytes) from a binary stream."""
+    buffer = b''
+    while True:
+        data = stream.read(read_size)
+        if not data:
+            break
+        buffer += data
+        *records, buffer = buffer.split(MARC_RECORD_TERMINATOR)
+        for record in records:
+            if record.strip():
+                yield record
+    if buffer.strip():
+        yield buffer
+
+
+READERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'marc': iter_marc}
+
+
+def parse_marc(raw):
+    """
+    Map a MARC 21 bibliographic record to Book fields.
+
+    245 $a/$b gives the title, 100/110/111 $a the author, 520 $a the
+    description and 264/260 $c the publication year.
+    """
+    base_address = int(raw[12:17])
+    directory = raw[24:base_address - 1]
+    subfields = {}
+    for offset in range(0, len(directory) - 11, 12):
+        entry = directory[offset:offset + 12]
+        tag = entry[:3].decode('ascii')
+        length, start = int(entry[3:7]), int(entry[7:12])
+        if tag < '010' or tag in subfields:
+            continue
+        field = raw[base_address + start:base_address + start + length].rstrip(MARC_FIELD_TERMINATOR)
+        codes = {}
+        for chunk in field[2:].split(MARC_SUBFIELD_DELIMITER)[1:]:
+            if chunk:
+                codes.setdefault(chunk[:1].decode('ascii'), chunk[1:].decode('utf-8', 'replace'))
+        subfields[tag] = codes
+
+    def value(tags, code):
+        for tag in tags:
+            if code in subfields.get(tag, {}):
+                return subfields[tag][code].strip().rstrip(MARC_TRAILING_PUNCTUATION)
+        return ''
+
+    title = ' '.join(filter(None, [value(['245'], 'a'), value(['245'], 'b')]))
+    return {
+        'title': title,
+        'author': value(['100', '110', '111'], 'a'),
+        'description': value(['520'], 'a'),
+        'published_date': value(['264', '260'], 'c'),
+    }
+
+
+def parse_date(value):
+    """Accept ISO dates (YYYY-MM-DD) or anything containing a four-digit year."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        match = YEAR_RE.search(value)
+        if match and int(match.group(1)) >= 1:
+            return date(int(match.group(1)), 1, 1)
+    raise ValidationError(f"Unrecognised date: {value!r}.")
+
+
+def clean_record(fmt, raw):
+    """
+    Parse and validate one raw record.
+
+    Returns ``(values, None)`` on success or ``(None, message)`` if the record
+    fails the same rules as ``BookSerializer``.
+    """
+    try:
+        if fmt == 'marc':
+            row = parse_marc(raw)
+        elif fmt == 'jsonl':
+            row = json.loads(raw)
+        else:
+            row = raw
+        values = {
+            'title': (row.get('title') or '').strip(),
+            'author': (row.get('author') or '').strip(),
+            'description': (row.get('description') or '').strip(),
+        }
+        for field, limit in MAX_LENGTHS.items():
+            if len(values[field]) > limit:
+                raise ValidationError(f"{field.capitalize()} exceeds {limit} characters.")
+        values['title'] = validate_book_title(values['title'])
+        values['author'] = validate_book_author(values['author'])
+        values['published_date'] = parse_date((row.get('published_date') or '').strip())
+    except ValidationError as exc:
+        return None, ' '.join(exc.messages)
+    except (AttributeError, KeyError, ValueError) as exc:
+        return None, f"Malformed record: {exc}"
+    return values, None
+
+
+def clean_chunk(fmt, raws):
+    """Run ``clean_record`` over a list of raw records (worker entry point)."""
+    return [clean_record(fmt, raw) for raw in raws]
@@ -0,0 +1,168 @@
+"""
+Non-blocking logging pipeline.
+
+``configure_logging`` is Django's ``LOGGING_CONFIG`` callable. It applies
+``settings.LOGGING`` with ``dictConfig`` and then, when the config has
+``'queue': True``, moves every handler behind a ``QueueHandler``. A
+``QueueListener`` thread formats and writes the records, so request threads
+only build the record and enqueue it. If the queue fills up, records are
+dropped and counted rather than blocking the caller. A forked child (e.g. a
+multiprocessing worker) gets its own queues and listener threads.
+
+``JSONFormatter`` renders one JSON object per line, including any ``extra``
+fields. ``SamplingFilter`` keeps a fraction of high-volume debug records,
+such as ``django.db.backends`` SQL logging.
+"""
+import atexit
+import json
+import logging
+import logging.config
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+    """
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Pass a ``rate`` fraction of records below ``WARNING``, and every record at
+    ``WARNING`` or above.
+    """
+
+    def __init__(self, rate=1.0, name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    ``QueueHandler`` that never blocks and leaves formatting to the listener.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments now, while they still hold their current
+        # values; formatting and tracebacks are left to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+
+    def __init__(self, queue_handler, handlers):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.pid = os.getpid()
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than failing to stop when the queue is full.
+        self.queue.put(self._sentinel)
+
+
+def _start_listener(queue_handler, handlers):
+    listener = _Listener(queue_handler, handlers)
+    listener.start()
+    with _listeners_lock:
+        _listeners.append(listener)
+    return queue_handler
+
+
+def stop_logging():
+    """Flush queued records and stop this process's listener threads."""
+    with _listeners_lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        # A listener inherited through fork() has no thread in this process
+        # to wake; joining it would block forever.
+        if listener.pid == os.getpid():
+            listener.stop()
+
+
+def _restart_after_fork():
+    # Listener threads do not survive fork(), and the inherited queues may
+    # still hold locks or waiters of the parent's threads. Give each queue
+    # handler a fresh queue and listener; records the parent had queued but
+    # not yet written stay with the parent.
+    global _listeners_lock
+    _listeners_lock = threading.Lock()
+    inherited = list(_listeners)
+    _listeners.clear()
+    for listener in inherited:
+        handler = listener.queue_handler
+        handler.queue = queue.Queue(maxsize=handler.queue.maxsize)
+        _start_listener(handler, listener.handlers)
+
+
+def configure_logging(config):
+    """
+    ``LOGGING_CONFIG`` callable: ``dictConfig`` plus queue-backed handlers.
+    """
+    stop_logging()
+    logging.config.dictConfig(config)
+    if not config or not config.get('queue'):
+        return
+
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get('loggers', {})]
+    queue_size = config.get('queue_size', DEFAULT_QUEUE_SIZE)
+    # Loggers sharing the same handlers share one queue and listener.
+    queue_handlers = {}
+    for logger in loggers:
+        targets = tuple(handler for handler in logger.handlers if not isinstance(handler, QueueHandler))
+        if not targets:
+            continue
+        if targets not in queue_handlers:
+            queue_handlers[targets] = _start_listener(AsyncQueueHandler(queue.Queue(maxsize=queue_size)), targets)
+        logger.handlers = [queue_handlers[targets]]
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
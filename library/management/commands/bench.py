@@ -0,0 +1,190 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from library.benchmarks import (
+    WORDS, close_thread_connections, compare_results, environment_info, seed_books, summarize,
+    test_database,
+)
+
+SCENARIOS = (
+    'student-books', 'api-books', 'book-search', 'autocomplete', 'token-obtain', 'token-refresh', 'admin-changelist',
+)
+
+BENCH_EMAIL = 'bench-admin@example.com'
+BENCH_PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    """
+    Measure latency percentiles and throughput of the main endpoints.
+
+    Each run seeds a throwaway test database created from the configured one
+    (SQLite or MySQL), drives the endpoints in-process through the full
+    middleware stack with Django's test client and reports p50/p95/p99
+    latency and requests per second. Results saved with ``-o`` can be passed
+    to ``--compare`` on a later run to flag regressions.
+    """
+    help = "Benchmark the API, template, JWT and admin endpoints on a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000, help="Books to seed (e.g. 10000 or 1000000).")
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per scenario.")
+        parser.add_argument('--threads', type=int, default=1, help="Concurrent clients.")
+        parser.add_argument('--scenario', choices=SCENARIOS, action='append',
+                            help="Scenario to run (repeatable; defaults to all).")
+        parser.add_argument('--cold', action='store_true',
+                            help="Clear the cache before every request to measure uncached reads.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the test database, and its seeded books, between runs.")
+        parser.add_argument('-o', '--output', help="Write results as JSON to this file.")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+        parser.add_argument('--compare', help="Baseline JSON file to compare against.")
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help="Regression threshold in percent for p95 latency and throughput.")
+
+    def handle(self, *args, **options):
+        if min(options['books'], options['requests'], options['threads']) < 1 or options['warmup'] < 0:
+            raise CommandError("--books, --requests and --threads must be positive and --warmup non-negative.")
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        self.options = options
+        # Every token-obtain request logs the same user in from the same address.
+        with test_database(keepdb=options['keepdb']), override_settings(LOGIN_RATE_LIMITS={}):
+            self.prepare(options['books'])
+            report = {
+                'meta': {**environment_info(), 'books': options['books'], 'requests': options['requests'],
+                         'threads': options['threads'], 'cold': options['cold']},
+                'results': {
+                    name: self.run_scenario(getattr(self, 'scenario_' + name.replace('-', '_'))())
+                    for name in options['scenario'] or SCENARIOS
+                },
+            }
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_table(report['results'])
+        if baseline is not None:
+            self.write_comparison(baseline['results'], report['results'], options['threshold'] / 100)
+
+    def prepare(self, books):
+        from library.models import Book
+
+        existing = Book.objects.count()
+        if existing < books:
+            started = time.perf_counter()
+            seed_books(books - existing, seed=existing)
+            self.stderr.write(f"Seeded {books - existing} books in {time.perf_counter() - started:.1f}s")
+        User = get_user_model()
+        self.user = User.objects.filter(email=BENCH_EMAIL).first()
+        if self.user is None:
+            self.user = User.objects.create_superuser(email=BENCH_EMAIL, password=BENCH_PASSWORD)
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+
+    def run_scenario(self, request):
+        """Time ``request(client)`` calls and return a latency/throughput summary."""
+        cold, total = self.options['cold'], self.options['requests']
+
+        def run(count):
+            client = Client()
+            samples = []
+            for _ in range(count):
+                if cold:
+                    cache.clear()
+                start = time.perf_counter()
+                response = request(client)
+                samples.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}.")
+            return samples
+
+        def run_in_thread(count):
+            try:
+                return run(count)
+            finally:
+                close_thread_connections()
+
+        run(self.options['warmup'])
+        threads = self.options['threads']
+        shares = [total // threads + (n < total % threads) for n in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = [sample for part in pool.map(run_in_thread, shares) for sample in part]
+        return {**summarize(samples), 'rps': round(len(samples) / (time.perf_counter() - started), 1)}
+
+    # Each scenario returns a callable issuing one request with a test client.
+
+    def scenario_student_books(self):
+        url = reverse('student-books')
+        return lambda client: client.get(url, {'page_size': 50})
+
+    def scenario_api_books(self):
+        header = f'Bearer {self.access}'
+        return lambda client: client.get('/api/books/', HTTP_AUTHORIZATION=header)
+
+    def scenario_book_search(self):
+        url = reverse('book-search')
+        queries = cycle(f'{first} {second}' for first, second in zip(WORDS, WORDS[1:]))
+        return lambda client: client.get(url, {'q': next(queries)})
+
+    def scenario_autocomplete(self):
+        url = reverse('book-autocomplete')
+        # Keystrokes: every prefix of each word, as a search box sends them.
+        prefixes = cycle(word[:length] for word in WORDS for length in range(1, len(word) + 1))
+        return lambda client: client.get(url, {'q': next(prefixes)})
+
+    def scenario_token_obtain(self):
+        url = reverse('token_obtain_pair')
+        payload = {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+        return lambda client: client.post(url, payload, content_type='application/json')
+
+    def scenario_token_refresh(self):
+        # Refresh tokens rotate and are blacklisted after use; mint one per request.
+        url = reverse('token_refresh')
+        count = self.options['warmup'] + self.options['requests']
+        tokens = iter([str(RefreshToken.for_user(self.user)) for _ in range(count)])
+        return lambda client: client.post(url, {'refresh': next(tokens)}, content_type='application/json')
+
+    def scenario_admin_changelist(self):
+        url = reverse('admin:library_book_changelist')
+
+        def request(client):
+            if '_auth_user_id' not in client.session:
+                client.force_login(self.user)
+            return client.get(url)
+        return request
+
+    def write_table(self, results):
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<17} {stats['rps']:>9.1f} req/s  p50 {stats['p50_ms']:>8.2f} ms  "
+                f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms"
+            )
+
+    def write_comparison(self, baseline, results, threshold):
+        rows, regressions = compare_results(baseline, results, threshold)
+        self.stdout.write('')
+        for name, before, after, p95_change, rps_change in rows:
+            self.stdout.write(
+                f"{name:<17} p95 {before['p95_ms']:>8.2f} -> {after['p95_ms']:>8.2f} ms ({p95_change:+.1%})  "
+                f"req/s {before['rps']:>9.1f} -> {after['rps']:>9.1f} ({rps_change:+.1%})"
+            )
+        if regressions:
+            raise CommandError(f"Regressions beyond {threshold:.0%}: {', '.join(regressions)}")
@@ -0,0 +1,109 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from library.benchmarks import AUTHORS, seed_books, summarize, test_database
+from library.models import Book
+from library.tablestats import analyze_table
+
+SCENARIOS = {
+    'changelist': {},
+    'year-filter': {'year': '1990'},
+    'search': {'q': AUTHORS[0].split()[0]},
+}
+MODES = ('exact', 'estimated')
+
+BENCH_EMAIL = 'bench-admin@example.com'
+
+
+@contextmanager
+def exact_counts(model_admin):
+    """Count every changelist exactly, twice, as the stock ModelAdmin does."""
+    model_admin.show_full_result_count = True
+    try:
+        with override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=None):
+            yield
+    finally:
+        del model_admin.show_full_result_count
+
+
+class Command(BaseCommand):
+    """
+    Measure Book changelist latency with exact and estimated counts.
+
+    Books are seeded into a throwaway test database (a million by default)
+    and the table statistics refreshed. Each scenario is then requested
+    through the full admin stack with ``exact`` counts (two COUNT(*) per
+    page, as before) and with ``estimated`` counts from the statistics. The
+    cache is cleared once per scenario and mode, and the unmeasured first
+    request fills it, as in steady state where filter choices and estimates
+    only change with the catalogue. With ``-v 2`` the queries of the last
+    request are listed with their times.
+    """
+    help = "Benchmark the Book admin changelist with exact and estimated row counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=1000000, help="Books to seed.")
+        parser.add_argument('--requests', type=int, default=20, help="Measured requests per scenario and mode.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the test database, and its seeded books, between runs.")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if min(options['books'], options['requests']) < 1:
+            raise CommandError("--books and --requests must be positive.")
+        self.verbosity = options['verbosity']
+        results = {}
+        with test_database(keepdb=options['keepdb']):
+            existing = Book.objects.count()
+            if existing < options['books']:
+                seed_books(options['books'] - existing, seed=existing)
+            analyze_table(Book)
+            user = get_user_model().objects.filter(email=BENCH_EMAIL).first()
+            if user is None:
+                user = get_user_model().objects.create_superuser(email=BENCH_EMAIL, password=None)
+            client = Client()
+            client.force_login(user)
+            model_admin = admin.site._registry[Book]
+            url = reverse('admin:library_book_changelist')
+            for name, params in SCENARIOS.items():
+                results[name] = {}
+                for mode in MODES:
+                    context = exact_counts(model_admin) if mode == 'exact' else override_settings()
+                    with context:
+                        results[name][mode] = self.run_scenario(client, url, params, options['requests'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, modes in results.items():
+            for mode, stats in modes.items():
+                self.stdout.write(
+                    f"{name:<12} {mode:<9} p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms  "
+                    f"{stats['queries']:>2} queries"
+                )
+
+    def run_scenario(self, client, url, params, total):
+        samples = []
+        cache.clear()
+        for _ in range(total + 1):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, params)
+                samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}.")
+        # The first request also fills the cache, compiles templates and warms connections.
+        if self.verbosity > 1:
+            for query in queries:
+                self.stderr.write(f"{float(query['time']) * 1000:9.1f} ms  {query['sql'][:150]}")
+        return {**summarize(samples[1:]), 'queries': len(queries)}
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from library.benchmarks import seed_books, summarize, test_database
+from library.models import Book
+
+ENDPOINTS = {
+    'student-books': ('/api/student/books/?page_size=50', '/api/async/student/books/?page_size=50'),
+    'search': ('/api/books/search/?q=river+shadow', '/api/async/books/search/?q=river+shadow'),
+    'detail': ('/api/books/{pk}/', '/api/async/books/{pk}/'),
+}
+
+
+class Command(BaseCommand):
+    """
+    Compare the sync read endpoints with their async variants under concurrency.
+
+    Sync views are driven from a fixed pool of threads, as a threaded worker
+    would run them; async views are driven from one event loop with every
+    client in flight at once.
+    """
+    help = "Benchmark sync vs async read endpoints on a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=5000, help="Books to seed.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and mode.")
+        parser.add_argument('--concurrency', type=int, default=50, help="Clients in flight at once.")
+        parser.add_argument('--threads', type=int, default=4,
+                            help="Threads serving the sync views (a threaded worker's pool).")
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), action='append',
+                            help="Endpoint to benchmark (repeatable; defaults to all).")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if min(options['books'], options['requests'], options['concurrency'], options['threads']) < 1:
+            raise CommandError("--books, --requests, --concurrency and --threads must be positive.")
+        results = {}
+        with test_database():
+            seed_books(options['books'])
+            pk = Book.objects.values_list('pk', flat=True).first()
+            # The sync book detail lives on the authenticated BookViewSet.
+            user = get_user_model().objects.create_user(email='bench@example.com', password='bench-password')
+            self.auth_header = f'Bearer {AccessToken.for_user(user)}'
+            for name in options['endpoint'] or sorted(ENDPOINTS):
+                sync_url, async_url = (url.format(pk=pk) for url in ENDPOINTS[name])
+                results[name] = {
+                    'sync': self.run_sync(sync_url, options['requests'], options['threads']),
+                    'async': asyncio.run(self.run_async(async_url, options['requests'], options['concurrency'])),
+                }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, modes in results.items():
+            for mode, stats in modes.items():
+                self.stdout.write(
+                    f"{name:<14} {mode:<5} {stats['rps']:>9.1f} req/s  p50 {stats['p50_ms']:>8.2f} ms  "
+                    f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms"
+                )
+
+    def run_sync(self, url, total, threads):
+        def fetch(_):
+            client = Client(HTTP_AUTHORIZATION=self.auth_header)
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}.")
+            return elapsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            samples = list(pool.map(fetch, range(total)))
+        return self.report(samples, time.perf_counter() - start)
+
+    async def run_async(self, url, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}.")
+            return elapsed
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(fetch() for _ in range(total)))
+        return self.report(samples, time.perf_counter() - start)
+
+    def report(self, samples, wall):
+        return {**summarize(samples), 'rps': round(len(samples) / wall, 1)}
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, groupby
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from library import circulation
+from library.benchmarks import seed_books, summarize, test_database
+from library.models import Book, Loan
+from library.views import BookViewSet, LoanViewSet
+
+
+class Command(BaseCommand):
+    """
+    Hammer checkout of one popular title from many threads and check that
+    it is never oversold.
+
+    The title gets ``--copies`` copies. In the rush phase, each of
+    ``--users`` users tries once to check it out through the API views, from
+    ``--threads`` threads. Exactly ``--copies`` of them must succeed and the
+    rest must get 409. In the churn phase, the threads check copies out and
+    return them for ``--seconds``. After each phase the availability counters
+    are compared with a recount of the rows, and every copy's loans are
+    checked not to overlap. Database lock errors are retried and counted
+    (SQLite, for one, lets only one transaction write at a time).
+
+    Requests go straight to the views rather than through the test client,
+    which reports a view's exception to every client waiting on a response
+    in any thread.
+    """
+    help = "Benchmark concurrent checkouts of a single title and verify that it is never oversold."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copies', type=int, default=20, help="Copies of the popular title.")
+        parser.add_argument('--users', type=int, default=500, help="Users rushing to check it out.")
+        parser.add_argument('--threads', type=int, default=32, help="Concurrent clients.")
+        parser.add_argument('--seconds', type=float, default=3.0, help="Duration of the churn phase (0 skips it).")
+        parser.add_argument('--books', type=int, default=1000, help="Other books to seed.")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if min(options['copies'], options['users'], options['threads'], options['books']) < 1:
+            raise CommandError("--copies, --users, --threads and --books must be positive.")
+        if options['seconds'] < 0:
+            raise CommandError("--seconds must not be negative.")
+        if options['users'] < options['threads']:
+            raise CommandError("--users must be at least --threads.")
+
+        results = {}
+        with test_database():
+            seed_books(options['books'])
+            book = Book.objects.create(title='Organic Chemistry', author='Bench Author')
+            circulation.add_copies(book, options['copies'])
+            users = [
+                get_user_model().objects.create_user(email=f'bench-student-{n}@example.com', password=None)
+                for n in range(options['users'])
+            ]
+            tokens = [str(AccessToken.for_user(user)) for user in users]
+            self.book = book
+
+            results['rush'] = self.run_rush(tokens, options['threads'])
+            results['rush']['verified'] = self.verify(book, options['copies'])
+            if results['rush']['checked_out'] != options['copies']:
+                raise CommandError(
+                    f"{results['rush']['checked_out']} checkouts succeeded for {options['copies']} copies."
+                )
+            if options['seconds']:
+                for loan in Loan.objects.filter(book=book, returned_at__isnull=True):
+                    circulation.return_loan(loan)
+                results['churn'] = self.run_churn(tokens, options['threads'], options['seconds'])
+                results['churn']['verified'] = self.verify(book, options['copies'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for phase, stats in results.items():
+            checkout = stats['checkout']
+            self.stdout.write(
+                f"{phase:<6} {stats['checked_out']:>6} checked out  {stats['conflicts']:>6} refused  "
+                f"{stats['rps']:>8.1f} checkouts/s  p50 {checkout['p50_ms']:>8.2f} ms  "
+                f"p95 {checkout['p95_ms']:>8.2f} ms  lock retries {stats['retries']:>5}  "
+                f"{stats['verified']['loans']} loans verified"
+            )
+
+    def post(self, view, url, token, pk, retries):
+        """POST ``url`` to ``view``, retrying database lock errors; return ``(response, seconds)``."""
+        factory = APIRequestFactory()
+        while True:
+            start = time.perf_counter()
+            try:
+                response = view(factory.post(url, HTTP_AUTHORIZATION=f'Bearer {token}'), pk=pk)
+            except OperationalError:
+                retries.append(1)
+                time.sleep(0.001)
+                continue
+            return response, time.perf_counter() - start
+
+    def checkout(self, token, retries):
+        url = f'/api/books/{self.book.pk}/checkout/'
+        response, elapsed = self.post(self.checkout_view, url, token, self.book.pk, retries)
+        if response.status_code not in (201, 409):
+            raise CommandError(f"POST {url} returned {response.status_code}.")
+        return response, elapsed
+
+    def return_loan(self, token, loan_id, retries):
+        url = f'/api/loans/{loan_id}/return/'
+        response, _ = self.post(self.return_view, url, token, loan_id, retries)
+        if response.status_code != 200:
+            raise CommandError(f"POST {url} returned {response.status_code}.")
+
+    checkout_view = staticmethod(BookViewSet.as_view({'post': 'checkout'}))
+    return_view = staticmethod(LoanViewSet.as_view({'post': 'return_copy'}))
+
+    def run_rush(self, tokens, threads):
+        retries = []
+
+        def attempt(token):
+            response, elapsed = self.checkout(token, retries)
+            return response.status_code, elapsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            outcomes = list(pool.map(attempt, tokens))
+        elapsed = time.perf_counter() - start
+        checked_out = sum(code == 201 for code, _ in outcomes)
+        return {
+            'checked_out': checked_out,
+            'conflicts': len(outcomes) - checked_out,
+            'retries': len(retries),
+            'rps': round(len(outcomes) / elapsed, 1),
+            'checkout': summarize([seconds for _, seconds in outcomes]),
+        }
+
+    def run_churn(self, tokens, threads, seconds):
+        retries, samples, deadline = [], [], time.monotonic() + seconds
+        lock = threading.Lock()
+        counts = {'checked_out': 0, 'conflicts': 0}
+
+        def churn(own_tokens):
+            # Each thread has its own users, so no user races against themselves.
+            own_tokens = cycle(own_tokens)
+            local, outcome = [], {'checked_out': 0, 'conflicts': 0}
+            while time.monotonic() < deadline:
+                token = next(own_tokens)
+                response, elapsed = self.checkout(token, retries)
+                local.append(elapsed)
+                if response.status_code == 409:
+                    outcome['conflicts'] += 1
+                    continue
+                outcome['checked_out'] += 1
+                self.return_loan(token, response.data['id'], retries)
+            with lock:
+                samples.extend(local)
+                for name, value in outcome.items():
+                    counts[name] += value
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(churn, [tokens[n::threads] for n in range(threads)]))
+        elapsed = time.perf_counter() - start
+        return {
+            **counts,
+            'retries': len(retries),
+            'rps': round(len(samples) / elapsed, 1),
+            'checkout': summarize(samples),
+        }
+
+    def verify(self, book, copies):
+        """Check the counters against the rows and that no copy was ever lent twice at once."""
+        counters = circulation.get_availability(book.pk)
+        recount = {'book': book.pk, **circulation.recount_availability([book.pk])[book.pk]}
+        if counters != recount:
+            raise CommandError(f"Counters {counters} differ from the recount {recount}.")
+        open_loans = Loan.objects.filter(book=book, returned_at__isnull=True).count()
+        if open_loans + counters['available'] != copies:
+            raise CommandError(f"{open_loans} open loans and {counters['available']} shelved of {copies} copies.")
+        loans = Loan.objects.filter(book=book).order_by('copy_id', 'borrowed_at', 'pk').values_list(
+            'copy_id', 'borrowed_at', 'returned_at',
+        )
+        total = 0
+        for copy_id, copy_loans in groupby(loans, key=lambda loan: loan[0]):
+            returned = None
+            for position, (_, borrowed_at, returned_at) in enumerate(copy_loans):
+                if position and (returned is None or returned > borrowed_at):
+                    raise CommandError(f"Copy {copy_id} was lent again at {borrowed_at} before it was returned.")
+                returned = returned_at
+                total += 1
+        return {'loans': total, 'open': open_loans, **counters}
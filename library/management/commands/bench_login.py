@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from library.benchmarks import seed_books, summarize, test_database
+from library.passwords import reset_verifier
+
+BENCH_EMAIL = 'bench-login@example.com'
+BENCH_PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    """
+    Measure JWT login throughput at increasing concurrency.
+
+    For each concurrency level the token endpoint is hit from that many
+    threads while a probe thread keeps requesting the public book list, so
+    the report shows both login throughput and how much a login burst slows
+    down everything else. Logins refused because the password workers were
+    saturated (503) are counted rather than treated as errors; rate limits
+    are disabled for the run.
+    """
+    help = "Benchmark login throughput and its effect on other endpoints under concurrency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, action='append',
+                            help="Concurrent logins (repeatable; defaults to 1, 4 and 16).")
+        parser.add_argument('--requests', type=int, default=100, help="Logins per concurrency level.")
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+                            help="Password hashing threads (PASSWORD_HASH_WORKERS).")
+        parser.add_argument('--iterations', type=int, default=settings.PASSWORD_PBKDF2_ITERATIONS,
+                            help="PBKDF2 iterations of the benchmark user's password.")
+        parser.add_argument('--books', type=int, default=1000, help="Books to seed for the probe endpoint.")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        levels = options['concurrency'] or [1, 4, 16]
+        if min(levels + [options['requests'], options['workers'], options['iterations'], options['books']]) < 1:
+            raise CommandError("All numeric options must be positive.")
+        results = {}
+        overrides = override_settings(
+            LOGIN_RATE_LIMITS={}, PASSWORD_HASH_WORKERS=options['workers'],
+            PASSWORD_PBKDF2_ITERATIONS=options['iterations'],
+        )
+        with test_database(), overrides:
+            reset_verifier()
+            seed_books(options['books'])
+            get_user_model().objects.create_user(email=BENCH_EMAIL, password=BENCH_PASSWORD)
+            for level in levels:
+                results[level] = self.run_level(level, options['requests'])
+        reset_verifier()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for level, stats in results.items():
+            login, probe = stats['login'], stats['probe']
+            self.stdout.write(
+                f"{level:>4} concurrent  {login['rps']:>8.1f} logins/s  p50 {login['p50_ms']:>8.2f} ms  "
+                f"p95 {login['p95_ms']:>8.2f} ms  rejected {stats['rejected']:>4}  "
+                f"probe p95 {probe['p95_ms']:>8.2f} ms"
+            )
+
+    def run_level(self, concurrency, total):
+        url = reverse('token_obtain_pair')
+        payload = {'email': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+        rejected = []
+
+        def login(_):
+            client = Client()
+            start = time.perf_counter()
+            response = client.post(url, payload, content_type='application/json')
+            elapsed = time.perf_counter() - start
+            if response.status_code == 503:
+                rejected.append(elapsed)
+            elif response.status_code != 200:
+                raise CommandError(f"POST {url} returned {response.status_code}.")
+            return elapsed
+
+        done = threading.Event()
+        probe_samples = []
+
+        def probe():
+            client = Client()
+            probe_url = reverse('student-books')
+            while not done.is_set():
+                start = time.perf_counter()
+                client.get(probe_url, {'page_size': 50})
+                probe_samples.append(time.perf_counter() - start)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                samples = list(pool.map(login, range(total)))
+        finally:
+            done.set()
+            prober.join()
+        elapsed = time.perf_counter() - start
+        return {
+            'login': {**summarize(samples), 'rps': round((len(samples) - len(rejected)) / elapsed, 1)},
+            'rejected': len(rejected),
+            'probe': summarize(probe_samples),
+        }
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from library.benchmarks import seed_books, test_database
+from library.models import Book
+from library.renderers import FastJSONRenderer, orjson
+from library.serializers import BookSerializer, get_book_values_serializer
+
+
+def best_of(repeat, func):
+    """Return ``(seconds, result)`` for the fastest of ``repeat`` calls."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    """
+    Compare BookSerializer over model instances with the values()-based
+    serializer, and DRF's JSONRenderer with FastJSONRenderer.
+    """
+    help = "Benchmark Book serialization and JSON rendering on a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000, help="Books to seed and serialize.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per variant; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        if options['books'] < 1 or options['repeat'] < 1:
+            raise CommandError("--books and --repeat must be positive.")
+        repeat = options['repeat']
+        with test_database():
+            seed_books(options['books'])
+            values_serializer = get_book_values_serializer()
+            model_time, data = best_of(repeat, lambda: BookSerializer(Book.objects.all(), many=True).data)
+            values_time, fast_data = best_of(
+                repeat, lambda: values_serializer.serialize(values_serializer.values(Book.objects.all()))
+            )
+        json_time, rendered = best_of(repeat, lambda: JSONRenderer().render(data))
+        fast_json_time, fast_rendered = best_of(repeat, lambda: FastJSONRenderer().render(fast_data))
+        if rendered != fast_rendered:
+            raise CommandError("Fast serialization output differs from BookSerializer + JSONRenderer.")
+
+        self.write_row('query + BookSerializer', model_time)
+        self.write_row('query + BookValuesSerializer', values_time, model_time)
+        self.write_row('JSONRenderer', json_time)
+        self.write_row('FastJSONRenderer' + ('' if orjson else ' (stdlib fallback)'), fast_json_time, json_time)
+        self.write_row('end to end', values_time + fast_json_time, model_time + json_time)
+
+    def write_row(self, label, seconds, baseline=None):
+        speedup = f'  {baseline / seconds:5.1f}x faster' if baseline else ''
+        self.stdout.write(f"{label:<38} {seconds * 1000:>9.1f} ms{speedup}")
@@ -0,0 +1,106 @@
+import json
+import time
+from itertools import cycle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from library.benchmarks import WORDS, seed_books, summarize, test_database
+from library.models import Book
+from library.pagination import TitleKeysetPaginator
+
+SCENARIOS = ('list-first', 'list-deep', 'detail', 'search')
+
+BENCH_EMAIL = 'bench-templates@example.com'
+
+
+class Command(BaseCommand):
+    """
+    Measure render times of the book management templates.
+
+    Each scenario is timed twice on a seeded test database: cold, with the
+    cache cleared before every request so rows and pages are rendered and
+    queried from scratch, and warm, serving cached pages and row fragments.
+    ``list-deep`` opens the list at a cursor ``--depth`` books into the
+    catalogue, which should cost the same as the first page.
+    """
+    help = "Benchmark the book list, detail and search templates, cold and warm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000, help="Books to seed.")
+        parser.add_argument('--requests', type=int, default=100, help="Measured requests per scenario and mode.")
+        parser.add_argument('--depth', type=int, default=None,
+                            help="Position of the list-deep cursor (defaults to 90%% of --books).")
+        parser.add_argument('--scenario', choices=SCENARIOS, action='append',
+                            help="Scenario to run (repeatable; defaults to all).")
+        parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if min(options['books'], options['requests']) < 1:
+            raise CommandError("--books and --requests must be positive.")
+        depth = options['depth'] if options['depth'] is not None else options['books'] * 9 // 10
+        if not 0 <= depth < options['books']:
+            raise CommandError("--depth must be between 0 and --books - 1.")
+
+        results = {}
+        with test_database():
+            seed_books(options['books'])
+            client = Client()
+            client.force_login(get_user_model().objects.create_user(email=BENCH_EMAIL, password=None))
+            requests = {
+                'list-first': self.list_request(),
+                'list-deep': self.list_request(depth),
+                'detail': self.detail_request(),
+                'search': self.search_request(),
+            }
+            for name in options['scenario'] or SCENARIOS:
+                results[name] = {
+                    mode: self.run_scenario(client, requests[name], options['requests'], cold=mode == 'cold')
+                    for mode in ('cold', 'warm')
+                }
+        cache.clear()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, modes in results.items():
+            for mode, stats in modes.items():
+                self.stdout.write(
+                    f"{name:<12} {mode:<5} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+                    f"{stats['html_bytes']:>9,} bytes"
+                )
+
+    def run_scenario(self, client, request, total, cold):
+        """Time ``total`` calls of ``request(client)`` after one unmeasured warmup."""
+        request(client)
+        samples, size = [], 0
+        for _ in range(total):
+            if cold:
+                cache.clear()
+            start = time.perf_counter()
+            response = request(client)
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}.")
+            size = len(response.content)
+        return {**summarize(samples), 'html_bytes': size}
+
+    def list_request(self, depth=0):
+        url = reverse('book-list')
+        params = {}
+        if depth:
+            book = Book.objects.order_by('title', 'id').only('id', 'title')[depth - 1]
+            params['after'] = TitleKeysetPaginator.encode_cursor(book)
+        return lambda client: client.get(url, params)
+
+    def detail_request(self):
+        urls = cycle([reverse('book-detail', args=[pk]) for pk in Book.objects.values_list('pk', flat=True)[:100]])
+        return lambda client: client.get(next(urls))
+
+    def search_request(self):
+        url = reverse('book-search')
+        queries = cycle(f'{first} {second}' for first, second in zip(WORDS, WORDS[1:]))
+        return lambda client: client.get(url, {'q': next(queries)})
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_books
+
+
+class Command(BaseCommand):
+    """
+    Stream the whole book catalogue to a file or stdout.
+    """
+    help = "Export all books as NDJSON or a JSON array, optionally gzip-compressed."
+    # System checks would import the URLconf, and with it the whole API stack.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='fmt', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--gzip', action='store_true', help="Gzip-compress the output.")
+        parser.add_argument('-o', '--output', help="Output file (defaults to stdout).")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
+        pieces = export_books(options['fmt'], options['chunk_size'], options['gzip'])
+
+        if options['output']:
+            mode = 'wb' if options['gzip'] else 'w'
+            encoding = None if options['gzip'] else 'utf-8'
+            with open(options['output'], mode, encoding=encoding) as out:
+                for piece in pieces:
+                    out.write(piece)
+        elif options['gzip']:
+            for piece in pieces:
+                sys.stdout.buffer.write(piece)
+            sys.stdout.buffer.flush()
+        else:
+            for piece in pieces:
+                self.stdout.write(piece, ending='')
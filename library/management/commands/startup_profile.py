@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+SETUP_SNIPPET = 'import django; django.setup()'
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``python -X importtime`` output into ``(module, self_us, cumulative_us, depth)`` rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def profile_startup(settings_module, command=None):
+    """
+    Start a fresh interpreter that sets Django up (or runs ``manage.py
+    <command> --help``) under ``-X importtime`` and return a report dict.
+
+    Without ``settings_module`` a command starts with the profile manage.py
+    picks for it.
+    """
+    env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    env.pop('DJANGO_SETTINGS_MODULE', None)
+    if command:
+        args = [os.path.join(settings.BASE_DIR, 'manage.py'), command, '--help']
+    else:
+        args = ['-c', SETUP_SNIPPET]
+        settings_module = settings_module or settings.SETTINGS_MODULE
+    if settings_module:
+        env['DJANGO_SETTINGS_MODULE'] = settings_module
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+
+    rows = parse_importtime(result.stderr)
+    packages = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        packages[module.partition('.')[0]] += self_us
+    return {
+        'settings': settings_module or 'manage.py default',
+        'command': command,
+        'wall_ms': round(wall * 1000, 1),
+        'import_ms': round(sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000, 1),
+        'modules': len(rows),
+        'packages': {name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda item: -item[1])},
+        'loaded': sorted(packages),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Report where interpreter and Django startup time goes.
+    """
+    help = "Profile cold-start imports (python -X importtime) for a settings profile or command."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module',
+                            help="Settings profile to start with (defaults to the one manage.py would use).")
+        parser.add_argument('--command', dest='profiled_command',
+                            help="Profile 'manage.py <command> --help' instead of django.setup().")
+        parser.add_argument('--top', type=int, default=15, help="Packages to list.")
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        report = profile_startup(options['settings_module'], options['profiled_command'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        target = f"manage.py {report['command']}" if report['command'] else 'django.setup()'
+        self.stdout.write(
+            f"{target} with {report['settings']}: {report['wall_ms']:.0f} ms wall, "
+            f"{report['import_ms']:.0f} ms importing {report['modules']} modules"
+        )
+        for name, ms in list(report['packages'].items())[:options['top']]:
+            self.stdout.write(f"  {name:<32} {ms:>8.1f} ms")
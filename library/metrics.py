@@ -0,0 +1,162 @@
+"""
+In-process request metrics with Prometheus text exposition.
+
+``RequestMetricsMiddleware`` records one ``RequestStats`` per request and
+feeds it into the module-level ``registry``, which ``/metrics`` renders in
+the Prometheus text format. Histograms live in process memory, so with
+several workers each scrape reports the worker that served it.
+"""
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 8192, 65536, 262144, 1048576, 8388608)
+
+current_request_stats = ContextVar('current_request_stats', default=None)
+
+
+class RequestStats:
+    """
+    Timings collected while serving a single request.
+    """
+    __slots__ = ('queries', 'sql_time', 'template_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting and timing queries."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - start
+            self.queries += 1
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` installed on every database connection.
+
+    It charges queries to the request in the current context, which also
+    covers queries the async ORM runs in worker threads.
+    """
+    stats = current_request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.sql_wrapper(execute, sql, params, many, context)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``sql_wrapper`` once per connection."""
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def record_template_time(seconds):
+    """Add template render time to the current request, if any."""
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.template_time += seconds
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense.
+    """
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in items
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of labelled histograms and counters.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # name -> (help, buckets, {labels: Histogram})
+        self._counters = {}    # name -> (help, {labels: value})
+
+    def observe(self, name, help_text, buckets, labels, value):
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            _, _, series = self._histograms.setdefault(name, (help_text, buckets, {}))
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, help_text, labels, amount=1):
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            _, series = self._counters.setdefault(name, (help_text, {}))
+            series[labels] = series.get(labels, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (help_text, series) in sorted(self._counters.items()):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            for name, (help_text, buckets, series) in sorted(self._histograms.items()):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in zip(buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {count}')
+                    lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {histogram.count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {histogram.total}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def record_request(route, method, status_code, duration, stats, size):
+    """Fold one finished request into the registry."""
+    labels = {'route': route, 'method': method}
+    registry.increment('library_requests_total', "Requests served.",
+                       {**labels, 'status': status_code})
+    registry.observe('library_request_duration_seconds', "Wall time per request.",
+                     DURATION_BUCKETS, labels, duration)
+    registry.observe('library_request_db_queries', "SQL queries per request.",
+                     QUERY_COUNT_BUCKETS, labels, stats.queries)
+    registry.observe('library_request_db_duration_seconds', "SQL time per request.",
+                     DURATION_BUCKETS, labels, stats.sql_time)
+    registry.observe('library_request_template_duration_seconds', "Template render time per request.",
+                     DURATION_BUCKETS, labels, stats.template_time)
+    if size is not None:
+        registry.observe('library_response_size_bytes', "Response body size.",
+                         SIZE_BUCKETS, labels, size)
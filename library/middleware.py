@@ -0,0 +1,111 @@
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+from .metrics import RequestStats, current_request_stats, record_request
+from .routers import REPLICA_PIN_COOKIE, RoutingState, choose_replica, current_routing
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, SQL query count and time, template render time and
+    response size for every request.
+
+    The numbers are returned in a ``Server-Timing`` header and aggregated
+    per route for the ``/metrics`` endpoint. Keep this middleware first in
+    ``MIDDLEWARE`` so that it measures the whole stack. It supports both
+    sync and async stacks, so async views are not forced onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request_stats.reset(token)
+        return self.finish(request, response, stats, perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request_stats.reset(token)
+        return self.finish(request, response, stats, perf_counter() - start)
+
+    def finish(self, request, response, stats, duration):
+        size = None if response.streaming else len(response.content)
+        match = request.resolver_match
+        route = (match.route or match.view_name) if match else '<unresolved>'
+        record_request(route, request.method, response.status_code, duration, stats, size)
+
+        response['Server-Timing'] = ', '.join([
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+        ])
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route catalogue reads of replica-enabled GET views to a read replica.
+
+    A request that writes to the database sets a short-lived cookie that
+    keeps the client's following requests on the primary (see
+    ``library.routers``).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = current_routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = current_routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = current_routing.get()
+        if state is not None:
+            state.replica = choose_replica(request, view_func)
+
+    def finish(self, response, state):
+        if state.wrote and getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+def create_fulltext_index(apps, schema_editor):
+    """
+    FULLTEXT indexes are MySQL-specific; other backends use the in-process
+    inverted index from library.search instead.
+    """
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'CREATE FULLTEXT INDEX library_book_fulltext ON library_book (title, author, description)'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('DROP INDEX library_book_fulltext ON library_book')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_adminuser_bio'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
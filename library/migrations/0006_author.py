@@ -0,0 +1,68 @@
+# Generated by Django 4.2 on 2026-10-17 17:37
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_authors(apps, schema_editor):
+    """
+    Aggregate the existing Book.author values into Author rows.
+
+    The normalization is repeated here rather than imported, so that this
+    migration keeps producing the same keys if library.authors changes.
+    """
+    Author = apps.get_model('library', 'Author')
+    Book = apps.get_model('library', 'Book')
+    rows = (
+        Book.objects.using(schema_editor.connection.alias).order_by().values('author')
+        .annotate(count=Count('id'), first=Min('published_date'), last=Max('published_date'))
+    )
+    authors = {}
+    for row in rows.iterator():
+        key = ' '.join(row['author'].split()).casefold()[:255]
+        if not key:
+            continue
+        author = authors.get(key)
+        if author is None:
+            initial = key[0].upper()
+            author = authors[key] = Author(
+                key=key, name=' '.join(row['author'].split()),
+                initial=initial if initial.isalnum() else '#', book_count=0,
+            )
+        author.book_count += row['count']
+        if row['first'] is not None and (author.first_published is None or row['first'] < author.first_published):
+            author.first_published = row['first']
+        if row['last'] is not None and (author.last_published is None or row['last'] > author.last_published):
+            author.last_published = row['last']
+    Author.objects.using(schema_editor.connection.alias).bulk_create(authors.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_book_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('initial', models.CharField(max_length=1)),
+                ('book_count', models.PositiveIntegerField(default=0)),
+                ('first_published', models.DateField(blank=True, null=True)),
+                ('last_published', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['initial', 'key'], name='author_initial_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['-book_count', 'key'], name='author_book_count_idx'),
+        ),
+        migrations.RunPython(backfill_authors, migrations.RunPython.noop),
+    ]
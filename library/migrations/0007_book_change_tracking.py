@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-17 17:50
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_books(apps, schema_editor):
+    """
+    Give existing books distinct change numbers (their ids) and start the
+    counter after them.
+    """
+    Book = apps.get_model('library', 'Book')
+    ChangeSequence = apps.get_model('library', 'ChangeSequence')
+    alias = schema_editor.connection.alias
+    Book.objects.using(alias).update(change_seq=F('id'))
+    last = Book.objects.using(alias).aggregate(last=Max('id'))['last'] or 0
+    ChangeSequence.objects.using(alias).create(pk=1, value=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0006_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField(unique=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['updated_at'], name='book_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['change_seq'], name='book_change_seq_idx'),
+        ),
+        migrations.RunPython(number_existing_books, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_circulation'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'ready'])), fields=('book', 'patron'), name='hold_one_active_per_patron'),
+        ),
+        migrations.AddConstraint(
+            model_name='loan',
+            constraint=models.UniqueConstraint(condition=models.Q(('returned_at__isnull', True)), fields=('book', 'borrower'), name='loan_one_open_per_borrower'),
+        ),
+    ]
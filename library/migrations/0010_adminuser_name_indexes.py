@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_loan_hold_unique_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminuser',
+            index=models.Index(fields=['first_name'], name='adminuser_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminuser',
+            index=models.Index(fields=['last_name'], name='adminuser_last_name_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 
 class AdminUserManager(BaseUserManager):
@@ -56,17 +59,253 @@ class AdminUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        # The admin searches names by prefix, a range scan of these indexes.
+        indexes = [
+            models.Index(fields=['first_name'], name='adminuser_first_name_idx'),
+            models.Index(fields=['last_name'], name='adminuser_last_name_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
+class ChangeSequence(models.Model):
+    """
+    Single-row counter handing out Book change sequence numbers.
+    """
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, count=1):
+        """
+        Reserve ``count`` consecutive numbers and return the first.
+
+        The counter row stays locked until the caller's transaction commits,
+        so numbers become visible in the order they were handed out and a
+        reader that has seen number n has seen everything below it.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(pk=1).update(value=F('value') + count):
+                cls.objects.get_or_create(pk=1)
+                cls.objects.filter(pk=1).update(value=F('value') + count)
+            last = cls.objects.filter(pk=1).values_list('value', flat=True).get()
+        return last - count + 1
+
+class BookQuerySet(models.QuerySet):
+    """
+    Book queries whose bulk writes stamp ``change_seq`` and ``updated_at``
+    like ``Book.save()`` does. ``update()`` does not; rows changed with it
+    are missed by the change feed until they are saved again.
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            first = ChangeSequence.allocate(len(objs)) if objs else 0
+            for seq, book in enumerate(objs, first):
+                book.change_seq = seq
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            first = ChangeSequence.allocate(len(objs)) if objs else 0
+            for seq, book in enumerate(objs, first):
+                book.change_seq, book.updated_at = seq, now
+            return super().bulk_update(objs, sorted({*fields, 'change_seq', 'updated_at'}), *args, **kwargs)
+
 class Book(models.Model):
     """
     Model representing a book in the library.
+
+    Every write stamps ``updated_at`` and a new ``change_seq`` from
+    ``ChangeSequence``; deletions leave a ``BookTombstone`` with its own
+    number, so ``/api/books/changes/`` can replay writes in order.
     """
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     published_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        # Access patterns: admin/template ordering by title, date filters, and
+        # per-author lookups ordered by date (the composite index also serves
+        # plain author lookups through its leftmost column).
+        indexes = [
+            models.Index(fields=['title'], name='book_title_idx'),
+            models.Index(fields=['published_date'], name='book_published_date_idx'),
+            models.Index(fields=['author', 'published_date'], name='book_author_published_idx'),
+            models.Index(fields=['updated_at'], name='book_updated_at_idx'),
+            models.Index(fields=['change_seq'], name='book_change_seq_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded author and date so that Author statistics can
+        # follow a change of either (see library.authors).
+        if 'author' in field_names and 'published_date' in field_names:
+            instance._loaded_author_values = (instance.author, instance.published_date)
+        # Likewise the title, for the autocomplete index (library.autocomplete).
+        if 'title' in field_names:
+            instance._loaded_title = instance.title
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            self.change_seq = ChangeSequence.allocate()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq', 'updated_at'}
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
+
+class BookTombstone(models.Model):
+    """
+    Marker left by a deleted book for consumers of the change feed.
+    """
+    book_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField(unique=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Book {self.book_id} deleted'
+
+class Author(models.Model):
+    """
+    Pre-aggregated statistics for the books sharing a normalized author name.
+
+    Rows are maintained incrementally from Book writes by ``library.authors``;
+    ``Book.author`` remains the source of truth.
+    """
+    key = models.CharField(max_length=255, unique=True)  # normalized name
+    name = models.CharField(max_length=255)
+    initial = models.CharField(max_length=1)
+    book_count = models.PositiveIntegerField(default=0)
+    first_published = models.DateField(null=True, blank=True)
+    last_published = models.DateField(null=True, blank=True)
+
+    class Meta:
+        # Listings page through one initial by name, or through everyone by
+        # number of books; both orderings end on the unique key.
+        indexes = [
+            models.Index(fields=['initial', 'key'], name='author_initial_key_idx'),
+            models.Index(fields=['-book_count', 'key'], name='author_book_count_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class Copy(models.Model):
+    """
+    A physical copy of a book that can be lent out.
+
+    ``is_available`` is true while the copy is on the shelf, and false while
+    it is on loan or set aside for a hold.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='copies')
+    barcode = models.CharField(max_length=64, unique=True)
+    is_available = models.BooleanField(default=False)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Checkout looks for a shelved copy of one book.
+        indexes = [
+            models.Index(fields=['book', 'is_available'], name='copy_book_available_idx'),
+        ]
+
+    def __str__(self):
+        return self.barcode
+
+class Availability(models.Model):
+    """
+    Circulation counters of one book, kept in step with its copies and holds
+    by ``library.circulation`` so availability is read without counting.
+    """
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, primary_key=True, related_name='availability')
+    copies = models.PositiveIntegerField(default=0)
+    available = models.PositiveIntegerField(default=0)  # copies on the shelf
+    holds = models.PositiveIntegerField(default=0)  # holds waiting for a copy
+
+    class Meta:
+        verbose_name_plural = 'availability'
+
+    def __str__(self):
+        return f'{self.available}/{self.copies} available'
+
+class Loan(models.Model):
+    """
+    A copy lent to a user; open until ``returned_at`` is set.
+    """
+    copy = models.ForeignKey(Copy, on_delete=models.CASCADE, related_name='loans')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='loans')
+    borrower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='loans')
+    borrowed_at = models.DateTimeField(auto_now_add=True)
+    due_at = models.DateTimeField()
+    returned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # A user's loans, open ones first (NULL returned_at), and the open
+        # loans of a book.
+        indexes = [
+            models.Index(fields=['borrower', 'returned_at'], name='loan_borrower_returned_idx'),
+            models.Index(fields=['book', 'returned_at'], name='loan_book_returned_idx'),
+        ]
+        # One open loan per user and book. MySQL has no partial indexes and
+        # skips this; library.circulation also serializes on the user's row.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'borrower'], condition=models.Q(returned_at__isnull=True),
+                name='loan_one_open_per_borrower',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.copy} to {self.borrower}'
+
+class Hold(models.Model):
+    """
+    A user's place in the queue for a book with no copy on the shelf.
+
+    Waiting holds are served oldest first: a returned copy is set aside for
+    the hold (``ready``) until its user checks it out or cancels.
+    """
+    WAITING = 'waiting'
+    READY = 'ready'
+    FULFILLED = 'fulfilled'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (WAITING, 'Waiting'),
+        (READY, 'Ready for pickup'),
+        (FULFILLED, 'Fulfilled'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='holds')
+    patron = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='holds')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=WAITING)
+    copy = models.ForeignKey(Copy, on_delete=models.SET_NULL, null=True, blank=True, related_name='holds')
+    placed_at = models.DateTimeField(auto_now_add=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # The queue of a book in order, and a user's own holds.
+        indexes = [
+            models.Index(fields=['book', 'status', 'placed_at'], name='hold_book_queue_idx'),
+            models.Index(fields=['patron', 'status'], name='hold_patron_status_idx'),
+        ]
+        # One active hold per user and book (not enforced on MySQL, as above).
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'patron'], condition=models.Q(status__in=['waiting', 'ready']),
+                name='hold_one_active_per_patron',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.patron} for {self.book}'
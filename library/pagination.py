@@ -0,0 +1,121 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.paginator import InvalidPage
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+from .cache import cached_catalogue_read
+
+
+class BookCursorPagination(CursorPagination):
+    """
+    Keyset pagination over Book.id.
+
+    Each page is fetched with ``WHERE id > <cursor> ORDER BY id LIMIT n``,
+    so the cost of a page does not grow with its position in the catalogue.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AuthorCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the Author listing.
+
+    The view sets ``ordering`` per request; every ordering ends on the
+    unique normalized name.
+    """
+    ordering = 'key'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPage:
+    """
+    One page of a ``TitleKeysetPaginator``, with cursors for its neighbours.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class TitleKeysetPaginator:
+    """
+    Keyset pagination over ``ORDER BY title, id`` for the template book list.
+
+    A page after the cursor ``(title, id)`` is fetched with ``title >= %s``
+    minus the rows up to the cursor, so it is a range scan of the title index
+    however deep the page is. Cursors are opaque URL-safe strings. Pages and
+    the total count are cached per catalogue version (see ``library.cache``).
+    """
+    cache_namespace = 'book-list'
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = per_page
+
+    @staticmethod
+    def encode_cursor(book):
+        return urlsafe_b64encode(json.dumps([book.title, book.pk]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            title, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise InvalidPage("Invalid cursor.")
+        if not isinstance(title, str) or not isinstance(pk, int):
+            raise InvalidPage("Invalid cursor.")
+        return title, pk
+
+    @cached_property
+    def count(self):
+        return cached_catalogue_read(f'{self.cache_namespace}:count', {}, self.object_list.count)
+
+    def page(self, after=None, before=None):
+        """Return the page after (or before) a cursor, or the first page."""
+        params = {'after': after or '', 'before': before or '', 'per_page': self.per_page}
+        rows, has_previous, has_next = cached_catalogue_read(
+            self.cache_namespace, params, lambda: self._fetch(after, before)
+        )
+        return KeysetPage(
+            rows, self,
+            next_cursor=self.encode_cursor(rows[-1]) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0]) if rows and has_previous else None,
+        )
+
+    def _fetch(self, after, before):
+        """Return ``(rows, has_previous, has_next)`` for a cursor."""
+        queryset = self.object_list.order_by('title', 'id')
+        if before:
+            title, pk = self.decode_cursor(before)
+            rows = list(
+                queryset.filter(title__lte=title).exclude(title=title, id__gte=pk)
+                .order_by('-title', '-id')[:self.per_page + 1]
+            )
+            return rows[:self.per_page][::-1], len(rows) > self.per_page, True
+        if after:
+            title, pk = self.decode_cursor(after)
+            queryset = queryset.filter(title__gte=title).exclude(title=title, id__lte=pk)
+        rows = list(queryset[:self.per_page + 1])
+        return rows[:self.per_page], bool(after), len(rows) > self.per_page
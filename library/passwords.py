@@ -0,0 +1,115 @@
+"""
+Password verification on a bounded worker pool.
+
+Checking a password runs the configured hasher (600,000 PBKDF2 rounds by
+default), which costs far more CPU than any other request. ``verify_password``
+runs the check on a small per-process thread pool, so a burst of logins
+keeps at most ``PASSWORD_HASH_WORKERS`` cores busy per process. The other
+request threads keep running, because hashlib, scrypt and argon2 release the
+GIL while they hash. At most ``PASSWORD_HASH_QUEUE`` checks wait for a
+worker, for up to ``PASSWORD_HASH_TIMEOUT`` seconds. Beyond that
+``PasswordHashingBusy`` is raised, so the login is refused quickly instead of
+queueing without bound.
+
+Hashes made by an older hasher, or with a different PBKDF2 iteration count,
+are upgraded to ``PASSWORD_HASHERS[0]`` on the next successful login, using
+Django's own ``check_password`` upgrade logic.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when no password worker becomes available in time."""
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count read from
+    ``settings.PASSWORD_PBKDF2_ITERATIONS``. Changing the setting rehashes
+    passwords on their next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class PasswordVerifier:
+    """
+    Run password hashing on ``workers`` threads, with at most ``queue_size``
+    calls waiting and ``timeout`` seconds to wait for a place.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def run(self, func, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHashingBusy(f"No password worker available within {self.timeout}s.")
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """Return this process's ``PasswordVerifier``, creating it on first use."""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None or _verifier.pid != os.getpid():
+            # Worker threads do not survive fork(); build a new pool in the child.
+            _verifier = PasswordVerifier(
+                workers=getattr(settings, 'PASSWORD_HASH_WORKERS', 2),
+                queue_size=getattr(settings, 'PASSWORD_HASH_QUEUE', 16),
+                timeout=getattr(settings, 'PASSWORD_HASH_TIMEOUT', 5),
+            )
+        return _verifier
+
+
+def reset_verifier():
+    """Discard the pool, e.g. after changing its settings in tests."""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is not None:
+            _verifier.shutdown()
+        _verifier = None
+
+
+def _check(password, encoded):
+    upgraded = []
+    valid = hashers.check_password(password, encoded, setter=lambda raw: upgraded.append(hashers.make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def verify_password(password, encoded):
+    """
+    Check ``password`` against ``encoded`` on the worker pool.
+
+    Returns ``(valid, upgraded)``, where ``upgraded`` is a new hash to store
+    when ``encoded`` is valid but made by a non-preferred hasher or cost.
+    With ``encoded=None`` a hash is computed anyway and the result is
+    invalid, which keeps unknown-user logins as slow as real ones.
+    """
+    if encoded is None:
+        get_verifier().run(hashers.make_password, password)
+        return False, None
+    return get_verifier().run(_check, password, encoded)
@@ -0,0 +1,14 @@
+"""
+MySQL backend with process-local connection pooling.
+
+Use ``'ENGINE': 'library.pooled_mysql'``; see ``library.dbpool``.
+"""
+from django.db.backends.mysql import base
+
+from library.dbpool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def check_pooled_connection(self, conn):
+        conn.ping()
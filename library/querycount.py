@@ -0,0 +1,96 @@
+"""
+Query capture and N+1 detection.
+
+``capture_queries()`` records the SQL issued on every configured database
+while its block runs. ``find_repeated_queries()`` fingerprints the captured
+statements (literals and IN-lists collapsed) and reports fingerprints that
+repeat often enough to suggest a per-row lookup, the usual N+1 pattern.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 5
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    """Raised in ``raise`` mode when a request repeats a query fingerprint."""
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so that statements differing only in values compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class CapturedQueries(list):
+    """
+    List of SQL strings captured by ``capture_queries``.
+    """
+    def repeated(self, threshold=DEFAULT_THRESHOLD):
+        return find_repeated_queries(self, threshold)
+
+
+@contextmanager
+def capture_queries():
+    """Collect the SQL of every query executed inside the block."""
+    queries = CapturedQueries()
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield queries
+
+
+def find_repeated_queries(queries, threshold=DEFAULT_THRESHOLD):
+    """Return ``[(fingerprint, count)]`` for fingerprints seen ``threshold`` times or more."""
+    counts = Counter(fingerprint(sql) for sql in queries)
+    return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+
+class NPlusOneDetectionMiddleware:
+    """
+    Development-time N+1 detector.
+
+    Enabled by ``settings.NPLUSONE_DETECTION``: ``'log'`` emits a warning per
+    repeated fingerprint, ``'raise'`` fails the request with
+    ``NPlusOneError``. Any other value removes the middleware at startup.
+    It is sync-only and meant for development servers.
+    """
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'NPLUSONE_DETECTION', 'off')
+        if self.mode not in ('log', 'raise'):
+            raise MiddlewareNotUsed
+        self.threshold = getattr(settings, 'NPLUSONE_THRESHOLD', DEFAULT_THRESHOLD)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_queries() as queries:
+            response = self.get_response(request)
+        repeated = queries.repeated(self.threshold)
+        if repeated:
+            report = '; '.join(f'{count}x {sql}' for sql, count in repeated)
+            message = f"Possible N+1 queries on {request.method} {request.path}: {report}"
+            if self.mode == 'raise':
+                raise NPlusOneError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,53 @@
+"""
+Helpers for asserting that hot queries are served by indexes.
+
+``full_table_scans(queryset)`` runs ``EXPLAIN`` for the queryset on its
+database and returns the plan lines that read a whole table. Ordered walks of
+an index (including SQLite's rowid b-tree for a ``LIMIT``-ed primary-key
+ordering) are not reported.
+"""
+import json
+import re
+
+from django.db import connections
+
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (\w+)\s*$')
+
+
+def _walks_primary_key(queryset):
+    """True for ``ORDER BY pk LIMIT n`` queries, which SQLite plans as a rowid walk."""
+    query = queryset.query
+    pk_names = {'pk', 'id', queryset.model._meta.pk.attname}
+    return query.high_mark is not None and tuple(query.order_by) in {(name,) for name in pk_names}
+
+
+def _mysql_access_types(node):
+    """Yield ``(table_name, access_type)`` for every table in a MySQL JSON plan."""
+    if isinstance(node, dict):
+        if 'access_type' in node:
+            yield node.get('table_name'), node['access_type']
+        for value in node.values():
+            yield from _mysql_access_types(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_access_types(value)
+
+
+def full_table_scans(queryset):
+    """Return a list of plan lines describing full table scans for ``queryset``."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'mysql':
+        plan = json.loads(queryset.explain(format='json'))
+        return [
+            f"{table}: access_type=ALL"
+            for table, access_type in _mysql_access_types(plan)
+            if access_type == 'ALL'
+        ]
+    plan = queryset.explain()
+    if vendor == 'sqlite':
+        if _walks_primary_key(queryset):
+            return []
+        return [line for line in plan.splitlines() if SQLITE_SCAN_RE.search(line)]
+    if vendor == 'postgresql':
+        return [line for line in plan.splitlines() if 'Seq Scan' in line]
+    return []
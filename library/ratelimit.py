@@ -0,0 +1,167 @@
+"""
+Token-bucket rate limiting for logins.
+
+Each key, such as a client IP or an email, gets a bucket that holds up to
+``attempts`` tokens and refills completely over ``period`` seconds. An
+attempt takes one token. When the bucket is empty the attempt is refused,
+and the limiter reports how long until the next token arrives. Short bursts
+are allowed, but the sustained rate is capped.
+
+The store that keeps the buckets is pluggable (``LOGIN_RATE_LIMIT_STORE``):
+
+* ``LocalBucketStore`` keeps them in process memory, so each worker process
+  enforces its own limits. It is exact and costs no I/O.
+* ``CacheBucketStore`` keeps them in the Django cache, so one limit is
+  shared by every process using that cache. Concurrent attempts may race on
+  a read-modify-write, and at worst let an extra attempt through.
+
+Behind reverse proxies, ``REMOTE_ADDR`` is the nearest proxy's address, so
+IP buckets are keyed on ``client_ip()``, which reads ``X-Forwarded-For``
+as far back as ``LIBRARY_TRUSTED_PROXY_COUNT`` proxies vouch for.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+def take_token(state, rate, burst, now):
+    """
+    Refill a ``(tokens, updated_at)`` bucket and take one token.
+
+    Returns ``(wait, state)``: ``wait`` is 0 when a token was taken, otherwise
+    the seconds until one is available.
+    """
+    tokens, updated_at = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return 0.0, (tokens - 1, now)
+    return (1 - tokens) / rate, (tokens, now)
+
+
+class LocalBucketStore:
+    """
+    Buckets in process memory, evicting the least recently used beyond
+    ``max_keys``.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self._lock:
+            wait, self._buckets[key] = take_token(self._buckets.pop(key, None), rate, burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default Django cache, shared between processes.
+    """
+    key_prefix = 'library:ratelimit:'
+
+    def take(self, key, rate, burst, now):
+        cache_key = self.key_prefix + hashlib.sha1(key.encode()).hexdigest()
+        wait, state = take_token(cache.get(cache_key), rate, burst, now)
+        # An untouched bucket is full again after burst / rate seconds.
+        cache.set(cache_key, state, math.ceil(burst / rate) + 1)
+        return wait
+
+    def clear(self):
+        # Buckets expire from the cache once they have refilled.
+        pass
+
+
+class RateLimiter:
+    """
+    Per-key token buckets of ``attempts`` tokens refilled over ``period`` seconds.
+    """
+
+    def __init__(self, attempts, period, store):
+        self.burst = attempts
+        self.rate = attempts / period
+        self.store = store
+
+    def take(self, key, now=None):
+        """Take a token for ``key``; return 0 if allowed, else seconds to wait."""
+        # Wall-clock time, so that buckets shared through the cache agree between processes.
+        return self.store.take(key, self.rate, self.burst, time.time() if now is None else now)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide bucket store named by ``LOGIN_RATE_LIMIT_STORE``."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = getattr(settings, 'LOGIN_RATE_LIMIT_STORE', 'library.ratelimit.LocalBucketStore')
+            _store = import_string(path)()
+        return _store
+
+
+def reset_store():
+    """Forget every bucket (and the store choice)."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.clear()
+        _store = None
+
+
+def client_ip(request):
+    """
+    Return the client address of ``request``.
+
+    Each of the ``LIBRARY_TRUSTED_PROXY_COUNT`` proxies in front of the app
+    appends the address it was connected from to ``X-Forwarded-For``, so
+    the client is that many entries from the end. Entries further left come
+    from the client and could be forged. With no trusted proxies, or a
+    header too short to have passed through them all, it is ``REMOTE_ADDR``.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    proxies = getattr(settings, 'LIBRARY_TRUSTED_PROXY_COUNT', 0)
+    if proxies <= 0:
+        return remote_addr
+    forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    forwarded = [address for address in forwarded if address]
+    if len(forwarded) < proxies:
+        return remote_addr
+    return forwarded[-proxies]
+
+
+def login_retry_after(request, email):
+    """
+    Take a login attempt from the client IP's and the email's buckets.
+
+    Returns 0 when the attempt may proceed, otherwise the number of seconds
+    to wait. Limits come from ``LOGIN_RATE_LIMITS``, a mapping of ``'ip'``
+    and ``'email'`` to ``(attempts, period_seconds)``; a missing entry is
+    not limited.
+    """
+    limits = getattr(settings, 'LOGIN_RATE_LIMITS', {})
+    store = get_store()
+    keys = [('ip', client_ip(request))]
+    if email:
+        keys.append(('email', email.strip().lower()))
+    for scope, value in keys:
+        if scope in limits:
+            wait = RateLimiter(*limits[scope], store).take(f'login:{scope}:{value}')
+            if wait:
+                return wait
+    return 0
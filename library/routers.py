@@ -0,0 +1,86 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Only views marked with ``replica_reads`` (or a ``replica_reads = True`` class
+attribute) read catalogue tables from a replica, and only for GET/HEAD
+requests; everything else, including every write, uses ``default``.
+
+``ReplicaRoutingMiddleware`` decides per request. A request that writes pins
+its client to the primary for ``REPLICA_PIN_SECONDS`` through a cookie, so
+the client's next reads see its own writes despite replication lag. Reads
+also stay on the primary for that long after any catalogue change, so pages
+cached under the new catalogue version are never computed from a replica
+that has not caught up yet.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .cache import catalogue_changed_within
+
+REPLICA_PIN_COOKIE = 'db_pin'
+
+current_routing = ContextVar('library_db_routing', default=None)
+
+
+class RoutingState:
+    """Per-request routing decision, mutated by the router on writes."""
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replica_reads(view):
+    """Mark a function-based view as safe to serve GET requests from a replica."""
+    view.replica_reads = True
+    return view
+
+
+def view_reads_from_replica(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'replica_reads', False) or getattr(view_class, 'replica_reads', False)
+
+
+def choose_replica(request, view_func):
+    """Return the replica alias for this request, or None for the primary."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas or request.method not in ('GET', 'HEAD') or not view_reads_from_replica(view_func):
+        return None
+    if REPLICA_PIN_COOKIE in request.COOKIES:
+        return None
+    if catalogue_changed_within(settings.REPLICA_PIN_SECONDS):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """
+    Send catalogue reads of replica-enabled requests to the chosen replica.
+    """
+    replica_models = {'library.book', 'library.author'}
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        if model._meta.label_lower not in self.replica_models:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
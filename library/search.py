@@ -0,0 +1,274 @@
+"""
+Pluggable full-text search over Book.title, Book.author and Book.description.
+
+``MySQLFullTextBackend`` ranks with ``MATCH ... AGAINST`` on the FULLTEXT
+index created in migration 0004. ``InvertedIndexBackend`` is a pure-Python
+BM25 index kept in process memory, used for SQLite (tests, local runs) and
+any other backend without native full-text support.
+
+The backend is chosen by ``settings.LIBRARY_SEARCH_BACKEND`` (a dotted path)
+or, when unset, by the vendor of the default database connection.
+"""
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Book, BookTombstone
+
+TOKEN_RE = re.compile(r'\w+')
+FIELD_WEIGHTS = {'title': 3.0, 'author': 2.0, 'description': 1.0}
+
+
+def tokenize(text):
+    """Split text into case-folded word tokens."""
+    return TOKEN_RE.findall(text.casefold()) if text else []
+
+
+class BaseSearchBackend:
+    """
+    Interface for search backends.
+    """
+    def search(self, query, limit):
+        """Return up to ``limit`` ``(book_id, score)`` pairs, best match first."""
+        raise NotImplementedError
+
+    async def asearch(self, query, limit):
+        """Async variant of ``search``."""
+        return await sync_to_async(self.search)(query, limit)
+
+    def index_book(self, book):
+        """Add or refresh a single book in the index."""
+
+    def index_books(self, books):
+        """Add or refresh many books, e.g. after a bulk write."""
+        for book in books:
+            self.index_book(book)
+
+    def remove_book(self, book_id):
+        """Drop a single book from the index."""
+
+    def reset(self):
+        """Discard any in-process index state."""
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    """
+    Natural-language MATCH ... AGAINST over the library_book FULLTEXT index.
+
+    The index is maintained by MySQL itself, so the write hooks are no-ops.
+    """
+    match_sql = "MATCH (title, author, description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+
+    def get_queryset(self, query):
+        """Books matching ``query``, annotated with ``score`` and best first."""
+        return (
+            Book.objects.annotate(score=RawSQL(self.match_sql, [query]))
+            .filter(score__gt=0)
+            .order_by('-score', 'id')
+        )
+
+    def search(self, query, limit):
+        return list(self.get_queryset(query).values_list('id', 'score')[:limit])
+
+    async def asearch(self, query, limit):
+        return [row async for row in self.get_queryset(query).values_list('id', 'score')[:limit]]
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    """
+    In-memory inverted index with BM25 ranking.
+
+    Built lazily from the database on first use and updated incrementally
+    from Book signals. Every ``LIBRARY_SEARCH_INDEX_TTL`` seconds it catches
+    up from the change feed (``change_seq`` and tombstones), so writes made
+    by other processes are picked up at the cost of what changed. Rows
+    changed with ``QuerySet.update()`` are missed, as in the feed itself.
+    Re-indexing a book is idempotent, so a write seen both from its signal
+    and from the feed is counted once.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._postings = defaultdict(dict)  # term -> {book_id: weighted tf}
+            self._doc_terms = {}                # book_id -> {term: weighted tf}
+            self._doc_lengths = {}              # book_id -> weighted length
+            self._total_length = 0.0
+            self._built_at = None
+            self._seq = 0  # change feed position
+
+    def _is_fresh(self):
+        ttl = getattr(settings, 'LIBRARY_SEARCH_INDEX_TTL', 300)
+        return self._built_at is not None and time.monotonic() - self._built_at < ttl
+
+    def _ensure_built(self):
+        if self._is_fresh():
+            return
+        if self._built_at is None:
+            with self._lock:
+                if self._built_at is None:
+                    self._build()
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # another thread is catching up; serve the index as it is
+        try:
+            if not self._is_fresh():
+                self._catch_up()
+        finally:
+            self._sync_lock.release()
+
+    def _build(self):
+        # One statement reads one snapshot, and change numbers become visible
+        # in order, so everything after the highest number read is replayed
+        # by _catch_up().
+        rows = Book.objects.values_list('id', 'change_seq', *FIELD_WEIGHTS).iterator(chunk_size=2000)
+        for book_id, seq, *values in rows:
+            self._add(book_id, dict(zip(FIELD_WEIGHTS, values)))
+            self._seq = max(self._seq, seq)
+        self._built_at = time.monotonic()
+
+    def _catch_up(self):
+        """Apply the changes after ``self._seq``, querying outside the lock."""
+        since = self._seq
+        changes = [
+            (seq, book_id, dict(zip(FIELD_WEIGHTS, values)))
+            for seq, book_id, *values in Book.objects.filter(change_seq__gt=since).values_list(
+                'change_seq', 'id', *FIELD_WEIGHTS,
+            ).iterator(chunk_size=2000)
+        ]
+        changes += [
+            (seq, book_id, None)
+            for seq, book_id in BookTombstone.objects.filter(change_seq__gt=since).values_list('change_seq', 'book_id')
+        ]
+        changes.sort(key=lambda change: change[0])
+        with self._lock:
+            if self._built_at is None or self._seq != since:
+                return  # reset meanwhile
+            for seq, book_id, values in changes:
+                self._remove(book_id)
+                if values is not None:
+                    self._add(book_id, values)
+                self._seq = seq
+            self._built_at = time.monotonic()
+
+    def _add(self, book_id, values):
+        terms = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(values.get(field)):
+                terms[token] += weight
+        self._doc_terms[book_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[book_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings[term][book_id] = tf
+
+    def _remove(self, book_id):
+        terms = self._doc_terms.pop(book_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(book_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(book_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def index_book(self, book):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove(book.pk)
+            self._add(book.pk, {field: getattr(book, field) for field in FIELD_WEIGHTS})
+
+    def index_books(self, books):
+        if any(book.pk is None for book in books):
+            # bulk_create does not return primary keys on every database
+            # (e.g. MySQL); catch up from the change feed on the next search.
+            with self._lock:
+                if self._built_at is not None:
+                    self._built_at = -math.inf
+            return
+        super().index_books(books)
+
+    def remove_book(self, book_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(book_id)
+
+    def search(self, query, limit):
+        self._ensure_built()
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for book_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[book_id] / avg_length)
+                    scores[book_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Return the configured search backend instance (one per process)."""
+    path = getattr(settings, 'LIBRARY_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'mysql':
+        return MySQLFullTextBackend()
+    return InvertedIndexBackend()
+
+
+def _rank_books(ranked, books):
+    results = []
+    for book_id, score in ranked:
+        book = books.get(book_id)
+        if book is not None:
+            book.score = float(score)
+            results.append(book)
+    return results
+
+
+def search_books(query, limit=50):
+    """
+    Return matching Book instances in relevance order.
+
+    Each book carries the backend's relevance as ``book.score``.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    ranked = get_search_backend().search(query, limit)
+    return _rank_books(ranked, Book.objects.in_bulk([book_id for book_id, _ in ranked]))
+
+
+async def asearch_books(query, limit=50):
+    """Async variant of ``search_books`` using the async ORM."""
+    query = query.strip()
+    if not query:
+        return []
+    ranked = await get_search_backend().asearch(query, limit)
+    return _rank_books(ranked, await Book.objects.ain_bulk([book_id for book_id, _ in ranked]))
@@ -1,6 +1,12 @@
-from rest_framework import serializers
+from datetime import date
+from functools import lru_cache
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
-from .models import Book
+from .models import Author, Book, Hold, Loan
+from .signals import books_bulk_saved
+from .validators import validate_book_author, validate_book_title
 
 # ✅ AdminUser Serializer with enhanced validation and password hashing
 class AdminUserSerializer(serializers.ModelSerializer):
@@ -40,27 +46,180 @@ class AdminUserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Password must be at least 8 characters long.")
         return value
 
+# ✅ Sparse fieldsets support (e.g. ?fields=id,title)
+class SparseFieldsMixin:
+    """
+    Allow callers to restrict the serialized output with a ``fields`` kwarg.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+# ✅ Bulk writes for lists of books
+class BookListSerializer(serializers.ListSerializer):
+    """
+    List serializer writing Book rows with bulk_create/bulk_update.
+
+    Bulk writes bypass per-instance model signals, so ``books_bulk_saved`` is
+    sent once for the whole batch instead.
+    """
+    batch_size = 1000
+
+    def create(self, validated_data):
+        books = Book.objects.bulk_create(
+            [Book(**attrs) for attrs in validated_data], batch_size=self.batch_size
+        )
+        books_bulk_saved.send(sender=Book, instances=books, created=True)
+        return books
+
+    def update(self, instance, validated_data):
+        """
+        ``instance`` is a list of books aligned item-for-item with ``validated_data``.
+        """
+        fields = set()
+        for book, attrs in zip(instance, validated_data):
+            for name, value in attrs.items():
+                setattr(book, name, value)
+            fields.update(attrs)
+        if fields:
+            Book.objects.bulk_update(instance, sorted(fields), batch_size=self.batch_size)
+            books_bulk_saved.send(sender=Book, instances=instance, created=False)
+        return instance
+
 # ✅ Book Serializer with additional validation
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Book model.
     """
     class Meta:
         model = Book
         fields = '__all__'
+        list_serializer_class = BookListSerializer
 
     def validate_title(self, value):
         """
         Ensure the book title is not empty or too short.
         """
-        if len(value) < 3:
-            raise serializers.ValidationError("Title must be at least 3 characters long.")
-        return value
+        return validate_book_title(value)
 
     def validate_author(self, value):
         """
         Ensure the author's name is valid.
         """
-        if len(value) < 3:
-            raise serializers.ValidationError("Author name must be at least 3 characters long.")
-        return value
+        return validate_book_author(value)
+
+# ✅ Author Serializer for the pre-aggregated author listing
+class AuthorSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for Author statistics.
+    """
+    class Meta:
+        model = Author
+        fields = ('id', 'name', 'initial', 'book_count', 'first_published', 'last_published')
+        read_only_fields = fields
+
+# ✅ Circulation Serializers (loans and holds are written by library.circulation)
+class LoanSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for Loan.
+    """
+    class Meta:
+        model = Loan
+        fields = ('id', 'book', 'copy', 'borrower', 'borrowed_at', 'due_at', 'returned_at')
+        read_only_fields = fields
+
+class HoldSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for Hold.
+    """
+    class Meta:
+        model = Hold
+        fields = ('id', 'book', 'patron', 'status', 'copy', 'placed_at', 'ready_at')
+        read_only_fields = fields
+
+def parse_book_fields(raw):
+    """
+    Parse a comma-separated ``fields`` parameter into Book field names.
+
+    Returns None when no restriction was requested.
+    """
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(fields) - set(BookSerializer().fields)
+    if unknown:
+        raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+    return fields
+
+# ✅ Fast read path: values() rows serialized without model instances
+def _representation_converter(field):
+    """
+    Return a callable turning a raw database value into ``field``'s
+    representation, or None when the value is already in output form.
+    """
+    if isinstance(field, serializers.DateField) and not isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is None:
+            return None
+        if output_format.lower() == ISO_8601:
+            return date.isoformat
+        return field.to_representation
+    if type(field) in (serializers.CharField, serializers.IntegerField):
+        return None
+    return field.to_representation
+
+
+class BookValuesSerializer:
+    """
+    Read-only serializer for Book rows fetched with ``values()``.
+
+    The output is identical to ``BookSerializer`` for the same fields, but no
+    model instances are created and the per-row conversion is compiled once
+    into a single dict literal instead of walking DRF fields for each row.
+    Rows always carry the primary key so that they can be paginated.
+    """
+
+    def __init__(self, fields=None):
+        serializer_fields = BookSerializer(fields=fields).fields
+        readable = [field for field in serializer_fields.values() if not field.write_only]
+        self.lookups = tuple(dict.fromkeys(
+            ['__'.join(field.source_attrs) for field in readable] + [Book._meta.pk.name]
+        ))
+        self.to_representation = self._compile(readable)
+
+    @staticmethod
+    def _compile(fields):
+        namespace, items = {}, []
+        for index, field in enumerate(fields):
+            key = repr('__'.join(field.source_attrs))
+            converter = _representation_converter(field)
+            if converter is None:
+                value = f'row[{key}]'
+            else:
+                namespace[f'convert_{index}'] = converter
+                value = f'(None if row[{key}] is None else convert_{index}(row[{key}]))'
+            items.append(f'{field.field_name!r}: {value}')
+        source = f"def to_representation(row):\n    return {{{', '.join(items)}}}\n"
+        exec(compile(source, f'<{__name__}.BookValuesSerializer>', 'exec'), namespace)
+        return namespace['to_representation']
+
+    def values(self, queryset):
+        """Restrict ``queryset`` to the columns this serializer reads."""
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def _book_values_serializer(fields):
+    return BookValuesSerializer(list(fields) if fields is not None else None)
+
+
+def get_book_values_serializer(fields=None):
+    """Return a shared ``BookValuesSerializer`` for ``fields`` (all fields if None)."""
+    return _book_values_serializer(tuple(fields) if fields is not None else None)
@@ -1,11 +1,147 @@
 # library/signals.py
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+import logging
+
+# The API stack (DRF, simplejwt) is imported lazily in the receivers that
+# need it, so that app loading stays light for management commands.
+from django.apps import apps
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
 from django.contrib.auth import get_user_model
+from .authors import add_books, changed_entries, remove_books
+from .autocomplete import get_autocomplete
+from .backends import invalidate_permissions
+from .cache import bump_catalogue_version
+from .metrics import install_sql_wrapper
+from .models import Book, BookTombstone, ChangeSequence
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+# Charge SQL time to the current request for the metrics middleware.
+connection_created.connect(install_sql_wrapper, dispatch_uid='library.metrics.install_sql_wrapper')
+
+# Sent with ``instances`` and ``created`` after bulk_create/bulk_update of
+# books, which do not fire post_save.
+books_bulk_saved = Signal()
 
 @receiver(post_save, sender=get_user_model())
 def user_saved(sender, instance, created, **kwargs):
     if created:
-        print(f"New user created: {instance.email}")
+        logger.info("New user created: %s", instance.email, extra={'user_id': instance.pk})
+    else:
+        logger.debug("User updated: %s", instance.email, extra={'user_id': instance.pk})
+    from .authentication import invalidate_cached_user
+    invalidate_cached_user(instance.pk)
+    invalidate_permissions([instance.pk])
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    from .authentication import invalidate_cached_user
+    invalidate_cached_user(instance.pk)
+    invalidate_permissions([instance.pk])
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Changed from the Group/Permission side: pk_set holds user ids,
+        # or is None when the relation was cleared.
+        invalidate_permissions(pk_set)
     else:
-        print(f"User updated: {instance.email}")
+        invalidate_permissions([instance.pk])
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+def group_permissions_changed(sender, action='post_', **kwargs):
+    if action.startswith('post_'):
+        invalidate_permissions()
+
+def token_blacklisted(sender, instance, **kwargs):
+    from .authentication import cache_blacklisted
+    cache_blacklisted(instance.token.jti)
+
+def token_unblacklisted(sender, instance, **kwargs):
+    from .authentication import invalidate_blacklisted
+    invalidate_blacklisted(instance.token.jti)
+
+# The blacklist app is left out of the lean CLI settings profile.
+if apps.is_installed('rest_framework_simplejwt.token_blacklist'):
+    BlacklistedToken = apps.get_model('token_blacklist', 'BlacklistedToken')
+    post_save.connect(token_blacklisted, sender=BlacklistedToken)
+    post_delete.connect(token_unblacklisted, sender=BlacklistedToken)
+
+def _update_authors(books, created):
+    if created:
+        add_books([(book.author, book.published_date) for book in books])
+        for book in books:
+            book._loaded_author_values = (book.author, book.published_date)
+    else:
+        removed, added = changed_entries(books)
+        remove_books(removed)
+        add_books(added)
+
+def _update_autocomplete(books, created):
+    removed, added = [], []
+    for book in books:
+        current = (book.title, book.author)
+        if not created:
+            previous = (
+                getattr(book, '_loaded_title', None),
+                getattr(book, '_loaded_author_values', (None,))[0],
+            )
+            if previous == current or None in previous:
+                continue
+            removed.append(previous)
+        added.append(current)
+        book._loaded_title = book.title
+    if added:
+        # Applied once the write commits, so a rolled-back save is never suggested.
+        transaction.on_commit(lambda: get_autocomplete().update(removed, added))
+
+@receiver(pre_save, sender=Book)
+def book_pre_save(sender, instance, **kwargs):
+    # Updates of books that were not loaded from the database still need the
+    # previous title and author to move the Author statistics and the
+    # autocomplete index.
+    if instance._state.adding:
+        return
+    if not hasattr(instance, '_loaded_author_values') or not hasattr(instance, '_loaded_title'):
+        previous = Book.objects.filter(pk=instance.pk).values_list('title', 'author', 'published_date').first()
+        if previous is not None:
+            instance._loaded_title, instance._loaded_author_values = previous[0], previous[1:]
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, **kwargs):
+    # After commit: bumped earlier, a concurrent reader could cache the
+    # not-yet-committed (old) rows under the new version.
+    transaction.on_commit(bump_catalogue_version)
+    get_search_backend().index_book(instance)
+    # Before _update_authors, which moves _loaded_author_values on.
+    _update_autocomplete([instance], created)
+    _update_authors([instance], created)
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    # Deletions through the API, the templates and the admin all end here,
+    # inside the delete's transaction.
+    BookTombstone.objects.create(book_id=instance.pk, change_seq=ChangeSequence.allocate())
+    transaction.on_commit(bump_catalogue_version)
+    get_search_backend().remove_book(instance.pk)
+    author_values = getattr(instance, '_loaded_author_values', (instance.author, instance.published_date))
+    remove_books([author_values])
+    removed = [(getattr(instance, '_loaded_title', instance.title), author_values[0])]
+    transaction.on_commit(lambda: get_autocomplete().update(removed=removed))
+
+@receiver(books_bulk_saved, sender=Book)
+def books_bulk_saved_handler(sender, instances, created, **kwargs):
+    transaction.on_commit(bump_catalogue_version)
+    get_search_backend().index_books(instances)
+    _update_autocomplete(instances, created)
+    _update_authors(instances, created)
@@ -1,9 +1,66 @@
-from django.test import TestCase
+import gzip
+import importlib
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timezone as datetime_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.contrib import admin
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Book
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import TokenError
+from .authentication import CachedRefreshToken
+from .authors import normalize_author_name, rebuild_authors
+from .autocomplete import Autocomplete, PrefixIndex, get_autocomplete
+from .backends import invalidate_permissions
+from . import circulation
+from .benchmarks import compare_results, iter_book_rows, seed_books, summarize
+from .cache import bump_catalogue_version, catalogue_cache_key, get_catalogue_version
+from .checks import check_catalogue_version_cache
+from .dbpool import ConnectionPool, PoolTimeout, PooledDatabaseWrapperMixin
+from .filters import book_facets
+from .importers import clean_chunk
+from .management.commands import bench
+from .management.commands.startup_profile import parse_importtime, profile_startup
+from .log import AsyncQueueHandler, SamplingFilter, configure_logging, stop_logging
+from .metrics import registry as metrics_registry
+from .middleware import ReplicaRoutingMiddleware
+from .models import Author, Book, BookTombstone, Hold, Loan
+from .pagination import BookCursorPagination, TitleKeysetPaginator
+from .passwords import PasswordHashingBusy, PasswordVerifier, get_verifier
+from .querycount import capture_queries, find_repeated_queries, fingerprint
+from .queryplan import full_table_scans
+from .ratelimit import LocalBucketStore, RateLimiter, client_ip, login_retry_after, reset_store
+from .routers import (
+    REPLICA_PIN_COOKIE, ReplicaRouter, RoutingState, current_routing, replica_reads, view_reads_from_replica,
+)
+from .search import InvertedIndexBackend, MySQLFullTextBackend, get_search_backend, search_books
+from .renderers import FastJSONRenderer
+from .serializers import BookSerializer, get_book_values_serializer
+from .tablestats import estimated_row_count
+from .views import BookListTemplateView, BookViewSet, StudentBookListView, book_search
 from rest_framework_simplejwt.tokens import RefreshToken
 
 class AdminUserTests(TestCase):
@@ -245,3 +302,2307 @@ class ErrorHandlingTests(TestCase):
         response = self.client.get(reverse('book-list'))
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+
+### 📖 **Student Book List Tests**
+class StudentBookListTests(TestCase):
+    """
+    Test cases for keyset pagination and sparse fields on the public book list.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.books = [
+            Book.objects.create(title=f'Book {i:03d}', author='Some Author', description='Text')
+            for i in range(25)
+        ]
+
+    def test_cursor_pagination(self):
+        """
+        Test walking the whole catalogue page by page.
+        """
+        url = reverse('student-books') + '?page_size=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 10)
+            seen.extend(book['id'] for book in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [book.id for book in self.books])
+
+    def test_max_page_size(self):
+        """
+        Test that page_size is capped.
+        """
+        response = self.client.get(reverse('student-books'), {'page_size': 100000})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertLessEqual(len(response.data['results']), BookCursorPagination.max_page_size)
+
+    def test_sparse_fields(self):
+        """
+        Test that ?fields= narrows the serialized output.
+        """
+        response = self.client.get(reverse('student-books'), {'fields': 'id,title'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_unknown_field(self):
+        """
+        Test that unknown field names are rejected.
+        """
+        response = self.client.get(reverse('student-books'), {'fields': 'title,isbn'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+
+
+### 📦 **Catalogue Export Tests**
+class BookExportTests(TestCase):
+    """
+    Test cases for the streaming export endpoint and management command.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        Book.objects.create(title='Dune', author='Frank Herbert', published_date='1965-08-01')
+        Book.objects.create(title='Emma', author='Jane Austen')
+
+    def test_export_ndjson(self):
+        """
+        Test exporting the catalogue as NDJSON.
+        """
+        response = self.client.get(reverse('book-export'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], ['Dune', 'Emma'])
+        self.assertEqual(rows[0]['published_date'], '1965-08-01')
+
+    def test_export_json_gzip(self):
+        """
+        Test exporting a gzip-compressed JSON array.
+        """
+        response = self.client.get(reverse('book-export'), {'output': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(rows), 2)
+
+    def test_export_matches_serializer(self):
+        """
+        Test that exported rows match BookSerializer output.
+        """
+        response = self.client.get(reverse('book-export'))
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        expected = BookSerializer(Book.objects.order_by('id'), many=True).data
+        self.assertEqual(rows, [dict(row) for row in expected])
+
+    def test_export_command(self):
+        """
+        Test the export_books management command.
+        """
+        out = StringIO()
+        call_command('export_books', '--format', 'json', '--chunk-size', '1', stdout=out)
+
+        self.assertEqual(len(json.loads(out.getvalue())), 2)
+
+
+
+### 🔎 **Search Tests**
+class BookSearchTests(TestCase):
+    """
+    Test cases for relevance-ranked search (in-memory index on SQLite).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        get_search_backend().reset()
+        self.dune = Book.objects.create(
+            title='Dune', author='Frank Herbert', description='Desert planet politics'
+        )
+        self.messiah = Book.objects.create(
+            title='Dune Messiah', author='Frank Herbert', description='Sequel to Dune'
+        )
+        self.emma = Book.objects.create(
+            title='Emma', author='Jane Austen', description='A novel about a desert of manners'
+        )
+
+    def test_relevance_ranking(self):
+        """
+        Test that title matches outrank description matches.
+        """
+        ranked = search_books('desert')
+
+        self.assertEqual([book.id for book in ranked], [self.dune.id, self.emma.id])
+        self.assertGreater(ranked[0].score, 0)
+
+    def test_searches_author(self):
+        """
+        Test that the author field is searched.
+        """
+        self.assertEqual([book.id for book in search_books('austen')], [self.emma.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        """
+        Test that the in-memory index is updated from Book signals.
+        """
+        search_books('dune')  # build the index
+        self.emma.title = 'Emma and the Dune'
+        self.emma.save()
+        self.dune.delete()
+
+        ids = {book.id for book in search_books('dune')}
+        self.assertEqual(ids, {self.messiah.id, self.emma.id})
+
+    def test_stale_index_catches_up_from_change_feed(self):
+        """
+        Test that a stale index applies only what changed since it was built.
+        """
+        backend = InvertedIndexBackend()
+        self.assertEqual(sorted(book_id for book_id, _ in backend.search('dune', 10)), [self.dune.id, self.messiah.id])
+
+        # Written by another process: this backend sees no signal.
+        self.emma.title = 'Dune Encyclopedia'
+        self.emma.save()
+        self.dune.delete()
+        backend._built_at -= 3600
+        with self.assertNumQueries(2):
+            ranked = [book_id for book_id, _ in backend.search('dune', 10)]
+        self.assertEqual(sorted(ranked), sorted([self.messiah.id, self.emma.id]))
+        with self.assertNumQueries(0):
+            backend.search('dune', 10)
+
+    def test_search_api(self):
+        """
+        Test the public search API.
+        """
+        response = self.client.get(reverse('api-book-search'), {'q': 'frank herbert', 'limit': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('score', response.data['results'][0])
+
+    def test_search_template(self):
+        """
+        Test the search page.
+        """
+        response = self.client.get(reverse('book-search'), {'q': 'messiah'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.context['books']), [self.messiah])
+
+
+
+### 🗂️ **Query Plan Tests**
+class QueryPlanTests(TestCase):
+    """
+    Run EXPLAIN on the hot Book queries and fail on full table scans.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        Book.objects.bulk_create([
+            Book(title=f'Title {i}', author=f'Author {i % 20}', published_date=date(1900 + i % 120, 1, 1))
+            for i in range(500)
+        ])
+
+    def assertIndexed(self, queryset):
+        scans = full_table_scans(queryset)
+        self.assertEqual(scans, [], f"Full table scan for: {queryset.query}")
+
+    def get_changelist_queryset(self, params=None):
+        request = RequestFactory().get('/django-admin/library/book/', params or {})
+        request.user = self.admin_user
+        changelist = admin.site._registry[Book].get_changelist_instance(request)
+        return changelist.queryset[:changelist.list_per_page]
+
+    def test_book_viewset_list(self):
+        """
+        Test the first page of BookViewSet.list.
+        """
+        self.assertIndexed(BookViewSet.queryset[:10])
+
+    def test_book_viewset_retrieve(self):
+        """
+        Test BookViewSet.retrieve.
+        """
+        self.assertIndexed(BookViewSet.queryset.filter(pk=1))
+
+    def test_book_list_template_view(self):
+        """
+        Test a page of BookListTemplateView.
+        """
+        view = BookListTemplateView()
+        view.setup(RequestFactory().get(reverse('book-list')))
+        self.assertIndexed(view.get_queryset()[:view.paginate_by])
+
+    def test_book_search_fulltext(self):
+        """
+        Test that the MySQL full-text search reads the FULLTEXT index.
+        """
+        backend = get_search_backend()
+        if not isinstance(backend, MySQLFullTextBackend):
+            self.skipTest("Full-text search runs in process memory on this database.")
+        queryset = backend.get_queryset('title')[:50]
+        self.assertIndexed(queryset)
+        self.assertIn('library_book_fulltext', queryset.explain(format='json'))
+
+    def test_book_search_results(self):
+        """
+        Test the primary-key lookup that loads search results.
+        """
+        self.assertIndexed(Book.objects.filter(pk__in=[1, 2, 3]))
+
+    def test_admin_changelist(self):
+        """
+        Test the admin changelist, unfiltered and filtered by published year.
+        """
+        self.assertIndexed(self.get_changelist_queryset())
+        self.assertIndexed(self.get_changelist_queryset({'year': '2000'}))
+
+    def test_books_by_author(self):
+        """
+        Test per-author lookups ordered by date.
+        """
+        self.assertIndexed(Book.objects.filter(author='Author 1').order_by('published_date'))
+
+    def test_admin_user_names(self):
+        """
+        Test that the name columns searched by prefix in the user admin are indexed.
+        """
+        users = get_user_model().objects
+        self.assertIndexed(users.filter(first_name='Ada'))
+        self.assertIndexed(users.filter(last_name='Lovelace'))
+
+
+
+### ⚡ **Catalogue Cache Tests**
+class CatalogueCacheTests(TestCase):
+    """
+    Test cases for the versioned read-through cache and ETag handling.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        self.book = Book.objects.create(title='Dune', author='Frank Herbert')
+
+    def test_version_bumped_on_save_and_delete(self):
+        """
+        Test that Book signals bump the catalogue version once the write commits.
+        """
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+            self.assertEqual(get_catalogue_version(), version)
+        self.assertNotEqual(get_catalogue_version(), version)
+
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.delete()
+            self.assertEqual(get_catalogue_version(), version)
+        self.assertNotEqual(get_catalogue_version(), version)
+
+    def test_version_kept_apart_from_pages(self):
+        """
+        Test that clearing the page cache keeps the version, and that sharing its store fails the checks.
+        """
+        version = get_catalogue_version()
+        cache.clear()
+        self.assertEqual(get_catalogue_version(), version)
+
+        self.assertEqual(check_catalogue_version_cache(None), [])
+        with override_settings(CATALOGUE_VERSION_CACHE='default'):
+            self.assertEqual([error.id for error in check_catalogue_version_cache(None)], ['library.E002'])
+        with override_settings(CATALOGUE_VERSION_CACHE='missing'):
+            self.assertEqual([error.id for error in check_catalogue_version_cache(None)], ['library.E001'])
+
+    def test_etag_and_body_share_one_version(self):
+        """
+        Test that the ETag and the cached body of a response use the same version read.
+        """
+        with mock.patch('library.cache.get_catalogue_version', return_value='elsewhere'):
+            response = self.client.get(reverse('student-books'))
+        version = response['ETag'].strip('"')[len('student-books-'):].split('-')[0]
+        self.assertEqual(version, get_catalogue_version())
+        self.assertEqual(cache.get(catalogue_cache_key('student-books', {'host': 'testserver'}, version)),
+                         response.data)
+
+    def test_student_list_served_from_cache(self):
+        """
+        Test that repeated reads do not query the database.
+        """
+        first = self.client.get(reverse('student-books'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('student-books'))
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_student_list_not_modified(self):
+        """
+        Test If-None-Match handling and invalidation on writes.
+        """
+        etag = self.client.get(reverse('student-books'))['ETag']
+
+        response = self.client.get(reverse('student-books'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Emma', author='Jane Austen')
+        response = self.client.get(reverse('student-books'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_template_list_served_from_cache(self):
+        """
+        Test that the book list template reuses cached pages until a write.
+        """
+        self.client.force_login(self.admin_user)
+        self.client.get(reverse('book-list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('book-list'))
+
+        self.assertFalse([q for q in queries if 'library_book' in q['sql']])
+        self.assertEqual(list(response.context['books']), [self.book])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Emma', author='Jane Austen')
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(len(response.context['books']), 2)
+
+
+
+### 📚 **Bulk Book API Tests**
+class BookBulkTests(TestCase):
+    """
+    Test cases for bulk create, update and delete on BookViewSet.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        token = RefreshToken.for_user(self.admin_user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('book-bulk')
+        self.books = Book.objects.bulk_create([
+            Book(title=f'Title {i}', author='Some Author') for i in range(3)
+        ])
+
+    def test_bulk_create(self):
+        """
+        Test creating many books in one request.
+        """
+        response = self.client.post(self.url, [
+            {'title': 'Dune', 'author': 'Frank Herbert'},
+            {'title': 'Emma', 'author': 'Jane Austen', 'published_date': '1815-12-23'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(Book.objects.count(), 5)
+
+    def test_bulk_create_reports_item_errors(self):
+        """
+        Test that an invalid item rejects the whole batch with its index.
+        """
+        response = self.client.post(self.url, [
+            {'title': 'Dune', 'author': 'Frank Herbert'},
+            {'title': 'X', 'author': 'Jane Austen'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_bulk_update(self):
+        """
+        Test partially updating many books in one request.
+        """
+        response = self.client.patch(self.url, [
+            {'id': book.id, 'author': 'New Author'} for book in self.books
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.filter(author='New Author').count(), 3)
+        self.assertEqual(Book.objects.get(pk=self.books[0].pk).title, 'Title 0')
+
+    def test_bulk_update_unknown_id(self):
+        """
+        Test that unknown ids are reported per item.
+        """
+        response = self.client.patch(self.url, [
+            {'id': self.books[0].id, 'author': 'New Author'},
+            {'id': 999999, 'author': 'New Author'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'errors': {'id': ['Not found.']}}])
+        self.assertFalse(Book.objects.filter(author='New Author').exists())
+
+    def test_bulk_delete(self):
+        """
+        Test deleting many books in one request.
+        """
+        ids = [book.id for book in self.books[:2]]
+        response = self.client.delete(self.url, {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_bulk_write_bumps_catalogue_version(self):
+        """
+        Test that bulk writes invalidate cached catalogue reads.
+        """
+        version = get_catalogue_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, [{'title': 'Dune', 'author': 'Frank Herbert'}], format='json')
+
+        self.assertNotEqual(get_catalogue_version(), version)
+
+
+
+### 📥 **Bulk Import Tests**
+def make_marc_record(fields):
+    """
+    Build a minimal ISO 2709 record from {tag: {code: value}}.
+    """
+    directory, data = b'', b''
+    for tag, subfields in fields.items():
+        field = b'  ' + b''.join(b'\x1f' + code.encode() + value.encode() for code, value in subfields.items()) + b'\x1e'
+        directory += tag.encode() + b'%04d%05d' % (len(field), len(data))
+        data += field
+    base_address = 24 + len(directory) + 1
+    length = base_address + len(data) + 1
+    leader = b'%05dnam a22%05d   4500' % (length, base_address)
+    return leader + directory + b'\x1e' + data + b'\x1d'
+
+
+class BookImportTests(TestCase):
+    """
+    Test cases for the import_books management command.
+    """
+
+    def setUp(self):
+        Book.objects.create(title='Dune', author='Frank Herbert')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'wb' if isinstance(content, bytes) else 'w') as handle:
+            handle.write(content)
+        return path
+
+    def test_import_csv(self):
+        """
+        Test importing CSV with duplicate and invalid rows.
+        """
+        path = self.write('books.csv', (
+            'title,author,description,published_date\n'
+            'Dune,Frank Herbert,,1965\n'
+            'Emma,Jane Austen,"A novel, in three volumes",1815-12-23\n'
+            'Emma,Jane Austen,,\n'
+            'X,Nobody,,\n'
+        ))
+        out, err = StringIO(), StringIO()
+        call_command('import_books', path, '--batch-size', '2', stdout=out, stderr=err)
+
+        self.assertEqual(Book.objects.count(), 2)
+        emma = Book.objects.get(title='Emma')
+        self.assertEqual(emma.published_date, date(1815, 12, 23))
+        self.assertEqual(emma.description, 'A novel, in three volumes')
+        self.assertIn('duplicates 2', out.getvalue())
+        self.assertIn('Title must be at least 3 characters long.', err.getvalue())
+
+    def test_import_jsonl(self):
+        """
+        Test importing JSON lines.
+        """
+        path = self.write('books.jsonl', '\n'.join(json.dumps(row) for row in [
+            {'title': 'Emma', 'author': 'Jane Austen', 'published_date': '1815'},
+            {'title': 'Persuasion', 'author': 'Jane Austen'},
+        ]))
+        call_command('import_books', path, stdout=StringIO())
+
+        self.assertEqual(Book.objects.filter(author='Jane Austen').count(), 2)
+        self.assertEqual(Book.objects.get(title='Emma').published_date, date(1815, 1, 1))
+
+    def test_import_marc(self):
+        """
+        Test importing MARC 21 records.
+        """
+        path = self.write('books.mrc', make_marc_record({
+            '001': {},
+            '100': {'a': 'Austen, Jane,'},
+            '245': {'a': 'Emma :', 'b': 'a novel /'},
+            '264': {'c': '1815.'},
+            '520': {'a': 'Matchmaking in Highbury.'},
+        }))
+        call_command('import_books', path, stdout=StringIO())
+
+        book = Book.objects.get(author='Austen, Jane')
+        self.assertEqual(book.title, 'Emma a novel')
+        self.assertEqual(book.published_date, date(1815, 1, 1))
+        self.assertEqual(book.description, 'Matchmaking in Highbury')
+
+    def test_duplicates_follow_database_comparison(self):
+        """
+        Test that duplicates are decided by the database's own title comparison.
+        """
+        # Case-insensitive under the MySQL collation, exact on SQLite.
+        same_title = Book.objects.filter(title='DUNE', author='Frank Herbert').exists()
+        path = self.write('books.csv', (
+            'title,author,description,published_date\n'
+            'DUNE,Frank Herbert,,\n'
+            'Emma,Jane Austen,,\n'
+            'Emma,Jane Austen,,\n'
+        ))
+        out = StringIO()
+        call_command('import_books', path, stdout=out)
+
+        self.assertEqual(Book.objects.filter(title='Emma').count(), 1)
+        self.assertEqual(
+            Book.objects.filter(author='Frank Herbert').count(), 1 if same_title else 2)
+        self.assertIn(f"duplicates {2 if same_title else 1}", out.getvalue())
+        self.assertEqual(len(set(Book.objects.values_list('change_seq', flat=True))), Book.objects.count())
+
+    def test_import_with_workers(self):
+        """
+        Test that parsing in worker processes imports the same rows, in order.
+        """
+        rows = [{'title': f'Volume {n}', 'author': 'Jane Austen'} for n in range(10)]
+        rows.insert(3, {'title': 'X', 'author': 'Nobody'})
+        path = self.write('books.jsonl', '\n'.join(json.dumps(row) for row in rows + rows[:2]))
+        out, err = StringIO(), StringIO()
+        call_command('import_books', path, '--workers', '2', '--batch-size', '3', stdout=out, stderr=err)
+
+        self.assertEqual(
+            list(Book.objects.filter(author='Jane Austen').order_by('change_seq').values_list('title', flat=True)),
+            [f'Volume {n}' for n in range(10)],
+        )
+        self.assertIn('read 13, imported 10, duplicates 2, invalid 1', out.getvalue())
+        self.assertIn('Row 4: ', err.getvalue())
+
+    def test_clean_chunk(self):
+        """
+        Test the worker-side validation entry point.
+        """
+        results = clean_chunk('jsonl', ['{"title": "Emma", "author": "Jane Austen"}', 'not json'])
+
+        self.assertEqual(results[0][0]['title'], 'Emma')
+        self.assertIsNone(results[1][0])
+        self.assertTrue(results[1][1])
+
+
+
+### 🔐 **Cached JWT Authentication Tests**
+class CachedAuthenticationTests(TestCase):
+    """
+    Test cases for cached user and token-blacklist lookups.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        self.refresh = RefreshToken.for_user(self.admin_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        self.url = reverse('book-bulk')
+
+    def test_user_lookup_cached(self):
+        """
+        Test that the user row is loaded once per TTL.
+        """
+        self.client.delete(self.url, {'ids': [1]}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(self.url, {'ids': [1]}, format='json')
+
+        self.assertFalse([q for q in queries if 'library_adminuser' in q['sql']])
+
+    def test_inactive_user_invalidated(self):
+        """
+        Test that saving the user invalidates the cached copy.
+        """
+        self.client.delete(self.url, {'ids': [1]}, format='json')
+        self.admin_user.is_active = False
+        self.admin_user.save()
+
+        response = self.client.delete(self.url, {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blacklist_lookup_cached(self):
+        """
+        Test that only blacklisted tokens are cached and rotated tokens are rejected.
+        """
+        refresh = str(self.refresh)
+        token = CachedRefreshToken(refresh)
+        with self.assertNumQueries(1):
+            self.assertIsNone(token.check_blacklist())
+        with self.assertNumQueries(1):
+            token.check_blacklist()
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            token.check_blacklist()
+
+    def test_blacklist_not_cached_when_absent(self):
+        """
+        Test that a token blacklisted behind the cache's back is still rejected.
+        """
+        refresh = str(self.refresh)
+        CachedRefreshToken(refresh).check_blacklist()
+        # As if blacklisted by another worker whose cache this one does not share.
+        with mock.patch('library.authentication.cache_blacklisted'):
+            CachedRefreshToken(refresh).blacklist()
+        with self.assertRaises(TokenError):
+            CachedRefreshToken(refresh).check_blacklist()
+
+
+
+### 🛡️ **Permission Cache Tests**
+class PermissionCacheTests(TestCase):
+    """
+    Test cases for the per-process AdminUser permission cache.
+    """
+
+    def setUp(self):
+        invalidate_permissions()
+        self.user = get_user_model().objects.create_user(
+            email='staff@example.com',
+            password='staffpassword123'
+        )
+        self.add_book = Permission.objects.get(codename='add_book')
+        self.change_book = Permission.objects.get(codename='change_book')
+        self.editors = Group.objects.create(name='Editors')
+        self.editors.permissions.add(self.change_book)
+
+    def fresh_user(self):
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_permission_checks_cached(self):
+        """
+        Test that permissions load in one query and are then served from memory.
+        """
+        self.user.user_permissions.add(self.add_book)
+        self.user.groups.add(self.editors)
+
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perm('library.add_book'))
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('library.add_book'))
+            self.assertTrue(user.has_perm('library.change_book'))
+            self.assertFalse(user.has_perm('library.delete_book'))
+            self.assertEqual(user.get_group_permissions(), {'library.change_book'})
+
+    def test_invalidated_by_user_m2m_changes(self):
+        """
+        Test that adding a group or permission to the user is seen immediately.
+        """
+        self.assertFalse(self.fresh_user().has_perm('library.change_book'))
+        self.user.groups.add(self.editors)
+        self.assertTrue(self.fresh_user().has_perm('library.change_book'))
+
+        self.user.user_permissions.add(self.add_book)
+        self.assertTrue(self.fresh_user().has_perm('library.add_book'))
+
+    def test_invalidated_by_group_changes(self):
+        """
+        Test that changing a group's permissions is seen immediately.
+        """
+        self.user.groups.add(self.editors)
+        self.assertFalse(self.fresh_user().has_perm('library.add_book'))
+
+        self.editors.permissions.add(self.add_book)
+        self.assertTrue(self.fresh_user().has_perm('library.add_book'))
+
+        self.editors.admin_users.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm('library.add_book'))
+
+    def test_revocation_during_load_not_cached(self):
+        """
+        Test that permissions loaded while a revocation lands are not cached.
+        """
+        from .backends import _load_user_permissions
+        self.user.user_permissions.add(self.add_book)
+
+        def load_then_revoke(user_id):
+            loaded = _load_user_permissions(user_id)
+            self.user.user_permissions.remove(self.add_book)
+            return loaded
+
+        with mock.patch('library.backends._load_user_permissions', side_effect=load_then_revoke):
+            self.assertTrue(self.fresh_user().has_perm('library.add_book'))
+        self.assertFalse(self.fresh_user().has_perm('library.add_book'))
+
+
+
+### 📈 **Request Metrics Tests**
+class RequestMetricsTests(TestCase):
+    """
+    Test cases for the request metrics middleware and /metrics endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        metrics_registry.reset()
+        self.client = APIClient()
+        Book.objects.create(title='Dune', author='Frank Herbert')
+
+    def test_server_timing_header(self):
+        """
+        Test that responses report app, db and template timings.
+        """
+        response = self.client.get(reverse('book-search'), {'q': 'dune'})
+        timing = response['Server-Timing']
+
+        self.assertIn('app;dur=', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertNotIn('tpl;dur=0.0', timing)
+
+    def test_metrics_endpoint(self):
+        """
+        Test per-route histograms in the Prometheus text format.
+        """
+        self.client.get(reverse('student-books'))
+        self.client.get(reverse('student-books'))
+        response = self.client.get(reverse('metrics'))
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('# TYPE library_request_duration_seconds histogram', body)
+        self.assertIn(
+            'library_requests_total{method="GET",route="api/student/books/",status="200"} 2', body
+        )
+        self.assertIn('library_request_db_queries_count{method="GET",route="api/student/books/"} 2', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """
+        Test that a configured token is required.
+        """
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+
+### 🧮 **Query Budget Tests**
+class QueryBudgetTests(TestCase):
+    """
+    Cap the number of queries per endpoint and fail on N+1 patterns.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        Book.objects.bulk_create([
+            Book(title=f'Title {i}', author=f'Author {i % 5}', description='Sample text')
+            for i in range(30)
+        ])
+        get_user_model().objects.bulk_create([
+            get_user_model()(email=f'user{i}@example.com') for i in range(10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        get_search_backend().reset()
+        self.client = APIClient()
+        self.book = Book.objects.first()
+
+    def assertQueryBudget(self, max_queries, url, **params):
+        """
+        GET ``url`` and check the query count and repeated fingerprints.
+        """
+        with capture_queries() as queries:
+            response = self.client.get(url, params)
+        self.assertLess(response.status_code, 400, url)
+        self.assertLessEqual(len(queries), max_queries, '\n'.join(queries))
+        self.assertEqual(queries.repeated(), [], f"N+1 queries on {url}")
+        return response
+
+    def test_api_endpoints(self):
+        """
+        Test query budgets for the REST API.
+        """
+        self.client.force_authenticate(self.admin_user)
+        self.assertQueryBudget(2, '/api/books/')
+        self.assertQueryBudget(1, f'/api/books/{self.book.id}/')
+        self.assertQueryBudget(1, reverse('student-books'))
+        self.assertQueryBudget(2, reverse('api-book-search'), q='title')
+
+    def test_template_views(self):
+        """
+        Test query budgets for the template views.
+        """
+        self.client.force_login(self.admin_user)
+        self.assertQueryBudget(4, reverse('book-list'))
+        self.assertQueryBudget(3, reverse('book-detail', args=[self.book.id]))
+        self.assertQueryBudget(4, reverse('book-search'), q='title')
+
+    def test_admin_changelists(self):
+        """
+        Test query budgets for the admin changelists.
+        """
+        self.client.force_login(self.admin_user)
+        # Cold: the year filter choices and the row estimate are read once...
+        self.assertQueryBudget(6, '/django-admin/library/book/')
+        # ...then served from the cache, leaving session, user, count and page.
+        self.assertQueryBudget(4, '/django-admin/library/book/')
+        self.assertQueryBudget(5, '/django-admin/library/adminuser/')
+
+    def test_fingerprint(self):
+        """
+        Test that literal values and IN-lists are normalized.
+        """
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'x' AND k IN (%s, %s)"),
+            fingerprint("SELECT * FROM t WHERE id = 7 AND name = 'yy' AND k IN (%s)"),
+        )
+        self.assertEqual(find_repeated_queries(['SELECT 1'] * 5), [('SELECT ?', 5)])
+
+
+### ⚡ **Async View Tests**
+class AsyncViewTests(TestCase):
+    """
+    Test cases for the async read endpoints under /api/async/.
+    """
+
+    def setUp(self):
+        cache.clear()
+        get_search_backend().reset()
+        self.client = AsyncClient()
+        self.books = [
+            Book.objects.create(title=f'Async Book {n}', author='Author Name', description='event loop')
+            for n in range(3)
+        ]
+
+    async def test_student_books_pagination(self):
+        """
+        Test keyset pagination and sparse fields.
+        """
+        response = await self.client.get(reverse('async-student-books'), {'page_size': 2, 'fields': 'id,title'})
+        data = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in data['results']], ['Async Book 0', 'Async Book 1'])
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+
+        response = await self.client.get(data['next'])
+        data = response.json()
+        self.assertEqual([book['title'] for book in data['results']], ['Async Book 2'])
+        self.assertIsNone(data['next'])
+
+    async def test_student_books_invalid_params(self):
+        """
+        Test that unknown fields and bad cursors are rejected.
+        """
+        response = await self.client.get(reverse('async-student-books'), {'fields': 'isbn'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.json())
+
+        response = await self.client.get(reverse('async-student-books'), {'after': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_book_search(self):
+        """
+        Test that async search matches the sync endpoint.
+        """
+        response = await self.client.get(reverse('async-book-search'), {'q': 'async book', 'limit': 2})
+        data = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIn('score', data['results'][0])
+
+    async def test_book_detail(self):
+        """
+        Test book detail and 404 for a missing book.
+        """
+        response = await self.client.get(reverse('async-book-detail', args=[self.books[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Async Book 0')
+
+        response = await self.client.get(reverse('async-book-detail', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_server_timing(self):
+        """
+        Test that the metrics middleware times async requests too.
+        """
+        response = await self.client.get(reverse('async-book-detail', args=[self.books[0].id]))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="1 queries"')
+
+    async def test_method_not_allowed(self):
+        """
+        Test that only GET is accepted.
+        """
+        response = await self.client.post(reverse('async-student-books'))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+### 🔌 **Connection Pool Tests**
+class FakeConnection:
+    """Minimal DB-API connection for pool tests."""
+
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    Test cases for the process-local connection pool.
+    """
+
+    def check(self, conn):
+        if not conn.healthy:
+            raise OSError("gone away")
+
+    def test_reuses_released_connections(self):
+        """
+        Test that a released connection is handed out again.
+        """
+        pool = ConnectionPool(FakeConnection, max_size=2, check=self.check)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(pool.size, 1)
+
+    def test_bounded_size(self):
+        """
+        Test that acquiring beyond the pool size times out.
+        """
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_health_check_and_discard(self):
+        """
+        Test that dead and discarded connections are closed and replaced.
+        """
+        pool = ConnectionPool(FakeConnection, max_size=2, check=self.check, check_after=0)
+        dead = pool.acquire()
+        pool.release(dead)
+        dead.healthy = False
+
+        conn = pool.acquire()
+        self.assertIsNot(conn, dead)
+        self.assertTrue(dead.closed)
+
+        pool.release(conn, discard=True)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.size, 0)
+
+    def test_health_check_only_after_idle(self):
+        """
+        Test that only long-idle connections are checked, outside the pool lock.
+        """
+        checked = []
+
+        def take_lock():
+            if pool._lock.acquire(timeout=1):
+                pool._lock.release()
+                checked.append('lock free')
+
+        def check(conn):
+            # Another thread can take the lock while the check runs.
+            locker = threading.Thread(target=take_lock)
+            locker.start()
+            locker.join()
+            checked.append(conn)
+
+        pool = ConnectionPool(FakeConnection, max_size=1, check=check, check_after=60)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(checked, [])
+
+        pool.release(conn)
+        pool._idle[-1] = (conn, time.monotonic() - 120)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(checked, ['lock free', conn])
+
+    def test_recycle(self):
+        """
+        Test that connections older than the recycle age are replaced.
+        """
+        pool = ConnectionPool(FakeConnection, max_size=1, recycle=0)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertTrue(conn.closed)
+
+    def test_database_wrapper(self):
+        """
+        Test that closing a pooled wrapper returns its connection to the pool.
+        """
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        class PooledSQLiteWrapper(PooledDatabaseWrapperMixin, DatabaseWrapper):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            settings_dict = {**connection.settings_dict, 'NAME': os.path.join(tmp, 'pool.sqlite3'),
+                             'POOL': {'MAX_SIZE': 1}}
+            wrapper = PooledSQLiteWrapper(settings_dict, alias='pool-test')
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            wrapper.close()
+            wrapper.ensure_connection()
+
+            self.assertIs(wrapper.connection, raw)
+            self.assertEqual(wrapper.pool.size, 1)
+            wrapper.close()
+            wrapper.pool.close_idle()
+
+
+### 🪞 **Replica Routing Tests**
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    """
+    Test cases for the read-replica router and its middleware.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.seen = []
+
+        def routed_view(request):
+            self.seen.append(self.router.db_for_read(Book))
+            return HttpResponse()
+        self.routed_view = routed_view
+
+    def dispatch(self, request, view):
+        middleware = ReplicaRoutingMiddleware(lambda request: (
+            middleware.process_view(request, view, (), {}) or view(request)
+        ))
+        return middleware(request)
+
+    def test_marked_get_reads_from_replica(self):
+        """
+        Test that only marked views and safe methods use a replica.
+        """
+        self.dispatch(self.factory.get('/'), self.routed_view)
+        self.dispatch(self.factory.get('/'), replica_reads(self.routed_view))
+        self.dispatch(self.factory.post('/'), self.routed_view)
+
+        self.assertEqual(self.seen, [None, 'replica_0', None])
+
+    def test_replica_only_for_catalogue(self):
+        """
+        Test that user and session reads stay on the primary.
+        """
+        state = RoutingState()
+        state.replica = 'replica_0'
+        token = current_routing.set(state)
+        try:
+            self.assertEqual(self.router.db_for_read(Book), 'replica_0')
+            self.assertIsNone(self.router.db_for_read(get_user_model()))
+        finally:
+            current_routing.reset(token)
+
+    def test_write_pins_client_to_primary(self):
+        """
+        Test read-your-writes: a write sets the pin cookie, which keeps reads on the primary.
+        """
+        def write_view(request):
+            self.router.db_for_write(Book)
+            self.seen.append(self.router.db_for_read(Book))
+            return HttpResponse()
+
+        response = self.dispatch(self.factory.post('/'), replica_reads(write_view))
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]['max-age'], 5)
+
+        request = self.factory.get('/')
+        request.COOKIES[REPLICA_PIN_COOKIE] = '1'
+        self.dispatch(request, replica_reads(self.routed_view))
+        self.assertEqual(self.seen, [None, None])
+
+    def test_recent_catalogue_change_reads_primary(self):
+        """
+        Test that reads stay on the primary right after a catalogue change.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Fresh Book', author='Author Name')
+        self.dispatch(self.factory.get('/'), replica_reads(self.routed_view))
+        self.assertEqual(self.seen, [None])
+
+    def test_views_are_marked(self):
+        """
+        Test that the public catalogue reads are replica-enabled and the API is not.
+        """
+        for view in (StudentBookListView.as_view(), BookListTemplateView.as_view(), book_search):
+            self.assertTrue(view_reads_from_replica(view))
+        self.assertFalse(view_reads_from_replica(BookViewSet.as_view({'get': 'list'})))
+
+    def test_allow_migrate(self):
+        """
+        Test that migrations never run on replicas.
+        """
+        self.assertFalse(self.router.allow_migrate('replica_0', 'library'))
+        self.assertIsNone(self.router.allow_migrate('default', 'library'))
+
+
+### ⏱️ **Benchmark Helper Tests**
+class BenchmarkHelperTests(TestCase):
+    """
+    Test cases for the benchmark fixtures and result comparison.
+    """
+
+    def test_seed_books(self):
+        """
+        Test that seeding inserts reproducible rows and invalidates the catalogue cache.
+        """
+        version = get_catalogue_version()
+
+        self.assertEqual(seed_books(120, batch_size=50), 120)
+        self.assertEqual(Book.objects.count(), 120)
+        self.assertEqual(
+            [row[:2] for row in iter_book_rows(3, seed=1)], [row[:2] for row in iter_book_rows(3, seed=1)]
+        )
+        self.assertNotEqual(get_catalogue_version(), version)
+
+    def test_summarize(self):
+        """
+        Test nearest-rank percentiles in milliseconds.
+        """
+        stats = summarize([n / 1000 for n in range(1, 101)])
+
+        self.assertEqual((stats['p50_ms'], stats['p95_ms'], stats['p99_ms']), (50.0, 95.0, 99.0))
+        self.assertEqual(stats['count'], 100)
+
+    def test_compare_results(self):
+        """
+        Test that slower p95 or lower throughput beyond the threshold is flagged.
+        """
+        baseline = {'a': {'p95_ms': 10.0, 'rps': 100.0}, 'b': {'p95_ms': 10.0, 'rps': 100.0}}
+        current = {'a': {'p95_ms': 10.5, 'rps': 98.0}, 'b': {'p95_ms': 13.0, 'rps': 100.0},
+                   'c': {'p95_ms': 1.0, 'rps': 1.0}}
+
+        rows, regressions = compare_results(baseline, current, 0.1)
+        self.assertEqual([row[0] for row in rows], ['a', 'b'])
+        self.assertEqual(regressions, ['b'])
+
+
+
+### ⏱️ **Benchmark Command Tests**
+class BenchCommandTests(TransactionTestCase):
+    """
+    Smoke test for the bench management command.
+    """
+
+    def test_all_scenarios(self):
+        """
+        Test that a small run of every scenario completes and reports each one.
+        """
+        out = StringIO()
+        call_command('bench', books=50, requests=4, warmup=1, json=True, stdout=out, stderr=StringIO())
+
+        results = json.loads(out.getvalue())['results']
+        self.assertEqual(list(results), list(bench.SCENARIOS))
+        self.assertEqual({stats['count'] for stats in results.values()}, {4})
+
+### 🚀 **Fast Serialization Tests**
+class FastSerializationTests(TestCase):
+    """
+    Test that the values()-based serializer and orjson renderer match DRF's output.
+    """
+
+    def setUp(self):
+        cache.clear()
+        Book.objects.create(title='Dune', author='Frank Herbert', description='Spice', published_date=date(1965, 8, 1))
+        Book.objects.create(title='Über Bücher', author='Zoë Ørsted', description='line\u2028separator "quoted"')
+        Book.objects.create(title='Emoji 📚', author='Anon Ymous')
+
+    def test_values_serializer_parity(self):
+        """
+        Test identical dicts and bytes for all fields and for sparse fields.
+        """
+        for fields in (None, ['title', 'published_date'], ['published_date', 'id']):
+            expected = BookSerializer(Book.objects.order_by('id'), many=True, fields=fields).data
+            serializer = get_book_values_serializer(fields)
+            actual = serializer.serialize(serializer.values(Book.objects.order_by('id')))
+
+            self.assertEqual(actual, [dict(item) for item in expected])
+            self.assertEqual([list(item) for item in actual], [list(item) for item in expected])
+            self.assertEqual(FastJSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_renderer_fallbacks(self):
+        """
+        Test indented output and types orjson formats differently, such as datetimes.
+        """
+        data = {'when': timezone.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime_timezone.utc),
+                1: Decimal('1.50'), 'text': '\u2029'}
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_endpoints_use_fast_path(self):
+        """
+        Test that list endpoints keep their response shape.
+        """
+        admin_user = get_user_model().objects.create_superuser(email='fast@example.com', password='fastpassword123')
+        client = APIClient()
+        client.force_authenticate(admin_user)
+
+        response = client.get('/api/books/')
+        self.assertEqual(response.json()['results'][0]['published_date'], '1965-08-01')
+        response = client.get(reverse('student-books'), {'fields': 'title'})
+        self.assertEqual(response.json()['results'][1], {'title': 'Über Bücher'})
+
+
+### 🧊 **Cold Start Tests**
+@mock.patch.dict(os.environ, {'DB_ENGINE': 'sqlite'})
+class ColdStartTests(TestCase):
+    """
+    Test that startup stays lean and within its time budget.
+    """
+    budget_ms = int(os.environ.get('STARTUP_BUDGET_MS', 3000))
+
+    def test_cli_profile(self):
+        """
+        Test that catalogue commands start without the API stack, within budget.
+        """
+        for command in ('export_books', 'import_books'):
+            report = profile_startup(None, command=command)
+
+            self.assertLess(report['wall_ms'], self.budget_ms)
+            for package in ('rest_framework', 'rest_framework_simplejwt', 'corsheaders'):
+                self.assertNotIn(package, report['loaded'], command)
+
+    def test_full_profile(self):
+        """
+        Test that app loading does not import the API views or admin modules.
+        """
+        report = profile_startup('library_management.settings')
+
+        self.assertLess(report['wall_ms'], self.budget_ms)
+        self.assertNotIn('pygments', report['loaded'])
+
+    def test_parse_importtime(self):
+        """
+        Test parsing of -X importtime lines.
+        """
+        rows = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        self.assertEqual(rows, [('json.decoder', 120, 120, 1), ('json', 300, 420, 0)])
+
+
+### 🪵 **Logging Pipeline Tests**
+class LoggingPipelineTests(TestCase):
+    """
+    Test cases for the queue-based JSON logging pipeline.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'app.log')
+        self.logger = logging.getLogger('library.test_log')
+
+    def tearDown(self):
+        stop_logging()
+        self.logger.handlers = []
+        self.tmp.cleanup()
+
+    def configure(self, **extra):
+        configure_logging({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'queue': True,
+            'formatters': {'json': {'()': 'library.log.JSONFormatter'}},
+            'handlers': {
+                'file': {
+                    'class': 'logging.handlers.RotatingFileHandler', 'filename': self.path,
+                    'maxBytes': 1024 * 1024, 'backupCount': 1, 'formatter': 'json',
+                },
+            },
+            'loggers': {'library.test_log': {'handlers': ['file'], 'level': 'INFO', 'propagate': False}},
+            **extra,
+        })
+
+    def test_json_records_through_queue(self):
+        """
+        Test that records go through the queue and are written as JSON lines.
+        """
+        self.configure()
+        self.assertIsInstance(self.logger.handlers[0], AsyncQueueHandler)
+
+        self.logger.info("Imported %d books", 3, extra={'batch': 7})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("Import failed")
+        self.logger.debug("Not logged")
+        stop_logging()
+
+        with open(self.path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['message'] for record in records], ["Imported 3 books", "Import failed"])
+        self.assertEqual(records[0]['batch'], 7)
+        self.assertEqual(records[0]['level'], 'INFO')
+        self.assertIn('ValueError: boom', records[1]['exc_info'])
+
+    def test_full_queue_drops_records(self):
+        """
+        Test that a full queue drops records instead of blocking.
+        """
+        handler = AsyncQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord('library.test_log', logging.INFO, __file__, 1, "message", (), None)
+        handler.handle(record)
+        handler.handle(record)
+
+        self.assertEqual(handler.dropped, 1)
+
+    def test_sampling_filter(self):
+        """
+        Test that sampling drops low-level records but keeps warnings.
+        """
+        sample = SamplingFilter(rate=0)
+        debug = logging.LogRecord('django.db.backends', logging.DEBUG, __file__, 1, "SELECT 1", (), None)
+        warning = logging.LogRecord('django.db.backends', logging.WARNING, __file__, 1, "slow", (), None)
+
+        self.assertFalse(sample.filter(debug))
+        self.assertTrue(sample.filter(warning))
+        self.assertTrue(SamplingFilter(rate=1).filter(debug))
+
+    def test_import_workers_with_queue_logging(self):
+        """
+        Test that ``import_books --workers`` finishes with queue-backed logging,
+        whose listeners must be replaced, not joined, in forked workers.
+        """
+        csv_path = os.path.join(self.tmp.name, 'books.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write("title,author,published_date\nEmma,Jane Austen,1815-12-23\nDune,Frank Herbert,1965-08-01\n")
+        env = {
+            **os.environ, 'DJANGO_SETTINGS_MODULE': 'library_management.settings', 'DB_ENGINE': 'sqlite',
+            'DB_SQLITE_PATH': os.path.join(self.tmp.name, 'db.sqlite3'), 'LOG_FILE': self.path, 'LOG_QUEUE': 'True',
+        }
+
+        def manage(*args):
+            return subprocess.run(
+                [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *args],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR, timeout=60,
+            )
+
+        self.assertEqual(manage('migrate', '-v0').returncode, 0)
+        try:
+            result = manage('import_books', csv_path, '--workers', '2', '--batch-size', '1')
+        except subprocess.TimeoutExpired:
+            self.fail("import_books --workers 2 did not finish.")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('imported 2', result.stdout)
+
+    def test_user_signal_logs(self):
+        """
+        Test that user creation is logged instead of printed.
+        """
+        with self.assertLogs('library.signals', 'INFO') as logs:
+            get_user_model().objects.create_user(email='logged@example.com', password='loggedpassword')
+        self.assertIn('New user created: logged@example.com', logs.output[0])
+
+
+### ✍️ **Author Statistics Tests**
+class AuthorStatisticsTests(TestCase):
+    """
+    Test cases for the pre-aggregated Author table and /api/authors/.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def stats(self, name):
+        author = Author.objects.get(key=normalize_author_name(name))
+        return author.book_count, author.first_published, author.last_published
+
+    def test_incremental_updates(self):
+        """
+        Test that saves and deletes keep counts and date ranges current.
+        """
+        first = Book.objects.create(title='Emma', author='Jane Austen', published_date=date(1815, 12, 23))
+        Book.objects.create(title='Persuasion', author='jane   AUSTEN', published_date=date(1817, 12, 20))
+        Book.objects.create(title='Lady Susan', author='Jane Austen')
+        self.assertEqual(self.stats('Jane Austen'), (3, date(1815, 12, 23), date(1817, 12, 20)))
+
+        first.delete()
+        self.assertEqual(self.stats('Jane Austen'), (2, date(1817, 12, 20), date(1817, 12, 20)))
+
+        book = Book.objects.get(title='Persuasion')
+        book.author = 'Anne Elliot'
+        book.save()
+        self.assertEqual(self.stats('Jane Austen'), (1, None, None))
+        self.assertEqual(self.stats('Anne Elliot'), (1, date(1817, 12, 20), date(1817, 12, 20)))
+
+        Book.objects.filter(title='Lady Susan').delete()
+        self.assertFalse(Author.objects.filter(key='jane austen').exists())
+
+    def test_bulk_writes_and_rebuild(self):
+        """
+        Test that bulk creates and updates are applied, and agree with a rebuild.
+        """
+        serializer = BookSerializer(data=[
+            {'title': f'Book {i}', 'author': 'Ada Fielding' if i % 2 else 'Dev Raman',
+             'published_date': f'200{i}-01-01'}
+            for i in range(6)
+        ], many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        books = serializer.save()
+        self.assertEqual(self.stats('Ada Fielding'), (3, date(2001, 1, 1), date(2005, 1, 1)))
+
+        found = Book.objects.in_bulk([books[1].pk, books[3].pk])
+        instances = [found[books[1].pk], found[books[3].pk]]
+        update = BookSerializer(instances, data=[{'author': 'Dev Raman'}, {'author': 'Dev Raman'}],
+                                many=True, partial=True)
+        self.assertTrue(update.is_valid(), update.errors)
+        update.save()
+        self.assertEqual(self.stats('Ada Fielding'), (1, date(2005, 1, 1), date(2005, 1, 1)))
+        self.assertEqual(self.stats('Dev Raman'), (5, date(2000, 1, 1), date(2004, 1, 1)))
+
+        incremental = sorted(Author.objects.values_list('key', 'book_count', 'first_published', 'last_published'))
+        self.assertEqual(rebuild_authors(), 2)
+        rebuilt = sorted(Author.objects.values_list('key', 'book_count', 'first_published', 'last_published'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_migration_backfill(self):
+        """
+        Test that the data migration builds the same rows as the signals.
+        """
+        Book.objects.create(title='Dune', author='Frank Herbert', published_date=date(1965, 8, 1))
+        Book.objects.create(title='Children of Dune', author='frank herbert', published_date=date(1976, 4, 1))
+        Book.objects.create(title='1984', author='George Orwell')
+        expected = sorted(Author.objects.values_list('key', 'book_count', 'first_published', 'last_published'))
+
+        Author.objects.all().delete()
+        migration = importlib.import_module('library.migrations.0006_author')
+        migration.backfill_authors(django_apps, mock.Mock(connection=connection))
+
+        backfilled = sorted(Author.objects.values_list('key', 'book_count', 'first_published', 'last_published'))
+        self.assertEqual(backfilled, expected)
+
+    def test_author_list(self):
+        """
+        Test listing, filtering, ordering and facets on /api/authors/.
+        """
+        for title, author in [('Emma', 'Jane Austen'), ('Persuasion', 'Jane Austen'),
+                              ('Dune', 'Frank Herbert'), ('Ulysses', 'James Joyce')]:
+            Book.objects.create(title=title, author=author)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('author-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['name'] for a in response.data['results']], ['Frank Herbert', 'James Joyce', 'Jane Austen'])
+        self.assertEqual(response.data['facets'], {'initial': {'F': 1, 'J': 2}})
+
+        response = self.client.get(reverse('author-list'), {'initial': 'j', 'ordering': '-book_count'})
+        self.assertEqual([a['name'] for a in response.data['results']], ['Jane Austen', 'James Joyce'])
+        self.assertEqual(response.data['results'][0]['book_count'], 2)
+
+        response = self.client.get(reverse('author-list'), {'prefix': 'JAMES', 'min_books': 1})
+        self.assertEqual([a['name'] for a in response.data['results']], ['James Joyce'])
+
+        response = self.client.get(reverse('author-list'), {'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+### 🧭 **Faceted Filtering Tests**
+class FacetedFilteringTests(TestCase):
+    """
+    Test cases for book list filters and facet counts.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for title, author, published in [
+            ('Emma', 'Jane Austen', date(1815, 12, 23)),
+            ('Persuasion', 'Jane Austen', date(1817, 12, 20)),
+            ('Dune', 'Frank Herbert', date(1965, 8, 1)),
+            ('Dune Messiah', 'Frank Herbert', date(1969, 10, 15)),
+            ('Ulysses', 'James Joyce', None),
+        ]:
+            Book.objects.create(title=title, author=author, published_date=published)
+
+    def titles(self, response):
+        return [book['title'] for book in response.data['results']]
+
+    def test_student_filters(self):
+        """
+        Test author, year range and title prefix filters on the public list.
+        """
+        url = reverse('student-books')
+        self.assertEqual(self.titles(self.client.get(url, {'author': 'jane  austen'})), ['Emma', 'Persuasion'])
+        self.assertEqual(self.titles(self.client.get(url, {'year_min': 1816, 'year_max': 1966})),
+                         ['Persuasion', 'Dune'])
+        self.assertEqual(self.titles(self.client.get(url, {'title_prefix': 'dune'})), ['Dune', 'Dune Messiah'])
+
+        response = self.client.get(url, {'year_min': 1900, 'year_max': 1800})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'year_min': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_student_facets(self):
+        """
+        Test facet counts for the whole catalogue and a filtered list.
+        """
+        url = reverse('student-books')
+        response = self.client.get(url, {'facets': 'year,decade,initial'})
+        self.assertEqual(response.data['facets'], {
+            'year': {'1815': 1, '1817': 1, '1965': 1, '1969': 1},
+            'decade': {'1810s': 2, '1960s': 2},
+            'initial': {'F': 2, 'J': 3},
+        })
+
+        response = self.client.get(url, {'facets': 'decade,initial', 'title_prefix': 'Dune'})
+        self.assertEqual(response.data['facets'], {'decade': {'1960s': 2}, 'initial': {'F': 2}})
+
+        response = self.client.get(url, {'facets': 'publisher'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets_cached_per_catalogue_version(self):
+        """
+        Test that facet counts are aggregated once per catalogue version.
+        """
+        self.assertEqual(book_facets({}, ['year']), book_facets({}, ['year']))
+        with self.assertNumQueries(0):
+            book_facets({}, ['year'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Middlemarch', author='George Eliot', published_date=date(1871, 12, 1))
+        with self.assertNumQueries(1):
+            self.assertEqual(book_facets({}, ['year'])['year']['1871'], 1)
+
+    def test_api_filters_and_facets(self):
+        """
+        Test filters and facets on the authenticated book list.
+        """
+        user = get_user_model().objects.create_superuser(email='facets@example.com', password='facetspassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = self.client.get('/api/books/', {'author': 'Frank Herbert', 'facets': 'year'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(self.titles(response), ['Dune', 'Dune Messiah'])
+        self.assertEqual(response.data['facets'], {'year': {'1965': 1, '1969': 1}})
+
+
+### 🔑 **Login Protection Tests**
+class LoginProtectionTests(TestCase):
+    """
+    Test cases for pooled password verification, hash upgrades and login rate limits.
+    """
+
+    def setUp(self):
+        reset_store()
+        self.addCleanup(reset_store)
+        self.client = APIClient()
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.user = get_user_model().objects.create_user(email='reader@example.com', password='readerpassword')
+
+    def test_token_bucket(self):
+        """
+        Test that a bucket allows a burst and then refills at its rate.
+        """
+        limiter = RateLimiter(2, 2, LocalBucketStore())
+        self.assertEqual(limiter.take('key', now=100.0), 0)
+        self.assertEqual(limiter.take('key', now=100.0), 0)
+        self.assertAlmostEqual(limiter.take('key', now=100.0), 1.0)
+        self.assertAlmostEqual(limiter.take('key', now=100.5), 0.5)
+        self.assertEqual(limiter.take('key', now=101.0), 0)
+        self.assertEqual(limiter.take('other', now=101.0), 0)
+
+    def test_local_store_is_bounded(self):
+        """
+        Test that the in-memory store evicts the least recently used buckets.
+        """
+        store = LocalBucketStore(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            store.take(key, 1, 1, 0.0)
+
+        self.assertEqual(list(store._buckets), ['b', 'c'])
+
+    @override_settings(LOGIN_RATE_LIMITS={'email': (2, 60)},
+                       LOGIN_RATE_LIMIT_STORE='library.ratelimit.CacheBucketStore')
+    def test_cache_store_limits_per_email(self):
+        """
+        Test per-email limits through the shared cache store.
+        """
+        cache.clear()
+        request = RequestFactory().post('/api/token/')
+
+        self.assertEqual(login_retry_after(request, 'reader@example.com'), 0)
+        self.assertEqual(login_retry_after(request, 'READER@example.com '), 0)
+        self.assertGreater(login_retry_after(request, 'reader@example.com'), 0)
+        self.assertEqual(login_retry_after(request, 'someone@example.com'), 0)
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (1, 60)})
+    def test_token_endpoint_throttled(self):
+        """
+        Test that the token endpoint answers 429 with Retry-After once the IP bucket is empty.
+        """
+        payload = {'email': 'reader@example.com', 'password': 'wrong-password'}
+        first = self.client.post(reverse('token_obtain_pair'), payload, format='json')
+        second = self.client.post(reverse('token_obtain_pair'), payload, format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(second.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', second)
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (1, 60)}, LIBRARY_TRUSTED_PROXY_COUNT=1)
+    def test_ip_limit_behind_proxy(self):
+        """
+        Test that behind a proxy each client has its own IP bucket, whatever it forwards itself.
+        """
+        def attempt(forwarded_for):
+            request = RequestFactory().post('/api/token/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for)
+            return login_retry_after(request, None)
+
+        self.assertEqual(attempt('203.0.113.5'), 0)
+        self.assertEqual(attempt('198.51.100.7'), 0)
+        self.assertGreater(attempt('203.0.113.5'), 0)
+        # A client cannot pick a fresh bucket by forging entries on the left.
+        self.assertGreater(attempt('192.0.2.99, 203.0.113.5'), 0)
+        self.assertEqual(client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+
+    @override_settings(LOGIN_RATE_LIMITS={'email': (1, 60)})
+    def test_admin_login_throttled(self):
+        """
+        Test that the template login form is rate-limited too.
+        """
+        payload = {'email': 'reader@example.com', 'password': 'wrong-password'}
+        self.assertEqual(self.client.post(reverse('admin-login'), payload).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('admin-login'), payload)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Too many login attempts', response.content.decode())
+
+    def test_hash_upgraded_on_login(self):
+        """
+        Test that a login rehashes the password when the configured cost changed.
+        """
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.client.post(reverse('token_obtain_pair'),
+                                        {'email': 'reader@example.com', 'password': 'readerpassword'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_verification_runs_on_worker_pool(self):
+        """
+        Test that hashing runs on the password workers and a full pool is refused.
+        """
+        self.assertTrue(get_verifier().run(lambda: threading.current_thread().name).startswith('password-hash'))
+
+        verifier = PasswordVerifier(workers=1, queue_size=0, timeout=0.05)
+        self.addCleanup(verifier.shutdown)
+        release = threading.Event()
+        blocker = threading.Thread(target=verifier.run, args=(release.wait,))
+        blocker.start()
+        try:
+            while verifier._slots._value:
+                time.sleep(0.001)
+            with self.assertRaises(PasswordHashingBusy):
+                verifier.run(lambda: None)
+        finally:
+            release.set()
+            blocker.join()
+
+    def test_busy_pool_answers_503(self):
+        """
+        Test that a saturated password pool is reported as 503, not as bad credentials.
+        """
+        with mock.patch('library.backends.verify_password', side_effect=PasswordHashingBusy):
+            response = self.client.post(reverse('token_obtain_pair'),
+                                        {'email': 'reader@example.com', 'password': 'readerpassword'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+### 📄 **Template Pagination Tests**
+class TemplatePaginationTests(TestCase):
+    """
+    Test cases for keyset pagination and row fragment caching of the book list template.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='librarian@example.com', password='librarianpassword')
+        self.client.force_login(self.user)
+        # Repeated titles make the id tie-breaker matter.
+        self.books = [
+            Book.objects.create(title=title, author='Jane Austen')
+            for title in ('Emma', 'Emma', 'Emma', 'Lady Susan', 'Persuasion')
+        ]
+
+    def test_keyset_walk(self):
+        """
+        Test that next and previous cursors visit every book once, in order.
+        """
+        paginator = TitleKeysetPaginator(Book.objects.all(), 2)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(after=pages[-1].next_cursor))
+
+        self.assertEqual([book for page in pages for book in page], self.books)
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(len(pages), 3)
+
+        back = paginator.page(before=pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertEqual(paginator.count, 5)
+
+    def test_cursor_navigation_in_template(self):
+        """
+        Test that the rendered page links to the next page and an invalid cursor is a 404.
+        """
+        with mock.patch.object(BookListTemplateView, 'paginate_by', 2):
+            first = self.client.get(reverse('book-list'))
+            second = self.client.get(reverse('book-list'), {'after': first.context['page_obj'].next_cursor})
+            invalid = self.client.get(reverse('book-list'), {'after': 'not-a-cursor'})
+
+        self.assertContains(first, '?after=')
+        self.assertEqual(list(second.context['books']), self.books[2:4])
+        self.assertContains(second, '?before=')
+        self.assertEqual(invalid.status_code, 404)
+
+    def test_row_fragments_cached(self):
+        """
+        Test that rows are rendered once and re-rendered when a book changes.
+        """
+        self.client.get(reverse('book-list'))
+        bump_catalogue_version()  # page is re-queried, rows come from their fragments
+        with mock.patch('library.templating.get_template') as get_template:
+            self.client.get(reverse('book-list'))
+        get_template.assert_not_called()
+
+        self.books[3].title = 'Sanditon'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[3].save()
+        response = self.client.get(reverse('book-list'))
+        self.assertContains(response, 'Sanditon')
+        self.assertNotContains(response, 'Lady Susan')
+
+
+### 🔄 **Change Feed Tests**
+class ChangeFeedTests(TestCase):
+    """
+    Test cases for Book change tracking and the /api/books/changes/ feed.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.emma = Book.objects.create(title='Emma', author='Jane Austen')
+        self.dune = Book.objects.create(title='Dune', author='Frank Herbert')
+
+    def get_feed(self, **params):
+        response = self.client.get(reverse('book-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_writes_stamp_sequence(self):
+        """
+        Test that saves and bulk writes take increasing, distinct sequence numbers.
+        """
+        first = self.emma.change_seq
+        self.emma.title = 'Emma.'
+        self.emma.save(update_fields=['title'])
+        books = Book.objects.bulk_create([Book(title=f'Title {i}', author='Someone') for i in range(3)])
+        Book.objects.bulk_update(books, ['author'])
+
+        self.emma.refresh_from_db()
+        seqs = list(Book.objects.order_by('change_seq').values_list('change_seq', flat=True))
+        self.assertGreater(self.emma.change_seq, first)
+        self.assertEqual(len(set(seqs)), 5)
+        self.assertGreater(min(book.change_seq for book in books), self.emma.change_seq)
+
+    def test_feed_since(self):
+        """
+        Test that the feed returns only later changes, once per book, with deletions.
+        """
+        since = self.get_feed()['next']
+        self.emma.description = 'A novel in three volumes.'
+        self.emma.save()
+        self.emma.save()
+        self.client.force_login(get_user_model().objects.create_user(email='librarian@example.com'))
+        self.client.post(reverse('book-delete', args=[self.dune.pk]))
+
+        data = self.get_feed(since=since)
+        self.assertEqual([(change['op'], change['id']) for change in data['results']],
+                         [('upsert', self.emma.pk), ('delete', self.dune.pk)])
+        self.assertEqual(data['results'][0]['book']['description'], 'A novel in three volumes.')
+        self.assertEqual(data['next'], data['results'][-1]['seq'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.get_feed(since=data['next'])['results'], [])
+
+    def test_feed_pages(self):
+        """
+        Test that following ``next`` in small pages visits every change in order.
+        """
+        Book.objects.bulk_create([Book(title=f'Title {i}', author='Someone') for i in range(3)])
+        self.emma.delete()
+        seqs, since, has_more = [], 0, True
+        while has_more:
+            data = self.get_feed(since=since, limit=2)
+            self.assertLessEqual(len(data['results']), 2)
+            seqs += [change['seq'] for change in data['results']]
+            since, has_more = data['next'], data['has_more']
+
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(len(seqs), 5)
+
+    def test_admin_and_api_deletes_leave_tombstones(self):
+        """
+        Test that admin and BookViewSet deletions are recorded.
+        """
+        admin_user = get_user_model().objects.create_superuser(email='admin@example.com', password='adminpass123')
+        self.client.force_login(admin_user)
+        self.client.post(reverse('admin:library_book_changelist'),
+                         {'action': 'delete_selected', '_selected_action': [self.emma.pk], 'post': 'yes'})
+        self.client.force_authenticate(admin_user)
+        self.client.delete(f'/api/books/{self.dune.pk}/')
+
+        self.assertEqual(set(BookTombstone.objects.values_list('book_id', flat=True)), {self.emma.pk, self.dune.pk})
+
+    def test_invalid_parameters(self):
+        """
+        Test that malformed ``since``/``limit`` values are rejected.
+        """
+        for params in ({'since': 'x'}, {'since': -1}, {'limit': 0}):
+            response = self.client.get(reverse('book-changes'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+### 🔤 **Autocomplete Tests**
+class AutocompleteTests(TestCase):
+    """
+    Test cases for the in-memory title/author autocomplete index.
+    """
+
+    def setUp(self):
+        get_autocomplete().reset()
+        self.addCleanup(get_autocomplete().reset)
+        self.client = APIClient()
+        self.emma = Book.objects.create(title='Emma', author='Jane Austen')
+        Book.objects.create(title='Persuasion', author='Jane  Austen')
+        Book.objects.create(title='Empire Falls', author='Richard Russo')
+
+    def suggest(self, q, **params):
+        response = self.client.get(reverse('book-autocomplete'), {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_prefix_suggestions(self):
+        """
+        Test word-prefix matching, normalization and ranking by number of books.
+        """
+        data = self.suggest('em')
+        self.assertEqual([s['text'] for s in data['titles']], ['Emma', 'Empire Falls'])
+
+        data = self.suggest('AUS')
+        self.assertEqual(data['authors'], [{'text': 'Jane Austen', 'count': 2}])
+
+        data = self.suggest('', limit=5)
+        self.assertEqual((data['titles'], data['authors']), ([], []))
+
+    def test_served_without_queries(self):
+        """
+        Test that a built index answers without touching the database.
+        """
+        self.suggest('e')
+        with self.assertNumQueries(0):
+            self.suggest('emp')
+
+    def test_follows_writes(self):
+        """
+        Test that saves and deletes update the index once committed.
+        """
+        self.suggest('e')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.emma.title = 'Sanditon'
+            self.emma.save()
+            Book.objects.filter(title='Empire Falls').delete()
+
+        self.assertEqual(self.suggest('em')['titles'], [])
+        self.assertEqual(self.suggest('sand')['titles'], [{'text': 'Sanditon', 'count': 1}])
+        self.assertEqual(self.suggest('russo')['authors'], [])
+
+    def test_cached_top_lists(self):
+        """
+        Test that cached top-k lists of large ranges stay correct across writes.
+        """
+        index = PrefixIndex(scan_limit=0, top_size=2)
+        index.build({})
+        index.update([], ['Alpha', 'Alpine', 'Alpine'])
+        self.assertEqual(index.top('al', 2), [('Alpine', 2), ('Alpha', 1)])
+        index.add('Alps')
+        index.add('Alps')
+        index.add('Alps')
+        self.assertEqual(index.top('al', 2), [('Alps', 3), ('Alpine', 2)])
+        index.remove('Alps')
+        index.remove('Alps')
+        self.assertEqual(index.top('al', 2), [('Alpine', 2), ('Alpha', 1)])
+
+    def test_bounded_entries(self):
+        """
+        Test that the index keeps at most ``max_entries`` entries, heaviest first.
+        """
+        index = PrefixIndex(max_entries=1)
+        index.build({'rare': [1, 'Rare'], 'common': [5, 'Common']})
+        index.add('Another')
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.dropped, 2)
+        self.assertEqual(index.top('c', 5), [('Common', 5)])
+
+
+class AutocompleteRebuildTests(TransactionTestCase):
+    """
+    Test cases for the background rebuild of a stale autocomplete index.
+    """
+
+    def test_stale_index_served_while_rebuilding(self):
+        """
+        Test that a stale index keeps answering and is swapped for a rebuilt one with later updates.
+        """
+        Book.objects.create(title='Emma', author='Jane Austen')
+        autocomplete = Autocomplete()
+        self.assertEqual(autocomplete.suggest('em', 5)['titles'], [{'text': 'Emma', 'count': 1}])
+
+        # Written behind the index's back, as by another process.
+        Book.objects.filter(title='Emma').update(title='Emmeline')
+        autocomplete._built_at -= 3600
+        with autocomplete._lock:  # hold off the swap
+            with self.assertNumQueries(0):
+                self.assertEqual(autocomplete.suggest('em', 5)['titles'], [{'text': 'Emma', 'count': 1}])
+            autocomplete.update(added=[('Empire Falls', 'Richard Russo')])
+        autocomplete._rebuild_thread.join()
+
+        self.assertEqual(
+            autocomplete.suggest('em', 5)['titles'],
+            [{'text': 'Emmeline', 'count': 1}, {'text': 'Empire Falls', 'count': 1}],
+        )
+        self.assertIsNone(autocomplete._pending)
+
+
+### 🗂️ **Large Table Admin Tests**
+class LargeTableAdminTests(TestCase):
+    """
+    Test cases for estimated counts, cached year choices and prefix search in the admin.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin_user = get_user_model().objects.create_superuser(email='admin@example.com', password='adminpass123')
+        self.client.force_login(self.admin_user)
+        Book.objects.create(title='Emma', author='Jane Austen', published_date=date(1815, 12, 23))
+        Book.objects.create(title='Persuasion', author='Jane Austen', published_date=date(1817, 12, 20))
+        Book.objects.create(title='Dune', author='Frank Herbert', published_date=date(1965, 8, 1))
+        self.url = reverse('admin:library_book_changelist')
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_estimated_count_above_threshold(self):
+        """
+        Test that unfiltered changelists use the statistics estimate and filtered ones count exactly.
+        """
+        with mock.patch('library.tablestats.estimated_row_count', return_value=1000000):
+            response = self.client.get(self.url)
+            self.assertEqual(response.context['cl'].result_count, 1000000)
+            self.assertIsNone(response.context['cl'].full_result_count)
+
+            response = self.client.get(self.url, {'q': 'jane'})
+            self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_exact_count_below_threshold(self):
+        """
+        Test that small tables, or tables without statistics, are counted exactly.
+        """
+        self.assertEqual(self.client.get(self.url).context['cl'].result_count, 3)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cache.clear()
+        self.assertEqual(estimated_row_count(Book), 3)
+
+    def test_year_filter_choices(self):
+        """
+        Test that the year filter offers years with books and filters on them.
+        """
+        response = self.client.get(self.url, {'year': '1815'})
+        choices = [choice['display'] for choice in response.context['cl'].filter_specs[0].choices(response.context['cl'])]
+
+        self.assertEqual(choices, ['All', '1965 (1)', '1817 (1)', '1815 (1)'])
+        self.assertEqual([book.title for book in response.context['cl'].result_list], ['Emma'])
+
+    def test_prefix_search(self):
+        """
+        Test that the whole search term is matched as a title or author prefix.
+        """
+        def titles(q):
+            return [book.title for book in self.client.get(self.url, {'q': q}).context['cl'].result_list]
+
+        self.assertEqual(titles('jane  aus'), ['Emma', 'Persuasion'])
+        self.assertEqual(titles('du'), ['Dune'])
+        self.assertEqual(titles('austen'), [])
+
+
+### 📚 **Circulation Tests**
+class CirculationTests(TestCase):
+    """
+    Test cases for checkouts, returns and holds through the API.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice, self.bob, self.carol = (
+            User.objects.create_user(email=f'{name}@example.com')
+            for name in ('alice', 'bob', 'carol')
+        )
+        self.book = Book.objects.create(title='Organic Chemistry', author='Clayden')
+        circulation.add_copies(self.book, 1)
+        self.client = APIClient()
+
+    def post(self, user, url):
+        self.client.force_authenticate(user=user)
+        return self.client.post(url)
+
+    def availability(self):
+        self.client.force_authenticate(user=self.alice)
+        response = self.client.get(f'/api/books/{self.book.pk}/availability/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {name: response.data[name] for name in ('copies', 'available', 'holds')}
+
+    def test_checkout_and_return(self):
+        """
+        Test that checkouts and returns keep the counters in step with the rows.
+        """
+        checkout = f'/api/books/{self.book.pk}/checkout/'
+        response = self.post(self.alice, checkout)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.availability(), {'copies': 1, 'available': 0, 'holds': 0})
+        self.assertEqual(self.post(self.bob, checkout).status_code, status.HTTP_409_CONFLICT)
+
+        returned = self.post(self.alice, f"/api/loans/{response.data['id']}/return/")
+        self.assertEqual(returned.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(returned.data['returned_at'])
+        self.assertEqual(self.post(self.alice, f"/api/loans/{response.data['id']}/return/").status_code,
+                         status.HTTP_409_CONFLICT)
+        self.assertEqual(self.availability(), {'copies': 1, 'available': 1, 'holds': 0})
+        self.assertEqual(circulation.recount_availability()[self.book.pk], self.availability())
+
+    def test_checkout_avoids_locking_when_unavailable(self):
+        """
+        Test that a refused checkout reads the counters and writes nothing.
+        """
+        circulation.checkout(self.book, self.alice)
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaises(circulation.CirculationError):
+                circulation.checkout(self.book, self.bob)
+        self.assertFalse([query['sql'] for query in queries if not query['sql'].startswith('SELECT')])
+
+    def test_holds_served_in_order(self):
+        """
+        Test that a returned copy is set aside for the oldest hold, then the next.
+        """
+        loan = circulation.checkout(self.book, self.alice)
+        hold_url = f'/api/books/{self.book.pk}/hold/'
+        self.assertEqual(self.post(self.bob, hold_url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post(self.carol, hold_url).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.post(self.carol, hold_url).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.availability(), {'copies': 1, 'available': 0, 'holds': 2})
+
+        circulation.return_loan(loan)
+        bob_hold = Hold.objects.get(patron=self.bob)
+        self.assertEqual((bob_hold.status, bob_hold.copy_id), (Hold.READY, loan.copy_id))
+        self.assertEqual(self.availability(), {'copies': 1, 'available': 0, 'holds': 1})
+        self.assertEqual(self.post(self.carol, f'/api/books/{self.book.pk}/checkout/').status_code,
+                         status.HTTP_409_CONFLICT)
+
+        # Bob lets it go: the copy passes to Carol.
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.delete(f'/api/holds/{bob_hold.pk}/').status_code, status.HTTP_204_NO_CONTENT)
+        response = self.post(self.carol, f'/api/books/{self.book.pk}/checkout/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['copy'], loan.copy_id)
+        self.assertEqual(Hold.objects.get(patron=self.carol).status, Hold.FULFILLED)
+        self.assertEqual(self.availability(), {'copies': 1, 'available': 0, 'holds': 0})
+
+    def test_hold_refused_while_available(self):
+        """
+        Test that holds are refused while a copy is on the shelf.
+        """
+        self.assertEqual(self.post(self.alice, f'/api/books/{self.book.pk}/hold/').status_code,
+                         status.HTTP_409_CONFLICT)
+
+    def test_loans_are_private(self):
+        """
+        Test that users list their own loans and staff list everyone's.
+        """
+        circulation.checkout(self.book, self.alice)
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.get('/api/loans/').data['count'], 0)
+        self.bob.is_staff = True
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.get('/api/loans/', {'open': 'true'}).data['count'], 1)
+
+    def test_staff_add_copies(self):
+        """
+        Test that only staff add copies, which serve waiting holds first.
+        """
+        circulation.checkout(self.book, self.alice)
+        circulation.place_hold(self.book, self.bob)
+        url = f'/api/books/{self.book.pk}/copies/'
+        self.client.force_authenticate(user=self.carol)
+        self.assertEqual(self.client.post(url, {'count': 2}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.carol.is_staff = True
+        self.client.force_authenticate(user=self.carol)
+        response = self.client.post(url, {'count': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['copies'], response.data['available'], response.data['holds']), (3, 1, 0))
+        self.assertEqual(Hold.objects.get(patron=self.bob).status, Hold.READY)
+
+    def test_actions_ignore_list_filters(self):
+        """
+        Test that list filters in the query string do not hide the book from its actions.
+        """
+        response = self.post(self.alice, f'/api/books/{self.book.pk}/checkout/?author=Nobody&title_prefix=zz')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_one_open_loan_per_borrower(self):
+        """
+        Test that the database refuses a second open loan of a title for one user.
+        """
+        if not connection.features.supports_partial_indexes:
+            self.skipTest("The database has no partial unique constraints.")
+        loan = circulation.checkout(self.book, self.alice)
+        copy = circulation.add_copies(self.book, 1)[0]
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Loan.objects.create(copy=copy, book=self.book, borrower=self.alice, due_at=loan.due_at)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Test cases for checkouts racing for the same title.
+    """
+
+    def test_no_oversell(self):
+        """
+        Test that concurrent checkouts lend each copy once and keep the counters exact.
+        """
+        book = Book.objects.create(title='Organic Chemistry', author='Clayden')
+        circulation.add_copies(book, 3)
+        users = [get_user_model().objects.create_user(email=f'student{n}@example.com') for n in range(12)]
+        outcomes = []
+
+        def attempt(user):
+            try:
+                while True:
+                    try:
+                        circulation.checkout(book, user)
+                        outcomes.append('loan')
+                        return
+                    except circulation.CirculationError:
+                        outcomes.append('refused')
+                        return
+                    except OperationalError:
+                        time.sleep(0.001)  # SQLite table lock; retry
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('loan'), 3)
+        self.assertEqual(outcomes.count('refused'), 9)
+        self.assertEqual(Loan.objects.values('copy').distinct().count(), 3)
+        self.assertEqual(circulation.get_availability(book.pk), {'book': book.pk, 'copies': 3, 'available': 0, 'holds': 0})
+
+    def test_one_loan_per_user(self):
+        """
+        Test that concurrent checkouts by one user lend them a single copy.
+        """
+        book = Book.objects.create(title='Organic Chemistry', author='Clayden')
+        circulation.add_copies(book, 4)
+        user = get_user_model().objects.create_user(email='student@example.com')
+        outcomes = []
+
+        def attempt():
+            try:
+                while True:
+                    try:
+                        circulation.checkout(book, user)
+                        outcomes.append('loan')
+                        return
+                    except circulation.CirculationError:
+                        outcomes.append('refused')
+                        return
+                    except OperationalError:
+                        time.sleep(0.001)  # SQLite table lock; retry
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['loan', 'refused', 'refused', 'refused'])
+        self.assertEqual(Loan.objects.filter(borrower=user).count(), 1)
+        self.assertEqual(circulation.get_availability(book.pk), {'book': book.pk, 'copies': 4, 'available': 3, 'holds': 0})
+
@@ -1,13 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views
 from .views import (
     # Template views
     home, dashboard, admin_signup, admin_login, admin_logout,
-    account_profile, account_update, book_search,
+    account_profile, account_update, book_search, metrics,
     BookListTemplateView, BookDetailTemplateView, BookCreateTemplateView,
     BookUpdateTemplateView, BookDeleteTemplateView,
     # API views
-    BookViewSet, StudentBookListView
+    AuthorListView, BookAutocompleteView, BookChangesView, BookViewSet, HoldViewSet, LoanViewSet,
+    LoginTokenObtainPairView, StudentBookListView, BookSearchView, book_export,
 )
 
 # -----------------------------------------------------------------------------
@@ -15,10 +18,29 @@ from .views import (
 # -----------------------------------------------------------------------------
 router = DefaultRouter()
 router.register(r'books', BookViewSet, basename='book')
+router.register(r'loans', LoanViewSet, basename='loan')
+router.register(r'holds', HoldViewSet, basename='hold')
 
 api_patterns = [
+    # JWT token endpoints
+    path('token/', LoginTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # Public API for students to list books
     path('student/books/', StudentBookListView.as_view(), name='student-books'),
+    # Public author listing with per-author book counts
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    # Streaming full-catalogue export (NDJSON or JSON array)
+    path('books/export/', book_export, name='book-export'),
+    # Incremental change feed for catalogue mirrors
+    path('books/changes/', BookChangesView.as_view(), name='book-changes'),
+    # Public relevance-ranked search
+    path('books/search/', BookSearchView.as_view(), name='api-book-search'),
+    # Public title/author suggestions from an in-memory prefix index
+    path('books/autocomplete/', BookAutocompleteView.as_view(), name='book-autocomplete'),
+    # Async (ASGI) variants of the read-heavy endpoints
+    path('async/student/books/', async_views.student_books, name='async-student-books'),
+    path('async/books/search/', async_views.book_search, name='async-book-search'),
+    path('async/books/<int:pk>/', async_views.book_detail, name='async-book-detail'),
     # API endpoints for Book CRUD operations
     path('', include(router.urls)),
 ]
@@ -43,6 +65,8 @@ template_patterns = [
     path('books/delete/<int:pk>/', BookDeleteTemplateView.as_view(), name='book-delete'),
     # Book search view
     path('books/search/', book_search, name='book-search'),
+    # Prometheus metrics
+    path('metrics', metrics, name='metrics'),
 ]
 
 urlpatterns = [
@@ -0,0 +1,23 @@
+"""
+Book field rules shared by ``BookSerializer`` and the importers.
+
+They raise Django's ``ValidationError``, which DRF reports like its own, so
+catalogue commands can validate rows without loading DRF.
+"""
+from django.core.exceptions import ValidationError
+
+MIN_NAME_LENGTH = 3
+
+
+def validate_book_title(value):
+    """Ensure the book title is not empty or too short."""
+    if len(value) < MIN_NAME_LENGTH:
+        raise ValidationError(f"Title must be at least {MIN_NAME_LENGTH} characters long.")
+    return value
+
+
+def validate_book_author(value):
+    """Ensure the author's name is valid."""
+    if len(value) < MIN_NAME_LENGTH:
+        raise ValidationError(f"Author name must be at least {MIN_NAME_LENGTH} characters long.")
+    return value
@@ -1,14 +1,44 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
+from django.utils.http import parse_etags
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.db.models import Count
+from django.views.decorators.http import require_GET
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from .models import Book, AdminUser
-from .serializers import BookSerializer, AdminUserSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
+from . import circulation
+from .authentication import CachedJWTAuthentication, LoginRateThrottle
+from .authors import author_initial, normalize_author_name
+from .autocomplete import get_autocomplete
+from .cache import cached_catalogue_read, catalogue_etag, get_catalogue_version
+from .changes import book_changes
+from .export import EXPORT_FORMATS, export_books
+from .filters import BookFilterBackend, book_facets, filter_books, parse_book_filters, parse_facets
+from .metrics import registry
+from .models import Author, Book, AdminUser, Hold, Loan
+from .pagination import AuthorCursorPagination, BookCursorPagination, TitleKeysetPaginator
+from .passwords import PasswordHashingBusy
+from .ratelimit import login_retry_after
+from .routers import replica_reads
+from .search import search_books
+from .serializers import (
+    AdminUserSerializer, AuthorSerializer, BookSerializer, HoldSerializer, LoanSerializer, get_book_values_serializer,
+    parse_book_fields,
+)
+from .templating import render_cached_fragments
 
 # -----------------------------------------------------------------------------
 # Template Views for Accounts and Books
@@ -38,7 +68,19 @@ def admin_login(request):
     if request.method == "POST":
         email = request.POST.get('email')
         password = request.POST.get('password')
-        user = authenticate(request, email=email, password=password)
+        retry_after = login_retry_after(request, email)
+        if retry_after:
+            response = render(request, 'library/login.html', {'error': 'Too many login attempts, try again later.'},
+                              status=429)
+            response['Retry-After'] = str(math.ceil(retry_after))
+            return response
+        try:
+            user = authenticate(request, email=email, password=password)
+        except PasswordHashingBusy:
+            response = render(request, 'library/login.html', {'error': 'Login is busy, try again shortly.'},
+                              status=503)
+            response['Retry-After'] = '1'
+            return response
         if user:
             login(request, user)
             return redirect('dashboard')
@@ -51,6 +93,18 @@ def admin_logout(request):
     logout(request)
     return redirect('home')
 
+def metrics(request):
+    """
+    Expose per-route request metrics in the Prometheus text format.
+
+    When ``settings.METRICS_TOKEN`` is set, scrapers must send it as a
+    bearer token.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --- Account Views ---
 def account_profile(request):
     """
@@ -76,12 +130,41 @@ def account_update(request):
     return render(request, 'library/profile_update.html', {'user': user})
 
 # --- Book CRUD Template Views ---
+def book_row_key(book):
+    """Fragment cache key of a book's list row: its id and a digest of the shown fields."""
+    digest = hashlib.md5(f'{book.title}\0{book.author}\0{book.published_date}'.encode()).hexdigest()
+    return f'book-row:{book.pk}:{digest}'
+
 class BookListTemplateView(LoginRequiredMixin, ListView):
-    """Display the list of books in the admin panel."""
-    model = Book
+    """
+    Display the list of books in the admin panel, one page at a time.
+
+    Pages are keyset-paginated over (title, id) with ``?after=``/``?before=``
+    cursors, so a deep page costs as much as the first, and rows are
+    rendered from fragments cached per book and content.
+    """
+    queryset = Book.objects.only('id', 'title', 'author', 'published_date')
+    ordering = ['title', 'id']
+    paginate_by = 50
+    paginator_class = TitleKeysetPaginator
     template_name = 'library/book_list.html'
+    row_template_name = 'library/book_row.html'
     context_object_name = 'books'
     login_url = '/admin/login/'
+    replica_reads = True
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.paginator_class(queryset, page_size)
+        try:
+            page = paginator.page(after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        except InvalidPage as exc:
+            raise Http404(str(exc))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['rows'] = render_cached_fragments(self.row_template_name, context['books'], book_row_key, name='book')
+        return context
 
 class BookDetailTemplateView(LoginRequiredMixin, DetailView):
     """Display details of a specific book."""
@@ -114,28 +197,434 @@ class BookDeleteTemplateView(LoginRequiredMixin, DeleteView):
     login_url = '/admin/login/'
 
 # --- Book Search View (Extra Functionality) ---
+@replica_reads
 def book_search(request):
     """
-    Render a page to search for books.
+    Render a page to search for books, ranked by relevance.
     """
     query = request.GET.get('q', '')
-    books = Book.objects.filter(title__icontains=query) if query else []
+    books = search_books(query) if query else []
     return render(request, 'library/book_search.html', {'books': books, 'query': query})
 
 # -----------------------------------------------------------------------------
 # API Views
 # -----------------------------------------------------------------------------
-class BookViewSet(viewsets.ModelViewSet):
-    """API endpoint for CRUD operations on Book."""
-    queryset = Book.objects.all()
+class LoginTokenObtainPairView(TokenObtainPairView):
+    """
+    JWT login, rate-limited per client IP and email, answering 503 when the
+    password workers are saturated (see ``library.passwords``).
+    """
+    throttle_classes = [LoginRateThrottle]
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PasswordHashingBusy):
+            return Response({'detail': "Login is busy, try again shortly."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+        return super().handle_exception(exc)
+
+class CirculationConflictMixin:
+    """
+    Answer ``library.circulation.CirculationError`` (no copy available, already
+    returned, ...) with 409 Conflict and its message.
+    """
+
+    def handle_exception(self, exc):
+        if isinstance(exc, circulation.CirculationError):
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return super().handle_exception(exc)
+
+class BookViewSet(CirculationConflictMixin, viewsets.ModelViewSet):
+    """
+    API endpoint for CRUD operations on Book.
+
+    The list accepts the filters of ``library.filters`` (``?author=``,
+    ``?year_min=``, ``?year_max=``, ``?title_prefix=``) and returns facet
+    counts for the filtered books with ``?facets=year,decade,initial``.
+
+    ``/api/books/bulk/`` accepts lists: POST creates, PATCH partially updates
+    (each item carries its ``id``) and DELETE removes ``{"ids": [...]}``. Each
+    bulk request is validated up front and written in a single transaction;
+    if any item is invalid nothing is written and the errors are reported
+    per item index.
+
+    Circulation: GET ``/api/books/{id}/availability/`` reads the counters,
+    POST ``checkout/`` lends the user a copy and POST ``hold/`` queues them
+    when none is on the shelf (409 when the request cannot be met), and
+    staff add copies with POST ``copies/`` ``{"count": n}``.
+    """
+    queryset = Book.objects.order_by('id')
     serializer_class = BookSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [BookFilterBackend]
+    bulk_max_items = 10000
+
+    def filter_queryset(self, queryset):
+        # The list filters never hide a book addressed by its id.
+        if self.detail:
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        """List books from ``values()`` rows, without building model instances."""
+        facets = parse_facets(request.query_params.get('facets'))
+        serializer = get_book_values_serializer()
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            response = self.get_paginated_response(serializer.serialize(page))
+        else:
+            response = Response(serializer.serialize(rows))
+        if facets:
+            response.data = {
+                **(response.data if page is not None else {'results': response.data}),
+                'facets': book_facets(parse_book_filters(request.query_params), facets),
+            }
+        return response
+
+    def get_bulk_items(self, items):
+        """Ensure the bulk payload is a non-empty, bounded list."""
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ["Expected a non-empty list of items."]})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [f"At most {self.bulk_max_items} items per request."]})
+        return items
+
+    def bulk_error_response(self, errors):
+        items = [{'index': index, 'errors': error} for index, error in enumerate(errors) if error]
+        return Response({'errors': items}, status=status.HTTP_400_BAD_REQUEST)
+
+    def get_bulk_instances(self, ids):
+        """
+        Return ``(books, errors)`` for a list of ids, with books aligned to ``ids``.
+        """
+        found = Book.objects.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        books, errors, seen = [], [], set()
+        for pk in ids:
+            if not isinstance(pk, int):
+                errors.append({'id': ["A valid integer is required."]})
+            elif pk in seen:
+                errors.append({'id': ["Duplicate id."]})
+            elif pk not in found:
+                errors.append({'id': ["Not found."]})
+            else:
+                errors.append({})
+            seen.add(pk)
+            books.append(found.get(pk))
+        return books, errors
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Create many books with bulk_create."""
+        serializer = self.get_serializer(data=self.get_bulk_items(request.data), many=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer.errors)
+        with transaction.atomic():
+            books = serializer.save()
+        return Response(
+            {'created': len(books), 'results': self.get_serializer(books, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Partially update many books with bulk_update."""
+        items = self.get_bulk_items(request.data)
+        books, errors = self.get_bulk_instances([
+            item.get('id') if isinstance(item, dict) else None for item in items
+        ])
+        serializer = self.get_serializer(books, data=items, many=True, partial=True)
+        if not serializer.is_valid() or any(errors):
+            item_errors = serializer.errors or [{} for _ in items]
+            return self.bulk_error_response([
+                {**id_error, **item_error} for id_error, item_error in zip(errors, item_errors)
+            ])
+        with transaction.atomic():
+            serializer.save()
+        return Response(
+            {'updated': len(books), 'results': self.get_serializer(books, many=True).data},
+            status=status.HTTP_200_OK,
+        )
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete many books by id."""
+        ids = self.get_bulk_items(request.data.get('ids') if isinstance(request.data, dict) else None)
+        books, errors = self.get_bulk_instances(ids)
+        if any(errors):
+            return self.bulk_error_response(errors)
+        with transaction.atomic():
+            _, deleted = Book.objects.filter(pk__in=ids).delete()
+        return Response({'deleted': deleted.get(Book._meta.label, 0)}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """Return the book's copy, shelf and hold counters."""
+        return Response(circulation.get_availability(self.get_object().pk), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        """Lend the user a copy of the book."""
+        loan = circulation.checkout(self.get_object(), request.user)
+        return Response(LoanSerializer(loan).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def hold(self, request, pk=None):
+        """Queue the user for the book's next returned copy."""
+        hold = circulation.place_hold(self.get_object(), request.user)
+        return Response(HoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def copies(self, request, pk=None):
+        """Add ``count`` copies of the book."""
+        count = request.data.get('count', 1)
+        if not isinstance(count, int) or not 1 <= count <= 1000:
+            raise ValidationError({'count': "Expected an integer between 1 and 1000."})
+        book = self.get_object()
+        circulation.add_copies(book, count)
+        return Response(circulation.get_availability(book.pk), status=status.HTTP_201_CREATED)
+
+class LoanViewSet(CirculationConflictMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The user's loans (everyone's for staff), newest first; ``?open=true``
+    lists those not yet returned. POST ``/api/loans/{id}/return/`` returns
+    the copy.
+    """
+    serializer_class = LoanSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        loans = Loan.objects.order_by('-borrowed_at', '-id')
+        if not self.request.user.is_staff:
+            loans = loans.filter(borrower=self.request.user)
+        if self.request.query_params.get('open') == 'true':
+            loans = loans.filter(returned_at__isnull=True)
+        return loans
+
+    @action(detail=True, methods=['post'], url_path='return')
+    def return_copy(self, request, pk=None):
+        """Return the loaned copy."""
+        loan = self.get_object()
+        circulation.return_loan(loan)
+        return Response(self.get_serializer(loan).data, status=status.HTTP_200_OK)
+
+class HoldViewSet(CirculationConflictMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                  mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    The user's holds (everyone's for staff), newest first; ``?active=true``
+    lists those waiting or ready. DELETE cancels a hold.
+    """
+    serializer_class = HoldSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-class StudentBookListView(APIView):
-    """Public API endpoint for students to view the list of books."""
+    def get_queryset(self):
+        holds = Hold.objects.order_by('-placed_at', '-id')
+        if not self.request.user.is_staff:
+            holds = holds.filter(patron=self.request.user)
+        if self.request.query_params.get('active') == 'true':
+            holds = holds.filter(status__in=[Hold.WAITING, Hold.READY])
+        return holds
+
+    def perform_destroy(self, instance):
+        circulation.cancel_hold(instance)
+
+class CatalogueCachedListView(APIView):
+    """
+    Base for public catalogue listings whose pages are cached per catalogue
+    version and carry an ETag, so unchanged pages are answered with 304 or
+    from the cache without touching the database. Subclasses set
+    ``cache_namespace`` and implement ``get_page_data(request)``.
+    """
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    cache_namespace = None
+
+    def get_page_data(self, request):
+        raise NotImplementedError
+
     def get(self, request):
-        books = Book.objects.all()
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Pagination links are absolute, so the host is part of the cache key.
+        params = {**request.query_params.dict(), 'host': request.get_host()}
+        version = get_catalogue_version()
+        etag = catalogue_etag(self.cache_namespace, params, version)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        data = cached_catalogue_read(
+            self.cache_namespace, params, lambda: self.get_page_data(request), version=version,
+        )
+        return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+class StudentBookListView(CatalogueCachedListView):
+    """
+    Public API endpoint for students to view the list of books.
+
+    Results are keyset-paginated over ``id`` (``?cursor=``, ``?page_size=``)
+    and can be narrowed with ``?fields=id,title`` which limits both the
+    selected columns and the serialized output. The filters and facets of
+    ``library.filters`` are supported as on ``/api/books/``.
+    """
+    pagination_class = BookCursorPagination
+    cache_namespace = 'student-books'
+
+    def get_page_data(self, request):
+        serializer = get_book_values_serializer(parse_book_fields(request.query_params.get('fields')))
+        filters = parse_book_filters(request.query_params)
+        facets = parse_facets(request.query_params.get('facets'))
+        paginator = self.pagination_class()
+        queryset = filter_books(Book.objects.all(), filters)
+        page = paginator.paginate_queryset(serializer.values(queryset), request, view=self)
+        data = paginator.get_paginated_response(serializer.serialize(page)).data
+        if facets:
+            data['facets'] = book_facets(filters, facets)
+        return data
+
+class AuthorListView(CatalogueCachedListView):
+    """
+    Public API endpoint listing authors from the pre-aggregated Author table.
+
+    ``?initial=A`` narrows to one initial, ``?prefix=`` to names starting with
+    it and ``?min_books=`` to prolific authors; ``?ordering=`` is ``name``
+    (default) or ``-book_count``. Pages are
+    keyset-paginated and include ``facets.initial``, the number of authors
+    per initial.
+    """
+    pagination_class = AuthorCursorPagination
+    cache_namespace = 'authors'
+    orderings = {
+        'name': ('key',),
+        '-book_count': ('-book_count', 'key'),
+    }
+
+    def get_queryset(self, params):
+        queryset = Author.objects.all()
+        initial = params.get('initial')
+        if initial:
+            if len(initial) != 1:
+                raise ValidationError({'initial': "Expected a single character."})
+            queryset = queryset.filter(initial=author_initial(initial))
+        prefix = normalize_author_name(params.get('prefix', ''))
+        if prefix:
+            queryset = queryset.filter(key__startswith=prefix)
+        if params.get('min_books'):
+            try:
+                queryset = queryset.filter(book_count__gte=int(params['min_books']))
+            except ValueError:
+                raise ValidationError({'min_books': "A valid integer is required."})
+        return queryset
+
+    def get_facets(self):
+        return cached_catalogue_read('author-facets', {}, lambda: {
+            row['initial']: row['count']
+            for row in Author.objects.order_by('initial').values('initial').annotate(count=Count('id'))
+        })
+
+    def get_page_data(self, request):
+        params = request.query_params
+        ordering = params.get('ordering', 'name')
+        if ordering not in self.orderings:
+            raise ValidationError({'ordering': f"Expected one of: {', '.join(self.orderings)}."})
+        paginator = self.pagination_class()
+        paginator.ordering = self.orderings[ordering]
+        page = paginator.paginate_queryset(self.get_queryset(params), request, view=self)
+        data = paginator.get_paginated_response(AuthorSerializer(page, many=True).data).data
+        data['facets'] = {'initial': self.get_facets()}
+        return data
+
+
+class BookSearchView(APIView):
+    """
+    Public API endpoint for relevance-ranked book search (``?q=&limit=``).
+    """
+    permission_classes = [permissions.AllowAny]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        if limit < 1:
+            raise ValidationError({'limit': "Ensure this value is greater than or equal to 1."})
+        books = search_books(query, limit)
+        results = []
+        for book, data in zip(books, BookSerializer(books, many=True).data):
+            data['score'] = book.score
+            results.append(data)
+        return Response({'query': query, 'results': results}, status=status.HTTP_200_OK)
+
+class BookAutocompleteView(APIView):
+    """
+    Public title and author suggestions for a prefix (``?q=&limit=``),
+    answered from the in-process index in ``library.autocomplete``.
+    """
+    # Suggestions are the same for everyone; skip decoding a JWT per keystroke.
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    default_limit = 10
+    max_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': "A valid integer is required."})
+        if limit < 1:
+            raise ValidationError({'limit': "Ensure this value is greater than or equal to 1."})
+        return Response({'query': query, **get_autocomplete().suggest(query, limit)}, status=status.HTTP_200_OK)
+
+class BookChangesView(APIView):
+    """
+    Public feed of book changes after a sequence number (``?since=&limit=``).
+
+    Mirrors pass the returned ``next`` as ``since`` until ``has_more`` is
+    false, and keep it for the next sync (see ``library.changes``).
+    """
+    permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        params = {}
+        for name, default, minimum in (('since', 0, 0), ('limit', self.default_limit, 1)):
+            try:
+                params[name] = int(request.query_params.get(name, default))
+            except ValueError:
+                raise ValidationError({name: "A valid integer is required."})
+            if params[name] < minimum:
+                raise ValidationError({name: f"Ensure this value is greater than or equal to {minimum}."})
+        since, limit = params['since'], min(params['limit'], self.max_limit)
+        changes, has_more = book_changes(since, limit)
+        return Response({
+            'since': since,
+            'next': changes[-1]['seq'] if changes else since,
+            'has_more': has_more,
+            'results': changes,
+        }, status=status.HTTP_200_OK)
+
+@require_GET
+def book_export(request):
+    """
+    Public endpoint streaming the whole catalogue.
+
+    ``?output=ndjson`` (default) or ``?output=json``; the body is gzip-encoded
+    when the client sends ``Accept-Encoding: gzip``.
+    """
+    fmt = request.GET.get('output', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unsupported output format: {fmt}")
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = StreamingHttpResponse(
+        export_books(fmt, compress=compress),
+        content_type=f"{EXPORT_FORMATS[fmt]}; charset=utf-8",
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+    return response
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 from pathlib import Path
 from datetime import timedelta
@@ -13,7 +14,7 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
 # ✅ Installed apps
 INSTALLED_APPS = [
     'corsheaders',  # CORS support
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',  # admin.autodiscover() runs in urls.py
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -26,6 +27,8 @@ INSTALLED_APPS = [
 
 # ✅ Middleware configuration
 MIDDLEWARE = [
+    'library.middleware.RequestMetricsMiddleware',  # Per-request timings (keep first)
+    'library.middleware.ReplicaRoutingMiddleware',  # Read-replica routing for GET views
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -34,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'library.querycount.NPlusOneDetectionMiddleware',  # Active only if NPLUSONE_DETECTION is set
 ]
 
 # ✅ URL configuration
@@ -42,12 +46,19 @@ ROOT_URLCONF = 'library_management.urls'
 # ✅ Templates configuration
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        # If you keep your project-level templates in BASE_DIR/templates,
-        # and your app templates inside the app, APP_DIRS=True will find them.
+        # DjangoTemplates that reports render time to the metrics middleware.
+        'BACKEND': 'library.templating.InstrumentedDjangoTemplates',
+        # Project-level templates live in BASE_DIR/templates and app templates
+        # inside each app. Compiled templates are kept by the cached loader
+        # (the dev server's autoreloader still resets it when a file changes).
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -62,27 +73,119 @@ TEMPLATES = [
 WSGI_APPLICATION = 'library_management.wsgi.application'
 
 # ✅ Database configuration (MySQL)
+# With DB_POOL=True (default) each worker process borrows connections from a
+# pool (library.dbpool) and returns them at the end of every request. The
+# default pool size splits the DB_MAX_CONNECTIONS budget between the
+# WEB_CONCURRENCY workers (same default as gunicorn.conf.py); each replica
+# gets its own pool of that size. With DB_POOL=False connections persist per
+# thread for DB_CONN_MAX_AGE seconds instead.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+DB_POOL = os.environ.get('DB_POOL', 'True') == 'True'
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', max(DB_MAX_CONNECTIONS // WEB_CONCURRENCY, 2)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'my_app_db',
-        'USER': 'my_app_user',
-        'PASSWORD': 'my_app_password',
-        'HOST': '127.0.0.1',
-        'PORT': '3306',
+        'ENGINE': 'library.pooled_mysql' if DB_POOL else 'django.db.backends.mysql',
+        'NAME': os.environ.get('DB_NAME', 'my_app_db'),
+        'USER': os.environ.get('DB_USER', 'my_app_user'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'my_app_password'),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+            'CHECK_AFTER': int(os.environ.get('DB_POOL_CHECK_AFTER', 30)),
+        },
     }
 }
 
+# ✅ SQLite for local development and benchmarks (DB_ENGINE=sqlite)
+if os.environ.get('DB_ENGINE', 'mysql') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+    }
+
+# ✅ Read replicas
+# DB_REPLICA_HOSTS=host[:port],... adds replica_0, replica_1, ... with the
+# primary's credentials. GET requests to views marked replica_reads read the
+# catalogue from a random replica; a client that writes is pinned to the
+# primary for REPLICA_PIN_SECONDS (library.routers).
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+DATABASE_ROUTERS = ['library.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# ✅ Cache configuration
+# CACHE_BACKEND selects locmem (default, per-process; used by tests), file
+# (CACHE_LOCATION is a directory) or redis (CACHE_LOCATION is a redis:// URL,
+# requires the redis package). Shared backends keep the catalogue version
+# consistent across workers; gunicorn.conf.py defaults to file and refuses
+# locmem when it runs more than one worker.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_LOCATIONS = {
+    'locmem': 'library',
+    'file': str(BASE_DIR / '.cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', CACHE_LOCATIONS[CACHE_BACKEND])
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': CACHE_LOCATION,
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 600)),
+    },
+    # The catalogue version is kept apart from the cached pages so that
+    # culling them never evicts it (checked at startup by library.checks).
+    # Redis shares its memory between the two; run it with a volatile-* or
+    # noeviction maxmemory-policy, which never evicts the unexpiring version.
+    'catalogue': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CATALOGUE_CACHE_LOCATION', {
+            'locmem': 'library-catalogue',
+            'file': f'{CACHE_LOCATION.rstrip("/")}-catalogue',
+            'redis': CACHE_LOCATION,
+        }[CACHE_BACKEND]),
+        'TIMEOUT': None,
+    },
+}
+CATALOGUE_VERSION_CACHE = 'catalogue'
+
 # ✅ JWT Authentication & DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'library.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # orjson-backed JSON (falls back to the stdlib encoder if orjson is missing)
+    'DEFAULT_RENDERER_CLASSES': (
+        'library.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 # ✅ JWT settings
@@ -92,8 +195,49 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "library.authentication.CachedTokenRefreshSerializer",
 }
 
+# ✅ Authentication caches (seconds)
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 300))
+
+# ✅ Authentication backends (ModelBackend with a per-process permission cache)
+AUTHENTICATION_BACKENDS = ['library.backends.CachedPermissionBackend']
+
+# ✅ Password hashing
+# PASSWORD_HASHER makes new and upgraded hashes; hashes made by the others
+# still verify and are rehashed on the next successful login, as are PBKDF2
+# hashes with an iteration count other than PASSWORD_PBKDF2_ITERATIONS.
+# Verification runs on PASSWORD_HASH_WORKERS threads per process, with up to
+# PASSWORD_HASH_QUEUE logins waiting (library.passwords).
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'library.passwords.PBKDF2PasswordHasher')
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in (
+        'library.passwords.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',  # requires argon2-cffi
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',  # requires bcrypt
+    ) if hasher != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+
+# ✅ Login rate limits: (attempts, seconds) token buckets per client IP and per
+# email (library.ratelimit). LOGIN_RATE_LIMIT_STORE=library.ratelimit.CacheBucketStore
+# shares the buckets between processes through the cache.
+LOGIN_RATE_LIMITS = {
+    'ip': (int(os.environ.get('LOGIN_RATE_LIMIT_IP', 30)), 60),
+    'email': (int(os.environ.get('LOGIN_RATE_LIMIT_EMAIL', 10)), 60),
+}
+LOGIN_RATE_LIMIT_STORE = os.environ.get('LOGIN_RATE_LIMIT_STORE', 'library.ratelimit.LocalBucketStore')
+# Reverse proxies (load balancer, nginx) in front of gunicorn; each appends to
+# X-Forwarded-For, which is how the per-IP limit finds the client behind them.
+LIBRARY_TRUSTED_PROXY_COUNT = int(os.environ.get('LIBRARY_TRUSTED_PROXY_COUNT', 0))
+
 # ✅ Static files configuration
 STATIC_URL = '/static/'
 # For development, include the static directory inside your app.
@@ -122,22 +266,85 @@ CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
 ]
 
-# ✅ Logging configuration (for debugging purposes)
+# ✅ Logging configuration
+# JSON lines written by a background thread (library.log), so logging never
+# blocks a request. Levels come from LOG_LEVEL, DJANGO_LOG_LEVEL and
+# SQL_LOG_LEVEL; the log file rotates at LOG_FILE_MAX_BYTES.
+LOGGING_CONFIG = 'library.log.configure_logging'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    # Handlers run on a background listener thread (library.log)
+    'queue': os.environ.get('LOG_QUEUE', 'True') == 'True',
+    'queue_size': int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+    'formatters': {
+        'json': {'()': 'library.log.JSONFormatter'},
+    },
+    'filters': {
+        # SQL records (emitted only when DEBUG is on) are sampled
+        'sample_sql': {
+            '()': 'library.log.SamplingFilter',
+            'rate': float(os.environ.get('SQL_LOG_SAMPLE_RATE', 0.01)),
+        },
+    },
     'handlers': {
         'file': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'debug.log',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.environ.get('LOG_FILE', str(BASE_DIR / 'debug.log')),
+            'maxBytes': int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024)),
+            'backupCount': int(os.environ.get('LOG_FILE_BACKUPS', 5)),
+            'delay': True,  # Open the file on the first record, not at startup
+            'formatter': 'json',
+        },
+        'console': {
+            'level': os.environ.get('LOG_CONSOLE_LEVEL', 'WARNING'),
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file'],
-            'level': 'DEBUG',
+            'handlers': ['file', 'console'],
+            'level': os.environ.get('DJANGO_LOG_LEVEL', LOG_LEVEL),
+            'propagate': True,
+        },
+        'django.db.backends': {
+            'level': os.environ.get('SQL_LOG_LEVEL', 'DEBUG'),
+            'filters': ['sample_sql'],
+        },
+        'library': {
+            'handlers': ['file', 'console'],
+            'level': LOG_LEVEL,
             'propagate': True,
         },
     },
 }
+
+# ✅ Admin changelists: above this many rows an unfiltered changelist shows the
+# row estimate from table statistics instead of running COUNT(*); unset
+# (ADMIN_ESTIMATED_COUNT_THRESHOLD=) to always count exactly.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000) or 0) or None
+
+# ✅ Metrics endpoint (/metrics); set to require "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# ✅ N+1 query detection for development: 'off', 'log' or 'raise'
+NPLUSONE_DETECTION = os.environ.get('NPLUSONE_DETECTION', 'off')
+NPLUSONE_THRESHOLD = int(os.environ.get('NPLUSONE_THRESHOLD', 5))
+
+# ✅ Search configuration
+# Dotted path to a library.search backend; unset picks one from the database vendor
+# (MySQL FULLTEXT, otherwise the in-process inverted index).
+LIBRARY_SEARCH_BACKEND = os.environ.get('LIBRARY_SEARCH_BACKEND') or None
+LIBRARY_SEARCH_INDEX_TTL = int(os.environ.get('LIBRARY_SEARCH_INDEX_TTL', 300))
+
+# In-process autocomplete index (library.autocomplete): seconds before it is
+# rebuilt to pick up other processes' writes, and the most titles and the
+# most authors it keeps.
+LIBRARY_AUTOCOMPLETE_TTL = int(os.environ.get('LIBRARY_AUTOCOMPLETE_TTL', 300))
+LIBRARY_AUTOCOMPLETE_MAX_ENTRIES = int(os.environ.get('LIBRARY_AUTOCOMPLETE_MAX_ENTRIES', 500000))
+
+# ✅ Circulation (library.circulation): loan period in days
+LIBRARY_LOAN_DAYS = int(os.environ.get('LIBRARY_LOAN_DAYS', 14))
@@ -0,0 +1,21 @@
+"""
+Lean settings profile for short-lived catalogue commands.
+
+``manage.py`` selects it for the commands in its ``CLI_COMMANDS`` unless
+``DJANGO_SETTINGS_MODULE`` is set. Only the apps those commands touch are
+installed, so startup skips the admin, DRF, simplejwt and CORS stacks.
+Do not use it for ``migrate`` or for deleting users: the token blacklist
+app, whose tables reference users, is not loaded.
+"""
+from .settings import *  # noqa: F401,F403
+
+# ✅ Only the apps needed by the catalogue commands
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'library',
+]
+
+# ✅ No request handling
+MIDDLEWARE = []
+TEMPLATES = []
@@ -3,6 +3,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+# ✅ Register ModelAdmins when the URLconf is first loaded rather than at app
+# loading (SimpleAdminConfig), keeping the admin/DRF imports off the
+# startup path of management commands.
+admin.autodiscover()
+
 # ✅ Main URL patterns
 urlpatterns = [
     # Admin site
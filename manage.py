@@ -2,7 +2,14 @@
 import os
 import sys
 
+# Short-lived catalogue commands start with the lean settings profile
+# (library_management/settings_cli.py).
+CLI_COMMANDS = {'import_books', 'export_books'}
+
 def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in CLI_COMMANDS:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings_cli')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
     try:
         from django.core.management import execute_from_command_line